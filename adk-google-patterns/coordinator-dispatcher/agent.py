@@ -1,12 +1,23 @@
 from google.adk.agents.llm_agent import LlmAgent
+from patterns_common.concurrent_tools import concurrent
+from patterns_common.tracing import Tracer
+from patterns_common.tracing.adk import instrument
 from .tools import billing_system_db, diagnostic_tool, knowledge_base, invoice_generator
 
 MODEL_NAME = "gemini-2.5-flash"
 
+# The specialists' tools are independent: asked to call them in the same
+# turn, ADK runs them at once, each with its own timeout (see patterns_common.concurrent_tools).
+billing_system_db = concurrent(billing_system_db)
+invoice_generator = concurrent(invoice_generator)
+diagnostic_tool = concurrent(diagnostic_tool)
+knowledge_base = concurrent(knowledge_base)
+
 billing_specialist = LlmAgent(
     name="BillingSpecialist", 
     model=MODEL_NAME,
     description="Handles billing inquiries and invoices.",
+    instruction="To create an invoice, call billing_system_db and invoice_generator together in the same turn.",
     tools=[billing_system_db, invoice_generator]
 )
 
@@ -14,6 +25,7 @@ tech_support = LlmAgent(
     name="TechSupportSpecialist", 
     model=MODEL_NAME,
     description="Troubleshoots technical issues.",
+    instruction="Call diagnostic_tool and knowledge_base together in the same turn, then summarize both.",
     tools=[diagnostic_tool, knowledge_base]
 )
 
@@ -26,4 +38,5 @@ coordinator = LlmAgent(
     sub_agents=[billing_specialist, tech_support]
 )
 
-root_agent = coordinator
\ No newline at end of file
+# Every agent, model and tool call is recorded as a span (see patterns_common.tracing)
+root_agent = instrument(coordinator, Tracer("adk", "coordinator-dispatcher"))
\ No newline at end of file
@@ -1,30 +1,58 @@
 from google.adk.agents.llm_agent import LlmAgent
 from google.adk.agents.sequential_agent import SequentialAgent
 from google.adk.agents.parallel_agent import ParallelAgent
+from patterns_common.tracing import Tracer
+from patterns_common.tracing.adk import instrument
+from patterns_common.code_review.cache import ReviewCache
+from .cache import review_cache_callbacks
+from .prepass import performance_prepass, security_prepass, style_prepass
 
 MODEL_NAME = "gemini-2.5-flash-lite"
 
+SECURITY_INSTRUCTION = "Check for vulnerabilities like injection attacks."
+STYLE_INSTRUCTION = "Check for PEP8 compliance and formatting issues."
+PERFORMANCE_INSTRUCTION = "Analyze time complexity and resource usage."
 
-# Define parallel workers
+# Reviews are cached by input + instruction, and a unified diff per changed
+# function (see cache.py), so re-sending unchanged code skips the LLM call for
+# that reviewer. The SQLite file is only created on the first review.
+review_cache = ReviewCache()
+
+
+# Define parallel workers. The deterministic pre-pass runs before the cache:
+# a reviewer whose tool finds nothing in valid Python gets a templated report
+# instead of an LLM call.
+security_scanner_before, security_scanner_model, security_scanner_after = review_cache_callbacks(review_cache, SECURITY_INSTRUCTION, "security_report")
 security_scanner = LlmAgent(
     name="SecurityAuditor",
     model=MODEL_NAME,
-    instruction="Check for vulnerabilities like injection attacks.",
-    output_key="security_report"
+    instruction=SECURITY_INSTRUCTION,
+    output_key="security_report",
+    before_agent_callback=[security_prepass, security_scanner_before],
+    before_model_callback=security_scanner_model,
+    after_agent_callback=security_scanner_after,
 )
 
+style_checker_before, style_checker_model, style_checker_after = review_cache_callbacks(review_cache, STYLE_INSTRUCTION, "style_report")
 style_checker = LlmAgent(
     name="StyleEnforcer", 
     model=MODEL_NAME,
-    instruction="Check for PEP8 compliance and formatting issues.",
-    output_key="style_report"
+    instruction=STYLE_INSTRUCTION,
+    output_key="style_report",
+    before_agent_callback=[style_prepass, style_checker_before],
+    before_model_callback=style_checker_model,
+    after_agent_callback=style_checker_after,
 )
 
+complexity_analyzer_before, complexity_analyzer_model, complexity_analyzer_after = review_cache_callbacks(review_cache, PERFORMANCE_INSTRUCTION, "performance_report")
 complexity_analyzer = LlmAgent(
     name="PerformanceAnalyst", 
     model=MODEL_NAME,
-    instruction="Analyze time complexity and resource usage.",
-    output_key="performance_report"
+    instruction=PERFORMANCE_INSTRUCTION,
+    output_key="performance_report",
+    before_agent_callback=[performance_prepass, complexity_analyzer_before],
+    before_model_callback=complexity_analyzer_model,
+    after_agent_callback=complexity_analyzer_after,
 )
 
 # Fan-out (The Swarm)
@@ -45,5 +73,6 @@ workflow = SequentialAgent(
     name="CodeReviewWorkflow",
     sub_agents=[parallel_reviews, pr_summarizer])
 
-root_agent = workflow
+# Every agent, model and tool call is recorded as a span (see patterns_common.tracing)
+root_agent = instrument(workflow, Tracer("adk", "parallel-fan-out"))
 
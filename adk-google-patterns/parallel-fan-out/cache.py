@@ -0,0 +1,115 @@
+import os
+from typing import Dict, List, Optional, Tuple
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.genai import types
+from patterns_common.cache import cache_key
+from patterns_common.code_review.cache import ReviewCache
+from patterns_common.code_review.regions import (
+    ChangedRegion,
+    diff_regions,
+    is_unified_diff,
+    merge_region_reports,
+    split_by_region,
+)
+
+# Diff inputs are resolved against this checkout to find the changed functions.
+DEFAULT_REPO_ROOT = "."
+
+DIFF_PROMPT = (
+    "Review only the functions below, which changed in a diff. Start the review "
+    "of each function with its '### ' heading line, copied exactly.\n\n"
+)
+
+
+def _user_text(callback_context: CallbackContext) -> str:
+    content = callback_context.user_content
+    if not content or not content.parts:
+        return ""
+    return "".join(part.text or "" for part in content.parts)
+
+
+def _regions(text: str) -> List[ChangedRegion]:
+    if not is_unified_diff(text):
+        return []
+    return diff_regions(text, os.getenv("REVIEW_REPO_ROOT", DEFAULT_REPO_ROOT))
+
+
+def review_cache_callbacks(cache: ReviewCache, instruction: str, output_key: str):
+    """
+    Builds the agent and model callbacks that cache a reviewer's report.
+
+    Source code is cached whole: the key is the input plus the reviewer
+    instruction. A unified diff is reviewed per function instead, like the
+    CrewAI `run_incremental`: the changed functions are read from the
+    checkout at `REVIEW_REPO_ROOT`, each one's report is keyed by its body
+    plus the instruction, and only the functions without a cached report are
+    sent to the LLM. The reports are merged under per-function headings into
+    `output_key`. When every report is cached the LLM call is skipped.
+
+    Returns:
+        A (before_agent_callback, before_model_callback, after_agent_callback)
+        triple.
+    """
+    # invocation id -> (changed regions, cached report of each or None)
+    pending: Dict[str, Tuple[List[ChangedRegion], List[Optional[str]]]] = {}
+
+    def region_key(region: ChangedRegion) -> str:
+        return cache_key(region.source, instruction)
+
+    def before_agent(callback_context: CallbackContext) -> Optional[types.Content]:
+        text = _user_text(callback_context)
+        regions = _regions(text)
+        if regions:
+            cached = [cache.get(region_key(region)) for region in regions]
+            if None in cached:
+                pending[callback_context.invocation_id] = (regions, cached)
+                return None
+            report = merge_region_reports(regions, dict(zip(regions, cached)))
+        else:
+            report = cache.get(cache_key(text, instruction))
+            if report is None:
+                return None
+        callback_context.state[output_key] = report
+        return types.Content(role="model", parts=[types.Part(text=report)])
+
+    def before_model(callback_context: CallbackContext, llm_request: LlmRequest) -> None:
+        entry = pending.get(callback_context.invocation_id)
+        if entry is None:
+            return None
+        regions, cached = entry
+        sections = [
+            f"{region.heading}\n```python\n{region.source}\n```"
+            for region, report in zip(regions, cached) if report is None
+        ]
+        for content in reversed(llm_request.contents):
+            if content.role == "user":
+                content.parts = [types.Part(text=DIFF_PROMPT + "\n\n".join(sections))]
+                break
+        return None
+
+    def after_agent(callback_context: CallbackContext) -> Optional[types.Content]:
+        report = callback_context.state.get(output_key)
+        entry = pending.pop(callback_context.invocation_id, None)
+        if not report:
+            return None
+        if entry is None:
+            cache.put(cache_key(_user_text(callback_context), instruction), str(report))
+            return None
+
+        regions, cached = entry
+        parts = {region: text for region, text in zip(regions, cached) if text is not None}
+        fresh = split_by_region(str(report), [region for region in regions if region not in parts])
+        for region, text in fresh.items():
+            cache.put(region_key(region), text)
+        parts.update(fresh)
+        merged = merge_region_reports(regions, parts)
+        if len(parts) < len(regions):
+            # Functions the model did not review under their heading keep the
+            # raw report, uncached.
+            merged = f"{merged}\n\n{report}" if merged else str(report)
+        callback_context.state[output_key] = merged
+        return None
+
+    return before_agent, before_model, after_agent
@@ -0,0 +1,51 @@
+from typing import Callable, List, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.genai import types
+from patterns_common.code_review.analysis import AnalysisContext, get_context
+from patterns_common.code_review.findings import Finding
+from patterns_common.code_review.review import (
+    format_performance_report,
+    format_security_report,
+    format_style_report,
+    performance_findings,
+    security_findings,
+    style_findings,
+)
+
+from .cache import _user_text
+
+CLEAN_REPORTS = {
+    "security_report": format_security_report([]),
+    "style_report": format_style_report([]),
+    "performance_report": format_performance_report([]),
+}
+
+PREPASS_NOTE = " (deterministic pre-pass, LLM review skipped)"
+
+
+def prepass_callback(check: Callable[[AnalysisContext], List[Finding]], output_key: str):
+    """
+    Builds a before_agent_callback that runs a deterministic tool first.
+
+    The checks are the shared rule engine of the CrewAI pattern
+    (patterns_common.code_review). When the input parses as Python and the
+    check finds nothing, the templated clean report is written into
+    `output_key` and the reviewer's LLM call is skipped. Unparsable input or
+    any finding falls through to the LLM.
+    """
+
+    def before_agent(callback_context: CallbackContext) -> Optional[types.Content]:
+        ctx = get_context(_user_text(callback_context))
+        if ctx.tree is None or check(ctx):
+            return None
+        report = CLEAN_REPORTS[output_key] + PREPASS_NOTE
+        callback_context.state[output_key] = report
+        return types.Content(role="model", parts=[types.Part(text=report)])
+
+    return before_agent
+
+
+security_prepass = prepass_callback(security_findings, "security_report")
+style_prepass = prepass_callback(style_findings, "style_report")
+performance_prepass = prepass_callback(performance_findings, "performance_report")
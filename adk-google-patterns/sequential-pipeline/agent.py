@@ -1,35 +1,62 @@
 from google.adk.agents.llm_agent import LlmAgent
 from google.adk.agents.sequential_agent import SequentialAgent
-from .tools import pdf_parser, regex_extractor, summary_engine
+from patterns_common.invoices.cache import ResultCache, cached_stage
+from patterns_common.invoices.sink import sink_from_env
+from patterns_common.tracing import Tracer
+from patterns_common.tracing.adk import instrument
+from .sink import sink_callback
+from .stages import ToolStage
+from .tools import (
+    EXTRACTOR_VERSION, PARSER_VERSION, is_truncated, pdf_parser, pdf_stream_extractor, regex_extractor, summary_engine,
+)
 
 
 MODEL_NAME = "gemini-2.5-flash-lite"
 
+# Parse and extract results are cached by file content (see patterns_common.invoices.cache)
+result_cache = ResultCache()
+pdf_parser = cached_stage(result_cache, "pdf_parser", PARSER_VERSION)(pdf_parser)
+pdf_stream_extractor = cached_stage(result_cache, "pdf_stream_extractor", EXTRACTOR_VERSION)(pdf_stream_extractor)
+
+# Extracted records are also written to a columnar sink when INVOICE_SINK is set (see patterns_common.invoices.sink)
+invoice_sink = sink_from_env()
+output_sink = sink_callback(invoice_sink, "structured_data") if invoice_sink is not None else None
+
+
+def parse(file_path: str, state: dict) -> str:
+    return pdf_parser(file_path)
 
-# Step 1: Parse the PDF
-parser = LlmAgent(
-    name="ParserAgent",
-    model=MODEL_NAME,
-    instruction="Parse raw PDF and extract text.",
-    tools=[pdf_parser],
-    output_key="raw_text" 
-)
+
+def extract(file_path: str, state: dict) -> dict:
+    """
+    Extracts the fields from the parser stage's text. The PDF is streamed
+    again only when that text was truncated and still lacks a field.
+    """
+    text = state.get("raw_text", "")
+    if text.startswith("Error:"):
+        return {"error": text}
+    data = regex_extractor(text)
+    if None in data.values() and is_truncated(text):
+        streamed = pdf_stream_extractor(file_path)
+        if "error" not in streamed:
+            data = streamed
+    return data
+
+
+# Step 1: Parse the PDF. Steps 1 and 2 run the tools directly, with no LLM
+# round trip; only the summarizer uses the model.
+parser = ToolStage(name="ParserAgent", func=parse, output_key="raw_text")
 
 # Step 2: Extract structured data
-extractor = LlmAgent(
-    name="ExtractorAgent",
-    model=MODEL_NAME,
-    instruction="Extract structured data from {raw_text}.",
-    tools=[regex_extractor],
-    output_key="structured_data"
-)
+extractor = ToolStage(name="ExtractorAgent", func=extract, output_key="structured_data")
 
 # Step 3: Summarize
 summarizer = LlmAgent(
     name="SummarizerAgent",
     model=MODEL_NAME,
     instruction="Generate summary from {structured_data}.",
-    tools=[summary_engine]
+    tools=[summary_engine],
+    after_agent_callback=output_sink,
 )
 
 # Orchestrate the Assembly Line
@@ -39,4 +66,5 @@ pipeline = SequentialAgent(
 )
 
 
-root_agent = pipeline
\ No newline at end of file
+# Every agent, model and tool call is recorded as a span (see patterns_common.tracing)
+root_agent = instrument(pipeline, Tracer("adk", "sequential-pipeline"))
\ No newline at end of file
@@ -0,0 +1,22 @@
+from typing import Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.genai import types
+from patterns_common.invoices.sink import as_record
+
+from .stages import user_pdf
+
+
+def sink_callback(sink, output_key: str):
+    """
+    Builds an after_agent callback that writes the record the agent left in
+    `output_key` to the sink, with the PDF named in the request as source.
+    """
+
+    def after_agent(callback_context: CallbackContext) -> Optional[types.Content]:
+        record = as_record(callback_context.state.get(output_key))
+        if record is not None:
+            sink.write(record, source=user_pdf(callback_context))
+        return None
+
+    return after_agent
@@ -0,0 +1,53 @@
+import asyncio
+import json
+import os
+import re
+from typing import AsyncGenerator, Callable, Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+
+NO_PDF = "Error: No PDF path found in the request."
+
+_PDF_PATH = re.compile(r"[^\s'\"`]+\.pdf\b", re.IGNORECASE)
+
+
+def user_pdf(context) -> Optional[str]:
+    """First existing PDF path mentioned in the user's message (callback or invocation context)."""
+    content = context.user_content
+    if not content or not content.parts:
+        return None
+    text = "".join(part.text or "" for part in content.parts)
+    for path in _PDF_PATH.findall(text):
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+class ToolStage(BaseAgent):
+    """
+    A pipeline stage that calls a deterministic function directly instead of
+    asking an LLM to call it as a tool.
+
+    `func(file_path, state)` receives the PDF path named in the user's message
+    and the session state, runs in a worker thread, and its result is stored
+    in session state under `output_key` for the next stages.
+    """
+
+    func: Callable[[str, dict], object]
+    output_key: str
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        file_path = user_pdf(ctx)
+        state = dict(ctx.session.state)
+        result = NO_PDF if file_path is None else await asyncio.to_thread(self.func, file_path, state)
+        text = result if isinstance(result, str) else json.dumps(result)
+        yield Event(
+            author=self.name,
+            invocation_id=ctx.invocation_id,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=text)]),
+            actions=EventActions(state_delta={self.output_key: result}),
+        )
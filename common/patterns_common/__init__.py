@@ -0,0 +1 @@
+"""Code shared by the LangGraph, Google ADK and CrewAI implementations of the patterns."""
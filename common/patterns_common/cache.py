@@ -0,0 +1,104 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+
+def cache_key(*parts: str) -> str:
+    """Hash of the given parts (e.g. a function body plus a reviewer instruction)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8", "surrogatepass"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class ContentCache:
+    """
+    Persistent, size-bounded text store under content-derived keys.
+
+    Entries live in one table of a local SQLite file, opened on first use so
+    that building a cache at import time creates nothing in the working
+    directory. When the total stored size exceeds `max_bytes`, the least
+    recently used entries are evicted. Subclasses pick the file, the size
+    bound and the table, and may encode richer values on top of `get`/`put`.
+    """
+
+    table = "entries"
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            db.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)"
+            )
+            db.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_accessed ON {self.table} (accessed)")
+            db.commit()
+            self._db = db
+        return self._db
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            db = self._connection()
+            row = db.execute(f"SELECT value FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            db.execute(f"UPDATE {self.table} SET accessed = ? WHERE key = ?", (time.time(), key))
+            db.commit()
+            return row[0]
+
+    def put(self, key: str, value: str) -> None:
+        size = len(value.encode("utf-8", "surrogatepass"))
+        with self._lock:
+            db = self._connection()
+            db.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                (key, value, size, time.time()),
+            )
+            self._evict(db)
+            db.commit()
+
+    def _evict(self, db: sqlite3.Connection) -> None:
+        total = db.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.table}").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in db.execute(f"SELECT key, size FROM {self.table} ORDER BY accessed").fetchall():
+            db.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def stats(self) -> dict:
+        """Hit/miss counters for this process plus the stored size."""
+        with self._lock:
+            entries, size = self._connection().execute(
+                f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -0,0 +1,287 @@
+"""
+HTTP service and load tester shared by the coordinator-dispatcher
+implementations. Each framework's server.py only provides the handler that
+runs one message through its coordinator, and an offline stub model.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+MAX_BODY_BYTES = 64 * 1024
+
+# Messages sent by each simulated conversation of the load test: greetings and
+# clear-cut requests are routed locally, the rest go to the model.
+LOAD_TEST_MESSAGES = (
+    "oi",
+    "minha internet caiu",
+    "Quero uma fatura para Ana de 100 reais",
+    "what can you do for a small business?",
+    "where is my invoice",
+)
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 413: "Payload Too Large",
+            500: "Internal Server Error", 503: "Service Unavailable"}
+
+Handler = Callable[[str, str], Awaitable[Dict[str, Any]]]
+
+
+@dataclass
+class LatencyStats:
+    """Requests served, failed and rejected, with throughput and latency percentiles over the last `window` requests."""
+
+    window: int = 100000
+    served: int = 0
+    errors: int = 0
+    rejected: int = 0
+    started: Optional[float] = None
+    latencies: Deque[float] = field(default_factory=deque)
+
+    def __post_init__(self):
+        self.latencies = deque(self.latencies, maxlen=self.window)
+
+    def record(self, seconds: float, error: bool = False) -> None:
+        if self.started is None:
+            self.started = time.monotonic() - seconds
+        self.served += 1
+        self.errors += error
+        self.latencies.append(seconds)
+
+    def percentile(self, q: float) -> float:
+        """Nearest-rank percentile of the recorded latencies, in seconds."""
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+    @property
+    def rps(self) -> float:
+        """Requests per second since the first request started."""
+        elapsed = time.monotonic() - self.started if self.started is not None else 0.0
+        return self.served / elapsed if elapsed else 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "requests": self.served,
+            "errors": self.errors,
+            "rejected": self.rejected,
+            "rps": round(self.rps, 2),
+            **{f"p{int(q * 100)}_ms": round(self.percentile(q) * 1000, 1) for q in (0.5, 0.95, 0.99)},
+        }
+
+    def report(self) -> str:
+        s = self.snapshot()
+        return (f"Requests: {s['requests']} ({s['errors']} errors, {s['rejected']} rejected), {s['rps']:.1f} req/s, "
+                f"latency p50 {s['p50_ms']:.0f} ms, p95 {s['p95_ms']:.0f} ms, p99 {s['p99_ms']:.0f} ms")
+
+
+class ChatServer:
+    """
+    Serves many conversations at once over HTTP/1.1 (with keep-alive):
+
+        POST /chat   {"session_id": "...", "message": "..."}
+                     -> {"session_id", "reply", "intent", "latency_ms"}
+        GET  /stats  -> requests per second and p50/p95/p99 latency
+
+    At most `concurrency` messages are processed at a time; the others wait.
+    Once `max_pending` messages are in the server, new ones are rejected with
+    503 and a Retry-After header instead of queuing without bound. Messages
+    of one session are processed in order, one at a time. A request without
+    a session_id starts a new conversation.
+    """
+
+    def __init__(self, handle: Handler, concurrency: int, max_pending: int,
+                 extra_stats: Optional[Callable[[], Dict[str, Any]]] = None):
+        self.handle = handle
+        self.concurrency = concurrency
+        self.max_pending = max_pending
+        self.extra_stats = extra_stats
+        self.stats = LatencyStats()
+        self.pending = 0
+        self._workers = asyncio.Semaphore(concurrency)
+        # session -> (lock, requests holding or waiting for it)
+        self._sessions: Dict[str, List[Any]] = {}
+
+    async def chat(self, session_id: str, message: str) -> Tuple[int, Dict[str, Any]]:
+        if self.pending >= self.max_pending:
+            self.stats.rejected += 1
+            return 503, {"error": "Server busy, retry later."}
+        self.pending += 1
+        entry = self._sessions.setdefault(session_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        started = time.perf_counter()
+        try:
+            async with entry[0], self._workers:
+                result = await self.handle(session_id, message)
+        except Exception as e:
+            self.stats.record(time.perf_counter() - started, error=True)
+            return 500, {"session_id": session_id, "error": f"{type(e).__name__}: {e}"}
+        finally:
+            self.pending -= 1
+            entry[1] -= 1
+            if not entry[1]:
+                del self._sessions[session_id]
+        latency = time.perf_counter() - started
+        self.stats.record(latency)
+        return 200, {"session_id": session_id, **result, "latency_ms": round(latency * 1000, 1)}
+
+    async def _route(self, method: str, path: str, body: bytes) -> Tuple[int, Dict[str, Any]]:
+        if method == "GET" and path == "/stats":
+            stats = {**self.stats.snapshot(), "pending": self.pending, "concurrency": self.concurrency}
+            return 200, {**stats, **(self.extra_stats() if self.extra_stats else {})}
+        if method != "POST" or path != "/chat":
+            return 404, {"error": f"No route for {method} {path}"}
+        try:
+            request = json.loads(body or b"{}")
+        except ValueError:
+            return 400, {"error": "Body must be JSON."}
+        message = request.get("message") if isinstance(request, dict) else None
+        if not isinstance(message, str) or not message.strip():
+            return 400, {"error": "'message' must be a non-empty string."}
+        return await self.chat(str(request.get("session_id") or uuid.uuid4().hex), message)
+
+    async def _connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while request_line := await reader.readline():
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {"error": "Body too large."}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                status, payload = await self._route(method, path, body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, payload: Dict[str, Any], keep_alive: bool) -> None:
+        body = json.dumps(payload, default=str).encode("utf-8")
+        headers = [
+            f"HTTP/1.1 {status} {_REASONS[status]}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        if status == 503:
+            headers.append("Retry-After: 1")
+        writer.write(("\r\n".join(headers) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, report_every: float = 10.0) -> None:
+        server = await asyncio.start_server(self._connection, host, port, backlog=4096)
+        print(f"🌐 Serving on http://{host}:{port} ({self.concurrency} workers, up to {self.max_pending} pending)")
+        async with server:
+            while True:
+                await asyncio.sleep(report_every)
+                if self.stats.served or self.stats.rejected:
+                    print(f"📊 {self.stats.report()}")
+
+
+async def _post(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, host: str,
+                payload: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+    body = json.dumps(payload).encode("utf-8")
+    writer.write(f"POST /chat HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def load_test(host: str, port: int, sessions: int, messages: int) -> LatencyStats:
+    """
+    Opens `sessions` simultaneous conversations, each on its own connection,
+    sending `messages` messages one after another, and measures them from the
+    client side.
+    """
+    stats = LatencyStats()
+
+    async def conversation(number: int) -> None:
+        reader, writer = await asyncio.open_connection(host, port)
+        session_id = f"load-{number}"
+        try:
+            for i in range(messages):
+                started = time.perf_counter()
+                status, _ = await _post(reader, writer, host, {
+                    "session_id": session_id, "message": LOAD_TEST_MESSAGES[(number + i) % len(LOAD_TEST_MESSAGES)],
+                })
+                if status == 503:
+                    stats.rejected += 1
+                else:
+                    stats.record(time.perf_counter() - started, error=status != 200)
+        finally:
+            writer.close()
+
+    await asyncio.gather(*(conversation(number) for number in range(sessions)))
+    return stats
+
+
+def command_line(description: str, default_concurrency: int, concurrency_help: str = "Messages processed at once",
+                 stub_help: str = "Use an offline stub LLM with this latency instead of the real model"):
+    """Parses the `serve` and `load` subcommands common to every coordinator's server.py."""
+    parser = argparse.ArgumentParser(description=description)
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    serve = subcommands.add_parser("serve", help="Run the HTTP service")
+    serve.add_argument("--host", default=DEFAULT_HOST)
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve.add_argument("--concurrency", type=int,
+                       default=int(os.getenv("COORDINATOR_CONCURRENCY", default_concurrency)), help=concurrency_help)
+    serve.add_argument("--max-pending", type=int, default=int(os.getenv("COORDINATOR_MAX_PENDING", 1024)),
+                       help="Messages in the server (processed or waiting) before new ones are rejected with 503")
+    serve.add_argument("--stub-llm", type=float, metavar="SECONDS", nargs="?", const=0.2, help=stub_help)
+    load = subcommands.add_parser("load", help="Load test a running service")
+    load.add_argument("--host", default=DEFAULT_HOST)
+    load.add_argument("--port", type=int, default=DEFAULT_PORT)
+    load.add_argument("--sessions", type=int, default=200, help="Simultaneous conversations")
+    load.add_argument("--messages", type=int, default=5, help="Messages per conversation")
+    return parser.parse_args()
+
+
+def run_load_test(args) -> None:
+    print(f"🚀 {args.sessions} conversations x {args.messages} messages...")
+    stats = asyncio.run(load_test(args.host, args.port, args.sessions, args.messages))
+    print(f"📊 {stats.report()}")
+
+
+def run_server(handle: Handler, args, extra_stats: Optional[Callable[[], Dict[str, Any]]] = None,
+               on_stop: Optional[Callable[[], None]] = None) -> None:
+    """Serves `handle` with the `serve` options until interrupted, then prints the stats."""
+
+    async def run():
+        # Synchronous work (LangGraph nodes, CrewAI kickoffs) runs in the
+        # loop's default executor: size it so every worker gets a thread.
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=args.concurrency))
+        server = ChatServer(handle, args.concurrency, args.max_pending, extra_stats=extra_stats)
+        try:
+            await server.serve(args.host, args.port)
+        finally:
+            print(f"📊 {server.stats.report()}")
+            if on_stop is not None:
+                on_stop()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
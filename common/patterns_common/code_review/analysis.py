@@ -0,0 +1,190 @@
+import ast
+import hashlib
+import io
+import keyword
+import tokenize
+from collections import Counter, OrderedDict
+from functools import cached_property
+from typing import List, Optional
+
+MAX_CACHED_CONTEXTS = 32
+
+
+class AnalysisContext:
+    """
+    Parse-once view of a code snippet shared by the review tools.
+
+    Every structure (line table, token stream, AST and the derived indexes)
+    is built lazily on first access and then reused, so the security, style
+    and complexity tools all query the same precomputed data instead of
+    rescanning the raw string.
+    """
+
+    def __init__(self, code: str, digest: Optional[str] = None):
+        self.code = code
+        self.digest = digest or content_hash(code)
+
+    @cached_property
+    def lines(self) -> List[str]:
+        """Source lines without their line terminators."""
+        return self.code.split('\n')
+
+    @cached_property
+    def line_offsets(self) -> List[int]:
+        """Character offset where each (1-based) line starts, index 0 unused."""
+        offsets = [0, 0]
+        for line in self.lines[:-1]:
+            offsets.append(offsets[-1] + len(line) + 1)
+        return offsets
+
+    @cached_property
+    def tokens(self) -> List[tokenize.TokenInfo]:
+        """
+        Token stream of the snippet.
+
+        Review inputs are often fragments, so tokenization stops quietly at the
+        first error and keeps whatever was produced up to that point.
+        """
+        tokens = []
+        try:
+            for token in tokenize.generate_tokens(io.StringIO(self.code).readline):
+                tokens.append(token)
+        except (tokenize.TokenError, IndentationError, SyntaxError):
+            pass
+        return tokens
+
+    @cached_property
+    def tree(self) -> Optional[ast.Module]:
+        """Parsed module, or None when the snippet is not valid Python."""
+        try:
+            return ast.parse(self.code)
+        except (SyntaxError, ValueError):
+            return None
+
+    @cached_property
+    def comment_lines(self) -> frozenset:
+        """Line numbers whose only content is a comment."""
+        code_lines = set()
+        comment_lines = set()
+        for token in self.tokens:
+            if token.type == tokenize.COMMENT:
+                comment_lines.add(token.start[0])
+            elif token.type not in (tokenize.NL, tokenize.NEWLINE, tokenize.INDENT,
+                                    tokenize.DEDENT, tokenize.ENDMARKER):
+                code_lines.update(range(token.start[0], token.end[0] + 1))
+        return frozenset(comment_lines - code_lines)
+
+    @cached_property
+    def string_literals(self) -> List[tokenize.TokenInfo]:
+        """All string tokens, in source order."""
+        return [token for token in self.tokens if token.type == tokenize.STRING]
+
+    @cached_property
+    def keyword_counts(self) -> Counter:
+        """Occurrences of each Python keyword used as a token."""
+        return Counter(
+            token.string for token in self.tokens
+            if token.type == tokenize.NAME and keyword.iskeyword(token.string)
+        )
+
+    @cached_property
+    def operator_counts(self) -> Counter:
+        """Occurrences of each operator token."""
+        return Counter(token.string for token in self.tokens if token.type == tokenize.OP)
+
+    @cached_property
+    def call_names(self) -> Counter:
+        """
+        Dotted names of called expressions, e.g. ``os.system`` or ``eval``.
+
+        Built from the token stream rather than the AST so that snippets that
+        do not parse still yield their calls.
+        """
+        calls = Counter()
+        dotted = []
+        after_dot = False
+        previous = None
+        for token in self.tokens:
+            if token.type == tokenize.NAME and after_dot:
+                dotted.append(token.string)
+                after_dot = False
+            elif token.type == tokenize.OP and token.string == '.' and dotted and not after_dot:
+                after_dot = True
+            else:
+                if token.type == tokenize.OP and token.string == '(' and dotted and not after_dot \
+                        and not keyword.iskeyword(dotted[0]):
+                    calls['.'.join(dotted)] += 1
+                is_definition = previous is not None and previous.string in ('def', 'class')
+                dotted = [token.string] if token.type == tokenize.NAME and not is_definition else []
+                after_dot = False
+            if token.type not in (tokenize.NL, tokenize.COMMENT):
+                previous = token
+        return calls
+
+    @cached_property
+    def wildcard_imports(self) -> List[int]:
+        """Line numbers of ``from module import *`` statements."""
+        lines = []
+        previous = None
+        for token in self.tokens:
+            if token.type == tokenize.OP and token.string == '*' and previous is not None \
+                    and previous.type == tokenize.NAME and previous.string == 'import':
+                lines.append(token.start[0])
+            if token.type not in (tokenize.NL, tokenize.COMMENT):
+                previous = token
+        return lines
+
+    @cached_property
+    def function_defs(self) -> List[ast.AST]:
+        """Function and async function definitions, in source order."""
+        if self.tree is None:
+            return []
+        nodes = [node for node in ast.walk(self.tree)
+                 if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))]
+        return sorted(nodes, key=lambda node: (node.lineno, node.col_offset))
+
+    @cached_property
+    def class_defs(self) -> List[ast.AST]:
+        """Class definitions, in source order."""
+        if self.tree is None:
+            return []
+        nodes = [node for node in ast.walk(self.tree) if isinstance(node, ast.ClassDef)]
+        return sorted(nodes, key=lambda node: (node.lineno, node.col_offset))
+
+    def line(self, lineno: int) -> str:
+        """Returns the text of a 1-based line number."""
+        return self.lines[lineno - 1]
+
+
+def content_hash(code: str) -> str:
+    """Stable content hash used as the cache key for a snippet."""
+    return hashlib.sha256(code.encode('utf-8', 'surrogatepass')).hexdigest()
+
+
+_contexts: "OrderedDict[str, AnalysisContext]" = OrderedDict()
+
+
+def get_context(code: str) -> AnalysisContext:
+    """
+    Returns the shared analysis context for a snippet.
+
+    Contexts are cached by content hash, so the three review tools (and agent
+    retries) analysing the same input reuse one parse.
+
+    Args:
+        code: The Python code under review.
+
+    Returns:
+        The cached or newly created AnalysisContext.
+    """
+    digest = content_hash(code)
+    context = _contexts.get(digest)
+    if context is not None:
+        _contexts.move_to_end(digest)
+        return context
+
+    context = AnalysisContext(code, digest)
+    _contexts[digest] = context
+    if len(_contexts) > MAX_CACHED_CONTEXTS:
+        _contexts.popitem(last=False)
+    return context
@@ -0,0 +1,23 @@
+import os
+from typing import Optional
+
+from ..cache import ContentCache
+
+DEFAULT_CACHE_PATH = ".review_cache/reviews.sqlite"
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class ReviewCache(ContentCache):
+    """
+    Persistent, size-bounded store for review results, keyed with cache_key()
+    over the reviewed code and the reviewer's instructions.
+
+    The file and size bound come from `REVIEW_CACHE_PATH` and
+    `REVIEW_CACHE_MAX_BYTES` unless given.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_bytes: Optional[int] = None):
+        super().__init__(
+            path or os.getenv("REVIEW_CACHE_PATH", DEFAULT_CACHE_PATH),
+            max_bytes or int(os.getenv("REVIEW_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+        )
@@ -0,0 +1,270 @@
+import ast
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+from .analysis import AnalysisContext
+
+MAX_CACHED_FUNCTIONS = 4096
+MODULE_SCOPE = "<module>"
+
+FUNCTION, CLASS_BODY, MODULE = "function", "class body", "module"
+
+_ALLOCATING_CALLS = {"list", "dict", "set", "tuple", "sorted", "bytearray", "copy", "deepcopy"}
+_GROWING_METHODS = {"append", "extend", "insert", "copy"}
+
+
+@dataclass(frozen=True)
+class FunctionMetrics:
+    """
+    Complexity metrics of a single scope: a function, the statements of a
+    class body, or the module-level code.
+
+    `is_recursive` is set for direct self-calls and for functions on a call
+    cycle through other functions of the same snippet; `recursive_with`
+    names the other functions of that cycle. Calls are resolved by name
+    only (plain calls and ``self.``/``cls.`` method calls), so recursion
+    through aliases, callbacks or other modules is not detected.
+    """
+
+    name: str
+    lineno: int
+    max_loop_depth: int
+    cyclomatic: int
+    is_recursive: bool
+    loop_allocations: Tuple[Tuple[int, str], ...]
+    kind: str = FUNCTION
+    calls: FrozenSet[str] = frozenset()
+    recursive_with: Tuple[str, ...] = ()
+
+
+class _MetricsVisitor(ast.NodeVisitor):
+    """
+    Single walk over one function body (or class body, or module).
+
+    Nested functions and classes are not entered: they are analysed as their
+    own scopes, so every node of the tree is visited exactly once overall.
+    `name` is None for scopes that cannot call themselves.
+    """
+
+    def __init__(self, name: Optional[str], origin: int):
+        self.name = name
+        self.origin = origin
+        self.loop_depth = 0
+        self.max_loop_depth = 0
+        self.decisions = 0
+        self.is_recursive = False
+        self.allocations = []
+        self.calls = set()
+
+    def run(self, statements):
+        for statement in statements:
+            self.visit(statement)
+        return self
+
+    def _allocation(self, node, kind):
+        if self.loop_depth:
+            self.allocations.append((node.lineno - self.origin, kind))
+
+    def _loop(self, node):
+        self.decisions += 1
+        self.loop_depth += 1
+        self.max_loop_depth = max(self.max_loop_depth, self.loop_depth)
+        self.generic_visit(node)
+        self.loop_depth -= 1
+
+    visit_For = visit_AsyncFor = visit_While = _loop
+
+    def _comprehension(self, node):
+        self._allocation(node, "comprehension")
+        depth = len(node.generators)
+        self.decisions += depth + sum(len(generator.ifs) for generator in node.generators)
+        self.loop_depth += depth
+        self.max_loop_depth = max(self.max_loop_depth, self.loop_depth)
+        self.generic_visit(node)
+        self.loop_depth -= depth
+
+    visit_ListComp = visit_SetComp = visit_DictComp = visit_GeneratorExp = _comprehension
+
+    def _decision(self, node):
+        self.decisions += 1
+        self.generic_visit(node)
+
+    visit_If = visit_IfExp = visit_ExceptHandler = visit_Assert = visit_match_case = _decision
+
+    def visit_BoolOp(self, node):
+        self.decisions += len(node.values) - 1
+        self.generic_visit(node)
+
+    def _container(self, node):
+        self._allocation(node, "container literal")
+        self.generic_visit(node)
+
+    visit_List = visit_Dict = visit_Set = _container
+
+    def visit_AugAssign(self, node):
+        if isinstance(node.op, ast.Add) and isinstance(node.target, ast.Name):
+            self._allocation(node, f"'{node.target.id} +=' concatenation")
+        self.generic_visit(node)
+
+    def visit_Call(self, node):
+        func = node.func
+        if isinstance(func, ast.Name):
+            self.calls.add(func.id)
+            if func.id == self.name:
+                self.is_recursive = True
+            elif func.id in _ALLOCATING_CALLS:
+                self._allocation(node, f"{func.id}() call")
+        elif isinstance(func, ast.Attribute):
+            on_instance = isinstance(func.value, ast.Name) and func.value.id in ("self", "cls")
+            if on_instance:
+                self.calls.add(func.attr)
+            if on_instance and func.attr == self.name:
+                self.is_recursive = True
+            elif func.attr in _GROWING_METHODS:
+                self._allocation(node, f".{func.attr}() call")
+        self.generic_visit(node)
+
+    def _skip(self, node):
+        pass
+
+    visit_FunctionDef = visit_AsyncFunctionDef = visit_ClassDef = _skip
+
+
+_metrics_cache: "OrderedDict[str, FunctionMetrics]" = OrderedDict()
+
+
+def _body_hash(ctx: AnalysisContext, node: ast.AST) -> str:
+    start = ctx.line_offsets[node.lineno]
+    end = ctx.line_offsets[node.end_lineno + 1] if node.end_lineno + 1 < len(ctx.line_offsets) else len(ctx.code)
+    return hashlib.sha256(ctx.code[start:end].encode("utf-8", "surrogatepass")).hexdigest()
+
+
+def _measure(name: str, kind: str, origin: int, statements) -> FunctionMetrics:
+    visitor = _MetricsVisitor(name if kind == FUNCTION else None, origin).run(statements)
+    return FunctionMetrics(
+        name=name,
+        lineno=0,
+        max_loop_depth=visitor.max_loop_depth,
+        cyclomatic=visitor.decisions + 1,
+        is_recursive=visitor.is_recursive,
+        loop_allocations=tuple(visitor.allocations),
+        kind=kind,
+        calls=frozenset(visitor.calls),
+    )
+
+
+def _relocate(metrics: FunctionMetrics, lineno: int) -> FunctionMetrics:
+    return replace(
+        metrics,
+        lineno=lineno,
+        loop_allocations=tuple((offset + lineno, kind) for offset, kind in metrics.loop_allocations),
+    )
+
+
+def _cached_measure(key: str, name: str, kind: str, origin: int, statements) -> FunctionMetrics:
+    metrics = _metrics_cache.get(key)
+    if metrics is not None:
+        _metrics_cache.move_to_end(key)
+    else:
+        metrics = _measure(name, kind, origin, statements)
+        _metrics_cache[key] = metrics
+        if len(_metrics_cache) > MAX_CACHED_FUNCTIONS:
+            _metrics_cache.popitem(last=False)
+    return _relocate(metrics, origin)
+
+
+def _call_cycles(functions: List[FunctionMetrics]) -> Dict[str, Set[str]]:
+    """
+    Finds the functions that call each other in a cycle (Tarjan's strongly
+    connected components over the name-resolved call graph).
+
+    Returns:
+        For every function on a cycle through at least one other function,
+        the names of the other functions of that cycle.
+    """
+    graph: Dict[str, Set[str]] = {}
+    for metrics in functions:
+        graph.setdefault(metrics.name, set()).update(metrics.calls)
+    for callees in graph.values():
+        callees.intersection_update(graph)
+
+    index: Dict[str, int] = {}
+    low: Dict[str, int] = {}
+    stack: List[str] = []
+    on_stack: Set[str] = set()
+    cycles: Dict[str, Set[str]] = {}
+
+    for root in graph:
+        if root in index:
+            continue
+        work = [(root, iter(sorted(graph[root])))]
+        index[root] = low[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            node, callees = work[-1]
+            callee = next(callees, None)
+            if callee is None:
+                work.pop()
+                if work:
+                    low[work[-1][0]] = min(low[work[-1][0]], low[node])
+                if low[node] == index[node]:
+                    component = set()
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.add(member)
+                        if member == node:
+                            break
+                    if len(component) > 1:
+                        for member in component:
+                            cycles[member] = component - {member}
+            elif callee not in index:
+                index[callee] = low[callee] = len(index)
+                stack.append(callee)
+                on_stack.add(callee)
+                work.append((callee, iter(sorted(graph[callee]))))
+            elif callee in on_stack:
+                low[node] = min(low[node], index[callee])
+    return cycles
+
+
+def function_metrics(ctx: AnalysisContext) -> List[FunctionMetrics]:
+    """
+    Computes per-scope complexity metrics for a snippet.
+
+    Metrics are memoized by a hash of each scope's source text, so functions
+    and classes that did not change since the previous review (even if they
+    moved) are not re-analysed. Mutual recursion is resolved afterwards from
+    the call names of every function, since it depends on the whole snippet.
+
+    Args:
+        ctx: The shared analysis context of the code under review.
+
+    Returns:
+        Metrics for the module-level code, then every class body, then every
+        function, each group in source order. Empty when the code does not
+        parse.
+    """
+    if ctx.tree is None:
+        return []
+
+    results = [_cached_measure(f"{MODULE_SCOPE}:{ctx.digest}", MODULE_SCOPE, MODULE, 1, ctx.tree.body)]
+    for cls in ctx.class_defs:
+        key = f"class {cls.name}:{_body_hash(ctx, cls)}"
+        results.append(_cached_measure(key, cls.name, CLASS_BODY, cls.lineno, cls.body))
+
+    functions = []
+    for func in ctx.function_defs:
+        key = f"{func.name}:{_body_hash(ctx, func)}"
+        functions.append(_cached_measure(key, func.name, FUNCTION, func.lineno, func.body))
+
+    cycles = _call_cycles(functions)
+    for metrics in functions:
+        partners = cycles.get(metrics.name)
+        if partners:
+            metrics = replace(metrics, is_recursive=True, recursive_with=tuple(sorted(partners)))
+        results.append(metrics)
+    return results
@@ -0,0 +1,34 @@
+from dataclasses import dataclass, replace
+from typing import Optional
+
+from .security_rules import SEVERITY_ORDER
+
+SECURITY = "security"
+STYLE = "style"
+PERFORMANCE = "performance"
+CATEGORIES = (SECURITY, STYLE, PERFORMANCE)
+
+
+@dataclass(frozen=True)
+class Finding:
+    """One deterministic review finding, as printed in the tool reports."""
+
+    category: str
+    severity: str
+    text: str
+    line: Optional[int] = None
+    path: Optional[str] = None
+
+    def at(self, path: str) -> "Finding":
+        """Returns a copy of the finding attributed to a file."""
+        return replace(self, path=path)
+
+
+def rank_key(finding: Finding):
+    """Sort key that puts the most severe findings first."""
+    return (
+        SEVERITY_ORDER.get(finding.severity, len(SEVERITY_ORDER)),
+        CATEGORIES.index(finding.category),
+        finding.path or "",
+        finding.line or 0,
+    )
@@ -0,0 +1,178 @@
+import ast
+import re
+import textwrap
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set
+
+from .analysis import AnalysisContext
+
+_HUNK_HEADER = re.compile(r"^@@ -\d+(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+@dataclass(frozen=True)
+class ChangedRegion:
+    """A function (or top-level statement) touched by a diff."""
+
+    path: str
+    name: str
+    lineno: int
+    source: str
+
+    @property
+    def heading(self) -> str:
+        """Markdown heading that introduces the region in review inputs and reports."""
+        return f"### {self.path}: {self.name} (line {self.lineno})"
+
+
+def is_unified_diff(text: str) -> bool:
+    """Whether a review input is a unified diff rather than source code."""
+    return any(line.startswith("+++ ") for line in text.splitlines()) and \
+        any(_HUNK_HEADER.match(line) for line in text.splitlines())
+
+
+def parse_unified_diff(diff_text: str) -> Dict[str, Set[int]]:
+    """
+    Extracts the changed line numbers of every file in a unified diff.
+
+    Hunk lines are counted against the line counts of their `@@` header, so
+    an added line that starts with "++ " or a removed one that starts with
+    "-- " is never mistaken for a file header.
+
+    Args:
+        diff_text: Output of `git diff` (or any unified diff).
+
+    Returns:
+        Mapping of new-file path to the set of added or modified line numbers.
+        Pure deletions mark the line that now sits where the removed lines were.
+    """
+    changes: Dict[str, Set[int]] = {}
+    current: Optional[Set[int]] = None
+    lineno = old_left = new_left = 0
+
+    for line in diff_text.splitlines():
+        if old_left > 0 or new_left > 0:
+            kind = line[:1]
+            if kind == "+":
+                new_left -= 1
+                if current is not None:
+                    current.add(lineno)
+                lineno += 1
+            elif kind == "-":
+                old_left -= 1
+                if current is not None:
+                    current.add(lineno)
+            elif kind != "\\":
+                old_left -= 1
+                new_left -= 1
+                lineno += 1
+        elif line.startswith("+++ "):
+            path = line[4:].split("\t")[0].strip()
+            if path == "/dev/null":
+                current = None
+                continue
+            if path.startswith("b/"):
+                path = path[2:]
+            current = changes.setdefault(path, set())
+        elif line.startswith("@@"):
+            match = _HUNK_HEADER.match(line)
+            if match:
+                old_left = int(match.group(1) or 1)
+                lineno = int(match.group(2))
+                new_left = int(match.group(3) or 1)
+
+    return {path: lines for path, lines in changes.items() if lines}
+
+
+def _enclosing(body, line: int):
+    """Innermost function, or else top-level statement, that contains a line."""
+    for node in body:
+        start = min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+        if not start <= line <= node.end_lineno:
+            continue
+        if isinstance(node, ast.ClassDef):
+            return _enclosing(node.body, line) or node
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            return _enclosing(node.body, line) if _has_nested_function(node, line) else node
+        return node
+    return None
+
+
+def _has_nested_function(node, line: int) -> bool:
+    return any(
+        isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)) and child.lineno <= line <= child.end_lineno
+        for child in node.body
+    )
+
+
+def changed_regions(path: str, code: str, lines: Set[int]) -> List[ChangedRegion]:
+    """
+    Maps changed lines of a file to the functions that contain them.
+
+    Args:
+        path: File path, used for reporting.
+        code: Current content of the file.
+        lines: Changed line numbers from parse_unified_diff().
+
+    Returns:
+        One region per changed function or top-level statement. When the file
+        does not parse, the whole file is a single region.
+    """
+    ctx = AnalysisContext(code)
+    if ctx.tree is None:
+        return [ChangedRegion(path, "<file>", 1, code)]
+
+    nodes = {}
+    for line in sorted(lines):
+        node = _enclosing(ctx.tree.body, line)
+        if node is not None:
+            nodes[id(node)] = node
+
+    regions = []
+    for node in sorted(nodes.values(), key=lambda n: n.lineno):
+        start = min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+        source = textwrap.dedent("\n".join(ctx.lines[start - 1:node.end_lineno]))
+        regions.append(ChangedRegion(path, getattr(node, "name", f"<line {start}>"), start, source))
+    return regions
+
+
+def diff_regions(diff_text: str, root: str = ".") -> List[ChangedRegion]:
+    """
+    Collects the changed Python regions of a diff, reading files under `root`.
+    """
+    regions = []
+    for path, lines in parse_unified_diff(diff_text).items():
+        file_path = Path(root) / path
+        if file_path.suffix != ".py" or not file_path.is_file():
+            continue
+        code = file_path.read_text(encoding="utf-8", errors="replace")
+        regions.extend(changed_regions(path, code, lines))
+    return regions
+
+
+def split_by_region(report: str, regions: Sequence[ChangedRegion]) -> Dict[ChangedRegion, str]:
+    """
+    Cuts a report written over several regions into one part per region.
+
+    Each part runs from the region's heading (any heading level, matched on
+    "path: name") to the next region heading. Regions whose heading is not in
+    the report are left out.
+    """
+    starts = []
+    for region in regions:
+        pattern = rf"^#+\s*\**{re.escape(region.path)}: {re.escape(region.name)}(?!\w).*$"
+        match = re.search(pattern, report, re.MULTILINE)
+        if match:
+            starts.append((match.start(), match.end(), region))
+    starts.sort(key=lambda start: start[0])
+
+    parts = {}
+    for i, (_, body_start, region) in enumerate(starts):
+        end = starts[i + 1][0] if i + 1 < len(starts) else len(report)
+        parts[region] = report[body_start:end].strip()
+    return parts
+
+
+def merge_region_reports(regions: Sequence[ChangedRegion], parts: Dict[ChangedRegion, str]) -> str:
+    """Joins per-region reports under their headings, in region order."""
+    return "\n\n".join(f"{region.heading}\n{parts[region]}" for region in regions if region in parts)
@@ -0,0 +1,125 @@
+from typing import List
+
+from .analysis import AnalysisContext
+from .complexity import CLASS_BODY, MODULE, FunctionMetrics, function_metrics
+from .findings import PERFORMANCE, SECURITY, Finding
+from .security_rules import default_engine
+from .style import context_style_issues
+
+UNPARSABLE = "Code could not be parsed as Python - complexity metrics are unavailable"
+
+def security_findings(ctx: AnalysisContext) -> List[Finding]:
+    """Runs the configured security rule packs over a snippet."""
+    findings = []
+    for hit in default_engine().scan(ctx):
+        plural = "s" if len(hit.lines) > 1 else ""
+        location = f" (line{plural} {', '.join(map(str, hit.lines))})" if hit.lines else ""
+        findings.append(Finding(
+            SECURITY, hit.rule.severity, f"{hit.rule.message}{location}",
+            hit.lines[0] if hit.lines else None,
+        ))
+    return findings
+
+
+def style_findings(ctx: AnalysisContext) -> List[Finding]:
+    """
+    Checks a snippet for PEP8 and formatting issues over the context's token
+    stream, which the security and complexity tools share.
+    """
+    return list(context_style_issues(ctx))
+
+
+def _scope_label(metrics: FunctionMetrics) -> str:
+    if metrics.kind == MODULE:
+        return "Module-level code"
+    if metrics.kind == CLASS_BODY:
+        return f"Class '{metrics.name}' body (line {metrics.lineno})"
+    return f"Function '{metrics.name}' (line {metrics.lineno})"
+
+
+def performance_findings(ctx: AnalysisContext) -> List[Finding]:
+    """Reports complexity metrics and bottleneck hints for a snippet."""
+    calls = ctx.call_names
+    findings = []
+
+    if ctx.tree is None:
+        findings.append(Finding(PERFORMANCE, "LOW", UNPARSABLE))
+
+    for metrics in function_metrics(ctx):
+        where = _scope_label(metrics)
+
+        if metrics.max_loop_depth >= 2:
+            severity = "HIGH" if metrics.max_loop_depth >= 3 else "MEDIUM"
+            findings.append(Finding(
+                PERFORMANCE, severity,
+                f"⚠️ {where}: loops nested {metrics.max_loop_depth} deep - O(n^{metrics.max_loop_depth}) or higher complexity, consider hashing or vectorization",
+                metrics.lineno,
+            ))
+
+        if metrics.cyclomatic > 10:
+            findings.append(Finding(
+                PERFORMANCE, "MEDIUM",
+                f"{where}: cyclomatic complexity {metrics.cyclomatic} - consider dictionary dispatch or strategy pattern",
+                metrics.lineno,
+            ))
+
+        if metrics.is_recursive:
+            through = f" (through {', '.join(repr(name) for name in metrics.recursive_with)})" if metrics.recursive_with else ""
+            findings.append(Finding(
+                PERFORMANCE, "MEDIUM", f"{where}: recursive{through} - consider memoization or iterative approach", metrics.lineno,
+            ))
+
+        for lineno, kind in metrics.loop_allocations:
+            findings.append(Finding(
+                PERFORMANCE, "LOW",
+                f"Line {lineno}: allocation inside loop ({kind}) - consider preallocating or a comprehension", lineno,
+            ))
+
+    if calls['list'] and calls['range']:
+        findings.append(Finding(PERFORMANCE, "LOW", "list(range()) detected - consider using range() directly or numpy arrays"))
+
+    if ctx.operator_counts['**'] or calls['pow']:
+        findings.append(Finding(PERFORMANCE, "LOW", "Exponentiation detected - verify if logarithmic alternatives are possible"))
+
+    return findings
+
+
+def format_security_report(findings: List[Finding]) -> str:
+    if not findings:
+        return "✅ Security Analysis: No obvious vulnerabilities detected. Code appears secure."
+
+    report = "🔒 Security Analysis Report:\n\n"
+    report += f"Found {len(findings)} potential security issue(s):\n\n"
+    for i, finding in enumerate(findings, 1):
+        report += f"{i}. {finding.severity}: {finding.text}\n"
+
+    return report
+
+
+def format_style_report(findings: List[Finding]) -> str:
+    if not findings:
+        return "✅ Style Analysis: Code follows PEP8 guidelines. Well formatted!"
+
+    report = "📝 Style Analysis Report:\n\n"
+    report += f"Found {len(findings)} style issue(s):\n\n"
+    for i, finding in enumerate(findings, 1):
+        report += f"{i}. {finding.text}\n"
+
+    return report
+
+
+def format_performance_report(findings: List[Finding]) -> str:
+    if not findings:
+        return "✅ Performance Analysis: Code appears efficient. No obvious bottlenecks detected."
+
+    report = "⚡ Performance Analysis Report:\n\n"
+    report += f"Identified {len(findings)} performance consideration(s):\n\n"
+    for i, finding in enumerate(findings, 1):
+        report += f"{i}. {finding.text}\n"
+
+    report += "\n💡 General Recommendations:\n"
+    report += "- Profile code with cProfile for accurate bottleneck identification\n"
+    report += "- Consider algorithmic improvements before micro-optimizations\n"
+    report += "- Use appropriate data structures (sets for lookups, deques for queues)\n"
+
+    return report
@@ -0,0 +1,310 @@
+import ast
+import os
+import re
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import yaml
+
+from .analysis import AnalysisContext
+
+DEFAULT_RULE_PACK = Path(__file__).resolve().parent / "security_rules.yaml"
+RULE_PACKS_ENV = "SECURITY_RULE_PACKS"
+
+SEVERITY_ORDER = {"CRITICAL": 0, "HIGH": 1, "MEDIUM": 2, "LOW": 3}
+RULE_KINDS = ("call", "string_format", "text")
+
+
+@dataclass(frozen=True)
+class SecurityRule:
+    """A single entry of a security rule pack."""
+
+    id: str
+    kind: str
+    severity: str
+    message: str
+    callees: Tuple[str, ...] = ()
+    keywords: Tuple[str, ...] = ()
+    ignore_case: bool = False
+    pattern: Optional[str] = None
+
+
+@dataclass
+class SecurityFinding:
+    """Rule hit, with the lines it was found on (empty when unknown)."""
+
+    rule: SecurityRule
+    lines: List[int] = field(default_factory=list)
+
+
+def load_rule_pack(path) -> List[SecurityRule]:
+    """
+    Loads a YAML rule pack.
+
+    Args:
+        path: Path to the YAML file.
+
+    Returns:
+        The rules declared in the pack.
+    """
+    with open(path, encoding="utf-8") as f:
+        pack = yaml.safe_load(f) or {}
+
+    rules = []
+    for entry in pack.get("rules", []):
+        kind = entry.get("kind")
+        if kind not in RULE_KINDS:
+            raise ValueError(f"Rule '{entry.get('id')}' in {path} has unknown kind '{kind}'")
+        rules.append(SecurityRule(
+            id=entry["id"],
+            kind=kind,
+            severity=entry.get("severity", "MEDIUM").upper(),
+            message=entry["message"],
+            callees=tuple(entry.get("callees", ())),
+            keywords=tuple(entry.get("keywords", ())),
+            ignore_case=bool(entry.get("ignore_case", False)),
+            pattern=entry.get("pattern"),
+        ))
+    return rules
+
+
+def _trie_regex(words: Iterable[str]) -> str:
+    """
+    Builds a prefix-factored alternation for a set of literal words.
+
+    The regex engine then walks at most one branch per character instead of
+    trying every word at every position, so matching cost depends on word
+    length rather than on the number of words.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def emit(node):
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        optional = "" in node
+        if len(branches) == 1 and not optional:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")" + ("?" if optional else "")
+
+    return emit(trie)
+
+
+class _KeywordMatcher:
+    """
+    One compiled matcher for the keywords of every rule, case-sensitive or
+    not, that reports overlapping hits in a single pass over the text.
+
+    Keywords are grouped by their first character: the regex is one branch
+    per character, each holding the prefix-factored rest of its keywords, so
+    the regex engine skips positions that cannot start a keyword without
+    entering the pattern. The text is matched lowered; hits of case-sensitive
+    keywords are then checked against the original text.
+    """
+
+    def __init__(self, rules: Iterable[SecurityRule]):
+        # lowered keyword -> (rule, exact keyword for case-sensitive rules)
+        self.keywords: Dict[str, List[Tuple[SecurityRule, Optional[str]]]] = {}
+        for rule in rules:
+            for keyword in filter(None, rule.keywords):
+                exact = None if rule.ignore_case else keyword
+                self.keywords.setdefault(keyword.lower(), []).append((rule, exact))
+        self.lengths = sorted({len(keyword) for keyword in self.keywords})
+        pattern = _first_char_regex(self.keywords)
+        self.regex = re.compile(pattern)
+        self.folding_regex = re.compile(pattern, re.IGNORECASE)
+
+    def scan(self, text: str):
+        lowered = text.lower()
+        regex = self.regex
+        if len(lowered) != len(text):
+            # Lowering changed offsets: match the original text case-insensitively.
+            lowered, regex = text, self.folding_regex
+        for match in regex.finditer(lowered):
+            start = match.start()
+            hit = lowered[start:match.end(match.lastindex)].lower()
+            for length in self.lengths:
+                if length > len(hit):
+                    break
+                for rule, exact in self.keywords.get(hit[:length], ()):
+                    if exact is None or text.startswith(exact, start):
+                        yield start, rule
+
+
+def _first_char_regex(words: Iterable[str]) -> str:
+    """
+    Alternation with one branch per first character of `words`, each
+    consuming that character and capturing the rest of the longest word with
+    a lookahead, so that the next match may start inside this one.
+    """
+    groups: Dict[str, List[str]] = {}
+    for word in words:
+        groups.setdefault(word[0], []).append(word[1:])
+    return "|".join(f"{re.escape(char)}(?=({_trie_regex(rests)}))" for char, rests in sorted(groups.items()))
+
+
+class RuleEngine:
+    """
+    Compiled form of one or more rule packs.
+
+    The keywords of all text and string-format rules share one matcher, run
+    once over the source, and all AST-aware rules are evaluated during a
+    single walk of the tree, so scan time stays flat as the number of rules
+    grows.
+
+    The walk only enters the nodes whose lines hold a candidate: the last
+    part of a callee name followed by "(", or a string-format keyword. Code
+    without any is not walked at all.
+    """
+
+    def __init__(self, rules: Iterable[SecurityRule]):
+        self.rules = list(rules)
+        self.order = {rule.id: index for index, rule in enumerate(self.rules)}
+        self.callees: Dict[str, List[SecurityRule]] = {}
+        self.patterns = {}
+
+        for rule in self.rules:
+            if rule.kind == "call":
+                for callee in rule.callees:
+                    self.callees.setdefault(callee, []).append(rule)
+            if rule.pattern:
+                self.patterns[rule.id] = re.compile(rule.pattern)
+
+        keyword_rules = [rule for rule in self.rules if rule.kind != "call" and any(rule.keywords)]
+        self.keywords = _KeywordMatcher(keyword_rules) if keyword_rules else None
+        self.has_format_rules = any(rule.kind == "string_format" for rule in keyword_rules)
+        names = {callee.rpartition(".")[2] for callee in self.callees}
+        self.call_candidates = re.compile(rf"\b{_trie_regex(names)}\s*\(") if names else None
+
+    def scan(self, ctx: AnalysisContext) -> List[SecurityFinding]:
+        """
+        Runs every rule against a snippet.
+
+        Args:
+            ctx: The shared analysis context of the code under review.
+
+        Returns:
+            One finding per matched rule, ordered by severity then rule order.
+        """
+        hits: Dict[str, SecurityFinding] = {}
+
+        def record(rule, lineno):
+            finding = hits.setdefault(rule.id, SecurityFinding(rule))
+            if lineno and lineno not in finding.lines:
+                finding.lines.append(lineno)
+
+        format_offsets = []
+        keyword_hits = self.keywords.scan(ctx.code) if self.keywords is not None else ()
+        for offset, rule in keyword_hits:
+            if rule.kind == "string_format":
+                format_offsets.append(offset)
+                continue
+            lineno = bisect_right(ctx.line_offsets, offset) - 1
+            if self._verified(rule, ctx.line(lineno)):
+                record(rule, lineno)
+
+        if ctx.tree is not None:
+            lines = self._candidate_lines(ctx, format_offsets)
+            if lines:
+                self._walk(ctx.tree, lines, record)
+        else:
+            # Unparsable fragments still expose their calls through the tokens.
+            for name in ctx.call_names:
+                for rule in self.callees.get(name, ()):
+                    record(rule, None)
+
+        for finding in hits.values():
+            finding.lines.sort()
+        return sorted(
+            hits.values(),
+            key=lambda finding: (SEVERITY_ORDER.get(finding.rule.severity, len(SEVERITY_ORDER)), self.order[finding.rule.id]),
+        )
+
+    def _candidate_lines(self, ctx: AnalysisContext, format_offsets: List[int]) -> List[int]:
+        """Sorted numbers of the lines where a call or string-format rule could match."""
+        offsets = list(format_offsets)
+        if self.call_candidates is not None:
+            offsets.extend(match.start() for match in self.call_candidates.finditer(ctx.code))
+        return sorted({bisect_right(ctx.line_offsets, offset) - 1 for offset in offsets})
+
+    def _walk(self, tree: ast.AST, lines: List[int], record) -> None:
+        """
+        Visits the nodes of `tree` whose line range holds one of `lines`.
+        Every match spans the line of its callee name or keyword, so the
+        other subtrees cannot match and are skipped.
+        """
+        todo = [tree]
+        while todo:
+            node = todo.pop()
+            for child in ast.iter_child_nodes(node):
+                end = getattr(child, "end_lineno", None)
+                if end is not None:
+                    index = bisect_left(lines, child.lineno)
+                    if index == len(lines) or lines[index] > end:
+                        continue
+                todo.append(child)
+            if isinstance(node, ast.Call):
+                name = _dotted_name(node.func)
+                if name is not None:
+                    for rule in self.callees.get(name, ()):
+                        record(rule, node.lineno)
+                if self.has_format_rules and isinstance(node.func, ast.Attribute) \
+                        and node.func.attr == "format" and _is_str(node.func.value):
+                    self._match_format(node.func.value.value, node, record)
+            elif not self.has_format_rules:
+                continue
+            elif isinstance(node, ast.BinOp) and isinstance(node.op, (ast.Mod, ast.Add)):
+                for operand in (node.left, node.right):
+                    if _is_str(operand):
+                        self._match_format(operand.value, node, record)
+            elif isinstance(node, ast.JoinedStr) and any(isinstance(part, ast.FormattedValue) for part in node.values):
+                literal = "".join(part.value for part in node.values if _is_str(part))
+                self._match_format(literal, node, record)
+
+    def _match_format(self, literal: str, node: ast.AST, record) -> None:
+        for _, rule in self.keywords.scan(literal):
+            if rule.kind == "string_format" and self._verified(rule, literal):
+                record(rule, node.lineno)
+
+    def _verified(self, rule: SecurityRule, text: str) -> bool:
+        pattern = self.patterns.get(rule.id)
+        return pattern is None or pattern.search(text) is not None
+
+
+def _is_str(node: ast.AST) -> bool:
+    return isinstance(node, ast.Constant) and isinstance(node.value, str)
+
+
+def _dotted_name(node: ast.AST) -> Optional[str]:
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    parts.append(node.id)
+    return ".".join(reversed(parts))
+
+
+def rule_pack_paths() -> List[Path]:
+    """The bundled rule pack followed by any packs listed in SECURITY_RULE_PACKS."""
+    extra = os.environ.get(RULE_PACKS_ENV, "")
+    return [DEFAULT_RULE_PACK] + [Path(path) for path in extra.split(os.pathsep) if path]
+
+
+@lru_cache(maxsize=8)
+def _engine_for(paths: Tuple[Path, ...]) -> RuleEngine:
+    return RuleEngine(rule for path in paths for rule in load_rule_pack(path))
+
+
+def default_engine() -> RuleEngine:
+    """Returns the compiled engine for the configured rule packs."""
+    return _engine_for(tuple(rule_pack_paths()))
@@ -0,0 +1,137 @@
+import tokenize
+from collections import deque
+from typing import Callable, Iterable, Iterator, Optional
+
+from .analysis import AnalysisContext
+from .findings import STYLE, Finding
+
+MAX_LINE_LENGTH = 79
+
+_LAYOUT_TOKENS = (tokenize.NL, tokenize.NEWLINE, tokenize.INDENT, tokenize.DEDENT, tokenize.ENDMARKER)
+
+
+class _LineChecks:
+    """Per-line PEP8 checks, fed one physical line at a time."""
+
+    def __init__(self):
+        self.blank_run = 0
+        self.reported_blank_run = False
+
+    def check(self, lineno: int, line: str, comment_only: bool) -> Iterator[Finding]:
+        line = line.rstrip("\r\n")
+        if len(line) > MAX_LINE_LENGTH and not comment_only:
+            yield Finding(STYLE, "LOW", f"Line {lineno}: Exceeds {MAX_LINE_LENGTH} characters (PEP8)", lineno)
+
+        if "\t" in line:
+            yield Finding(STYLE, "LOW", f"Line {lineno}: Uses tabs instead of spaces (PEP8)", lineno)
+
+        if line.rstrip().endswith(";"):
+            yield Finding(STYLE, "LOW", f"Line {lineno}: Unnecessary semicolon (non-Pythonic)", lineno)
+
+        self.blank_run = self.blank_run + 1 if not line.strip() else 0
+        if self.blank_run >= 2 and not self.reported_blank_run:
+            self.reported_blank_run = True
+            yield Finding(STYLE, "LOW", "Multiple consecutive blank lines detected - PEP8 recommends max 2", lineno)
+
+
+def iter_style_issues(source: Iterable[str]) -> Iterator[Finding]:
+    """
+    Streams style issues from a file object or any iterator of lines.
+
+    Lines are tokenized as they are read, so comments and strings are
+    classified correctly, and each line is checked and released as soon as
+    the tokenizer has moved past it. Memory stays bounded by the longest
+    multi-line token rather than by the input size, and issues are yielded
+    while the input is still being read.
+
+    Args:
+        source: An open text file or an iterable of lines (with or without
+            line terminators).
+
+    Yields:
+        Style findings in line order.
+    """
+    lines = iter(source)
+    pending = deque()
+
+    def readline():
+        # An empty string means end of input to the tokenizer, so a blank
+        # line given without its terminator must still come back as "\n".
+        line = next(lines, None)
+        if line is None:
+            return ""
+        if not line.endswith("\n"):
+            line += "\n"
+        pending.append(line)
+        return line
+
+    def tokens():
+        try:
+            yield from tokenize.generate_tokens(readline)
+        except (tokenize.TokenError, SyntaxError):
+            return
+
+    yield from _check_tokens(tokens(), lambda: pending.popleft() if pending else next(lines, None))
+
+
+def context_style_issues(ctx: AnalysisContext) -> Iterator[Finding]:
+    """
+    Style issues of a snippet from its shared line table and token stream,
+    so the style check does not tokenize it again.
+    """
+    lines = ctx.lines[:-1] if ctx.lines[-1] == "" else ctx.lines
+    remaining = iter(lines)
+    yield from _check_tokens(ctx.tokens, lambda: next(remaining, None))
+
+
+def _check_tokens(tokens: Iterable[tokenize.TokenInfo], take_line: Callable[[], Optional[str]]) -> Iterator[Finding]:
+    """
+    Runs the token and per-line checks. `take_line` returns the next physical
+    line (None at the end); a line is taken once the tokens have moved past it.
+    """
+    comment_rows = set()
+    code_rows = set()
+    checks = _LineChecks()
+    next_row = 1
+    previous = None
+    reported_wildcard = False
+
+    def flush(upto):
+        nonlocal next_row
+        while next_row < upto:
+            line = take_line()
+            if line is None:
+                return
+            comment_only = next_row in comment_rows and next_row not in code_rows
+            comment_rows.discard(next_row)
+            code_rows.discard(next_row)
+            yield from checks.check(next_row, line, comment_only)
+            next_row += 1
+
+    for token in tokens:
+        yield from flush(token.start[0])
+
+        if token.type == tokenize.COMMENT:
+            comment_rows.add(token.start[0])
+        elif token.type not in _LAYOUT_TOKENS:
+            code_rows.update(range(token.start[0], token.end[0] + 1))
+
+        if token.type == tokenize.NAME and previous is not None and previous.type == tokenize.NAME \
+                and previous.string == "def" and token.string[0].isupper():
+            yield Finding(STYLE, "LOW", f"Function '{token.string}' uses PascalCase - should use snake_case (PEP8)",
+                          token.start[0])
+
+        if token.type == tokenize.OP and token.string == "*" and previous is not None \
+                and previous.string == "import" and not reported_wildcard:
+            reported_wildcard = True
+            yield Finding(STYLE, "MEDIUM", "Wildcard imports detected - violates PEP8, reduces code clarity",
+                          token.start[0])
+
+        if token.type not in (tokenize.NL, tokenize.COMMENT):
+            previous = token
+
+    # Tokens stop early when the input is not valid Python (e.g. a fragment):
+    # keep checking the remaining lines, falling back to a textual comment test.
+    while (line := take_line()) is not None:
+        yield from checks.check(next_row, line, line.lstrip().startswith("#"))
+        next_row += 1
@@ -0,0 +1,96 @@
+"""
+Concurrent, time-limited tool calls for the coordinators' specialists.
+
+run_tools() runs a batch of blocking calls on a shared thread pool (LangGraph
+nodes, CrewAI tools); concurrent() turns a blocking tool into an async one so
+that ADK can run the calls of one model turn together.
+"""
+import asyncio
+import contextvars
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from dataclasses import dataclass
+from functools import wraps
+from typing import Awaitable, Callable, Dict, Optional
+
+DEFAULT_TIMEOUT_SECONDS = 10.0
+DEFAULT_WORKERS = 32
+
+_executor = ThreadPoolExecutor(max_workers=int(os.getenv("TOOL_WORKERS", DEFAULT_WORKERS)),
+                               thread_name_prefix="tool")
+
+
+def tool_timeout(name: str) -> float:
+    """Seconds a tool may take: TOOL_TIMEOUT_<NAME>, else TOOL_TIMEOUT, else 10."""
+    value = os.getenv(f"TOOL_TIMEOUT_{name.upper()}") or os.getenv("TOOL_TIMEOUT")
+    return float(value) if value else DEFAULT_TIMEOUT_SECONDS
+
+
+@dataclass
+class ToolResult:
+    name: str
+    output: str
+    seconds: float
+    timed_out: bool = False
+    error: Optional[str] = None
+
+
+def _timed(call: Callable[[], str]) -> tuple:
+    started = time.perf_counter()
+    return call(), time.perf_counter() - started
+
+
+def run_tools(calls: Dict[str, Callable[[], str]],
+              timeouts: Optional[Dict[str, float]] = None) -> Dict[str, ToolResult]:
+    """
+    Runs independent tool calls at the same time, so the caller waits for the
+    slowest one instead of their sum.
+
+    Each call gets its own timeout (see tool_timeout); a tool that misses it
+    or fails is answered with a message saying so, and the others still
+    return. A timed-out call is not interrupted: its thread finishes in the
+    background and its result is discarded.
+    """
+    timeouts = timeouts or {}
+    started = time.perf_counter()
+    # Each call runs in a copy of the caller's context, so its spans nest under the caller's.
+    futures = {name: _executor.submit(contextvars.copy_context().run, _timed, call) for name, call in calls.items()}
+    results = {}
+    for name, future in futures.items():
+        timeout = timeouts.get(name, tool_timeout(name))
+        try:
+            output, seconds = future.result(timeout=max(0.0, started + timeout - time.perf_counter()))
+            results[name] = ToolResult(name, output, seconds)
+        except TimeoutError:
+            results[name] = ToolResult(name, f"{name} did not answer within {timeout:g}s.", timeout, timed_out=True)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            results[name] = ToolResult(name, f"{name} failed: {error}", time.perf_counter() - started, error=error)
+    return results
+
+
+def slowest(results: Dict[str, ToolResult]) -> ToolResult:
+    """The call that set the latency of a concurrent run."""
+    return max(results.values(), key=lambda result: result.seconds)
+
+
+def concurrent(func: Callable[..., str]) -> Callable[..., Awaitable[str]]:
+    """
+    Async version of a blocking tool, with the same name, signature and
+    docstring. ADK runs the function calls of one model turn together, but a
+    synchronous tool holds the event loop until it returns; this one runs in
+    a worker thread, so the calls overlap, and gives up after its timeout
+    (see tool_timeout). A timed-out call is not interrupted: its thread
+    finishes in the background and its result is discarded.
+    """
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs) -> str:
+        timeout = tool_timeout(func.__name__)
+        try:
+            return await asyncio.wait_for(asyncio.to_thread(func, *args, **kwargs), timeout)
+        except asyncio.TimeoutError:
+            return f"{func.__name__} did not answer within {timeout:g}s."
+
+    return wrapper
@@ -0,0 +1,120 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Optional, Tuple
+
+from .classifier import normalize
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_TTL_SECONDS = 3600.0
+
+# Fields the LLM extracts from the message itself. A result holding any of
+# them, or a billing result (which needs them), is only reused verbatim.
+ENTITY_FIELDS = ("customer_name", "amount_invoice")
+
+_NGRAM = 3
+_DIGITS = re.compile(r"\d+")
+_WORD = re.compile(r"\w+")
+
+
+def cache_key(text: str) -> str:
+    """The normalized words of a message, without punctuation."""
+    return " ".join(_WORD.findall(normalize(text)))
+
+
+def ngrams(text: str, n: int = _NGRAM) -> FrozenSet[str]:
+    """Character n-grams of a normalized text, padded so short words count."""
+    padded = f" {text} "
+    return frozenset(padded[i:i + n] for i in range(max(len(padded) - n + 1, 1)))
+
+
+def entity_free(result: Dict[str, Any]) -> bool:
+    """Whether a classification carries nothing extracted from its own message."""
+    return result.get("intent") != "billing" and not any(result.get(field) for field in ENTITY_FIELDS)
+
+
+class IntentCache:
+    """
+    In-memory cache of the coordinator LLM's classification of a message:
+    intent, extracted customer name and amount, and reply.
+
+    Messages are keyed on their normalized text (lowercase, accents stripped,
+    whitespace folded, punctuation dropped), so "Minha internet caiu!" and
+    "minha  internet  caiu" share an entry. Entries expire after
+    `ttl_seconds`; beyond `max_entries` the least recently used are evicted.
+
+    With `similarity` above 0, a message with no exact entry may reuse the
+    entry whose character trigrams overlap it the most (Jaccard index at
+    least `similarity`), provided both have the same numbers and the entry
+    is entity-free: no billing intent, no extracted customer name or amount.
+    A near duplicate never picks up another message's entities, e.g. the
+    "Maria" of "fatura para Maria" for "fatura para Mario".
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, ttl_seconds: Optional[float] = None,
+                 similarity: Optional[float] = None):
+        self.max_entries = max_entries or int(os.getenv("INTENT_CACHE_SIZE", DEFAULT_MAX_ENTRIES))
+        self.ttl_seconds = ttl_seconds or float(os.getenv("INTENT_CACHE_TTL", DEFAULT_TTL_SECONDS))
+        self.similarity = similarity if similarity is not None else float(os.getenv("INTENT_CACHE_SIMILARITY", 0))
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        # key -> (expires, trigrams, numbers, entity free, result), oldest use first
+        self._entries: "OrderedDict[str, Tuple[float, FrozenSet[str], Tuple[str, ...], bool, Dict[str, Any]]]" = \
+            OrderedDict()
+        self._lock = threading.Lock()
+
+    def _near(self, key: str, now: float) -> Optional[str]:
+        grams, numbers = ngrams(key), tuple(_DIGITS.findall(key))
+        best, best_score = None, self.similarity
+        for other, (expires, other_grams, other_numbers, reusable, _) in self._entries.items():
+            if expires <= now or not reusable or other_numbers != numbers:
+                continue
+            score = len(grams & other_grams) / len(grams | other_grams)
+            if score >= best_score:
+                best, best_score = other, score
+        return best
+
+    def get(self, text: str) -> Optional[Dict[str, Any]]:
+        """The cached classification of a message, or None; counted as a hit or miss."""
+        key = cache_key(text)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                entry = None
+            if entry is None and self.similarity > 0:
+                near = self._near(key, now)
+                if near is not None:
+                    key, entry = near, self._entries[near]
+                    self.near_hits += 1
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return dict(entry[4])
+
+    def put(self, text: str, result: Dict[str, Any]) -> None:
+        key = cache_key(text)
+        entry = (time.monotonic() + self.ttl_seconds, ngrams(key), tuple(_DIGITS.findall(key)), entity_free(result),
+                 dict(result))
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        """Hit/miss counters (near-duplicate hits are included in hits) and the number of entries."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "near_hits": self.near_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+        }
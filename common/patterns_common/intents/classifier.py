@@ -0,0 +1,183 @@
+import csv
+import math
+import os
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_TRAINING_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "intents.csv")
+
+# Predictions below this posterior probability go to the LLM.
+INTENT_MIN_CONFIDENCE = float(os.getenv("INTENT_MIN_CONFIDENCE", 0.9))
+
+# Messages made only of these words and phrases are greetings, answered
+# without the LLM in the language of the greeting. Words that also start real
+# questions ("you", "there") only count inside a phrase.
+GREETINGS = {
+    "oi": "pt", "ola": "pt", "bom": "pt", "boa": "pt", "dia": "pt", "tarde": "pt", "noite": "pt",
+    "tudo": "pt", "bem": "pt", "obrigado": "pt", "obrigada": "pt", "valeu": "pt", "tchau": "pt",
+    "hi": "en", "hello": "en", "hey": "en", "good": "en", "morning": "en",
+    "afternoon": "en", "evening": "en", "thanks": "en", "bye": "en",
+}
+GREETING_PHRASES = {"thank you": "en", "hi there": "en", "hello there": "en", "hey there": "en"}
+GREETING_REPLIES = {
+    "pt": "Olá! Como posso ajudar? Posso ajudar com faturas e pagamentos ou com problemas técnicos.",
+    "en": "Hello! How can I help you today? I can help with invoices and payments or with technical problems.",
+}
+
+# A message with keywords of exactly one intent is routed by rule.
+KEYWORDS = {
+    "billing": {
+        "fatura", "faturas", "boleto", "cobranca", "cobrado", "pagamento", "pagar", "reembolso",
+        "invoice", "invoices", "bill", "billing", "charged", "charge", "payment", "refund", "receipt",
+    },
+    "technical": {
+        "erro", "bug", "caiu", "trava", "lento", "lentidao", "conexao", "wifi", "internet", "servidor",
+        "error", "crash", "crashing", "down", "slow", "connection", "server", "login",
+    },
+}
+
+# Digits or a capitalized word after the first one: a name or an amount the
+# LLM must extract before the billing branch can use it. Names are often
+# typed in lowercase too, so any word the classifier never saw in training
+# or in KEYWORDS also counts (see IntentClassifier.needs_extraction).
+_ENTITY_HINT = re.compile(r"\d|(?<=\s)[A-ZÀ-Ý][a-zà-ÿ]+")
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase, accents stripped and whitespace folded."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    return " ".join("".join(c for c in text if not unicodedata.combining(c)).split())
+
+
+def features(text: str) -> List[str]:
+    """Word unigrams and bigrams of the normalized text."""
+    words = _TOKEN.findall(normalize(text))
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def greeting_language(words: List[str]) -> Optional[str]:
+    """The language of a message made only of greetings, or None."""
+    languages = Counter()
+    i = 0
+    while i < len(words):
+        phrase = " ".join(words[i:i + 2])
+        if phrase in GREETING_PHRASES:
+            languages[GREETING_PHRASES[phrase]] += 1
+            i += 2
+        elif words[i] in GREETINGS:
+            languages[GREETINGS[words[i]]] += 1
+            i += 1
+        else:
+            return None
+    return languages.most_common(1)[0][0] if languages else None
+
+
+@dataclass
+class Prediction:
+    """A locally predicted intent, with the rule or model that produced it."""
+
+    intent: str
+    confidence: float
+    source: str
+    reply: Optional[str] = None
+
+
+class IntentClassifier:
+    """
+    Routes support messages without an LLM call when it can.
+
+    Greetings and messages with the keywords of a single intent are routed by
+    rule; the rest by a multinomial naive Bayes model trained from labeled
+    examples (`intents.csv`). `route()` returns None whenever the LLM is still
+    needed: a low-confidence prediction, a general message that needs a real
+    reply, or a billing request whose name or amount must be extracted.
+    """
+
+    def __init__(self, examples: Iterable[Tuple[str, str]], min_confidence: float = INTENT_MIN_CONFIDENCE,
+                 alpha: float = 1.0):
+        self.min_confidence = min_confidence
+        self.alpha = alpha
+        self.local = 0
+        self.fallback = 0
+
+        documents: Dict[str, int] = Counter()
+        counts: Dict[str, Counter] = defaultdict(Counter)
+        for text, intent in examples:
+            documents[intent] += 1
+            counts[intent].update(features(text))
+        self.vocabulary = set().union(*counts.values()) if counts else set()
+        self.known_words = {f for f in self.vocabulary if " " not in f}.union(*KEYWORDS.values())
+        total = sum(documents.values())
+        self.log_priors = {intent: math.log(n / total) for intent, n in documents.items()}
+        self.log_likelihoods: Dict[str, Dict[str, float]] = {}
+        self.log_unseen: Dict[str, float] = {}
+        for intent, counter in counts.items():
+            denominator = sum(counter.values()) + alpha * len(self.vocabulary)
+            self.log_likelihoods[intent] = {f: math.log((n + alpha) / denominator) for f, n in counter.items()}
+            self.log_unseen[intent] = math.log(alpha / denominator)
+
+    @classmethod
+    def from_file(cls, path: Optional[str] = None, **kwargs) -> "IntentClassifier":
+        """Trains on a CSV file with `text` and `intent` columns."""
+        with open(path or os.getenv("INTENT_TRAINING_PATH", DEFAULT_TRAINING_PATH), encoding="utf-8", newline="") as f:
+            return cls(((row["text"], row["intent"]) for row in csv.DictReader(f)), **kwargs)
+
+    def _rule(self, text: str) -> Optional[Prediction]:
+        words = _TOKEN.findall(normalize(text))
+        language = greeting_language(words)
+        if language is not None:
+            return Prediction("general", 1.0, "rule", GREETING_REPLIES[language])
+        matched = [intent for intent, keywords in KEYWORDS.items() if keywords.intersection(words)]
+        if len(matched) == 1:
+            return Prediction(matched[0], 1.0, "rule")
+        return None
+
+    def predict(self, text: str) -> Optional[Prediction]:
+        """The most likely intent, or None when no feature of the text was seen in training."""
+        rule = self._rule(text)
+        if rule is not None:
+            return rule
+        known = [f for f in features(text) if f in self.vocabulary]
+        if not known:
+            return None
+        scores = {
+            intent: prior + sum(self.log_likelihoods[intent].get(f, self.log_unseen[intent]) for f in known)
+            for intent, prior in self.log_priors.items()
+        }
+        best = max(scores, key=scores.get)
+        confidence = 1 / sum(math.exp(score - scores[best]) for score in scores.values())
+        return Prediction(best, confidence, "model")
+
+    def needs_extraction(self, text: str) -> bool:
+        """
+        Whether a message may carry a customer name or an amount: digits, a
+        capitalized word, or any word unknown to the classifier (e.g. the
+        lowercase "joão" of "meu nome é joão").
+        """
+        if _ENTITY_HINT.search(text):
+            return True
+        return any(word not in self.known_words for word in _TOKEN.findall(normalize(text)))
+
+    def route(self, text: str) -> Optional[Prediction]:
+        """The prediction to route on without the LLM, or None to fall back to it."""
+        prediction = self.predict(text)
+        usable = (
+            prediction is not None
+            and prediction.confidence >= self.min_confidence
+            and (prediction.intent != "general" or prediction.reply is not None)
+            and (prediction.intent != "billing" or not self.needs_extraction(text))
+        )
+        if usable:
+            self.local += 1
+            return prediction
+        self.fallback += 1
+        return None
+
+    def report(self) -> str:
+        total = self.local + self.fallback
+        rate = self.local / total if total else 0.0
+        return f"Routing: {self.local} local, {self.fallback} by the LLM ({rate:.0%} local)"
@@ -0,0 +1,130 @@
+import asyncio
+import hashlib
+import json
+import os
+from collections import defaultdict
+from functools import wraps
+from typing import Any, Dict, Optional, Tuple
+
+from ..cache import ContentCache
+
+DEFAULT_CACHE_PATH = ".pipeline_cache/results.sqlite"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+_CHUNK_BYTES = 1024 * 1024
+
+# (path, size, mtime) -> digest, so the stages of one run hash a file once.
+_digests: Dict[Tuple[str, int, int], str] = {}
+
+
+def file_digest(file_path: str) -> str:
+    """SHA-256 of a file's content, read in chunks."""
+    stat = os.stat(file_path)
+    memo_key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    digest = _digests.get(memo_key)
+    if digest is None:
+        sha = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            while chunk := f.read(_CHUNK_BYTES):
+                sha.update(chunk)
+        digest = _digests[memo_key] = sha.hexdigest()
+    return digest
+
+
+def stage_key(stage: str, version: str, digest: str) -> str:
+    """Key of a stage result: the stage, its version and the input file's digest."""
+    return hashlib.sha256(f"{stage}\0{version}\0{digest}".encode("utf-8")).hexdigest()
+
+
+def is_error(result: Any) -> bool:
+    """Failed tool results are returned, not raised, and must not be cached."""
+    if isinstance(result, str):
+        return result.startswith("Error:")
+    return isinstance(result, dict) and "error" in result
+
+
+class ResultCache(ContentCache):
+    """
+    Persistent, size-bounded store for parse and extract results.
+
+    Results are stored as JSON under a key built from the input file's content
+    hash and the stage version, so a resubmitted file is recognized whatever
+    its name. Hits and misses are also counted per stage. The file and size
+    bound come from `PIPELINE_CACHE_PATH` and `PIPELINE_CACHE_MAX_BYTES`
+    unless given.
+    """
+
+    table = "results"
+
+    def __init__(self, path: Optional[str] = None, max_bytes: Optional[int] = None):
+        super().__init__(
+            path or os.getenv("PIPELINE_CACHE_PATH", DEFAULT_CACHE_PATH),
+            max_bytes or int(os.getenv("PIPELINE_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+        )
+        self.stage_hits: Dict[str, int] = defaultdict(int)
+        self.stage_misses: Dict[str, int] = defaultdict(int)
+
+    def get(self, key: str, stage: str) -> Optional[Any]:
+        """The cached result under `key`, or None; counted as a hit or miss of `stage`."""
+        text = super().get(key)
+        with self._lock:
+            if text is None:
+                self.stage_misses[stage] += 1
+                return None
+            self.stage_hits[stage] += 1
+        return json.loads(text)
+
+    def put(self, key: str, value: Any) -> None:
+        super().put(key, json.dumps(value))
+
+    def stats(self) -> dict:
+        """Hit/miss counters per stage for this process plus the stored size."""
+        stats = super().stats()
+        stages = {}
+        for stage in sorted(set(self.stage_hits) | set(self.stage_misses)):
+            lookups = self.stage_hits[stage] + self.stage_misses[stage]
+            stages[stage] = {
+                "hits": self.stage_hits[stage],
+                "misses": self.stage_misses[stage],
+                "hit_rate": self.stage_hits[stage] / lookups if lookups else 0.0,
+            }
+        return {"stages": stages, "entries": stats["entries"], "bytes": stats["bytes"]}
+
+
+def cached_stage(cache: ResultCache, stage: str, version: str):
+    """
+    Decorator for a tool that takes a file path: results are looked up by the
+    file's content hash and `version` before the tool runs, and stored after.
+    Errors and missing files are passed through uncached. Works on sync and
+    async tools alike.
+    """
+
+    def decorator(func):
+        def lookup(file_path: str) -> Tuple[Optional[str], Any]:
+            if not os.path.isfile(file_path):
+                return None, None
+            key = stage_key(stage, version, file_digest(file_path))
+            return key, cache.get(key, stage)
+
+        def store(key: Optional[str], result: Any) -> Any:
+            if key is not None and not is_error(result):
+                cache.put(key, result)
+            return result
+
+        @wraps(func)
+        def wrapper(file_path: str, *args, **kwargs):
+            key, cached = lookup(file_path)
+            if cached is not None:
+                return cached
+            return store(key, func(file_path, *args, **kwargs))
+
+        @wraps(func)
+        async def async_wrapper(file_path: str, *args, **kwargs):
+            key, cached = lookup(file_path)
+            if cached is not None:
+                return cached
+            return store(key, await func(file_path, *args, **kwargs))
+
+        return async_wrapper if asyncio.iscoroutinefunction(func) else wrapper
+
+    return decorator
@@ -0,0 +1,214 @@
+import ast
+import atexit
+import csv
+import datetime
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_SINK_PATH = ".invoices"
+DEFAULT_BATCH_SIZE = 10000
+COLUMNS = ("invoice_number", "date", "total", "source")
+PARTITIONS = ("day", "month")
+
+# Directory for records whose date is missing or invalid.
+UNKNOWN_PARTITION = "unknown"
+
+_CENTS = Decimal("0.01")
+
+Row = Tuple[Optional[str], Optional[datetime.date], Optional[Decimal], Optional[str]]
+
+
+def as_record(value: Any) -> Optional[dict]:
+    """
+    The extracted fields from a tool result or an agent's reply: a dict, or
+    text holding a JSON (or Python) dict literal. None when there is none.
+    """
+    if isinstance(value, dict):
+        return None if "error" in value else value
+    if not isinstance(value, str) or "{" not in value or "}" not in value:
+        return None
+    literal = value[value.index("{"):value.rindex("}") + 1]
+    for parse in (json.loads, ast.literal_eval):
+        try:
+            parsed = parse(literal)
+        except (ValueError, SyntaxError):
+            continue
+        if isinstance(parsed, dict):
+            return None if "error" in parsed else parsed
+    return None
+
+
+def _to_date(value: Any) -> Optional[datetime.date]:
+    if isinstance(value, datetime.date):
+        return value
+    try:
+        return datetime.date.fromisoformat(str(value)) if value else None
+    except ValueError:
+        return None
+
+
+def _to_amount(value: Any) -> Optional[Decimal]:
+    if value is None or value == "":
+        return None
+    try:
+        amount = Decimal(str(value).replace("$", "").replace(",", ""))
+    except InvalidOperation:
+        return None
+    return amount.quantize(_CENTS) if amount.is_finite() else None
+
+
+class CsvSink:
+    """
+    Buffers extracted invoice records and writes them in large batches.
+
+    Each flush writes one new part file per partition, so files are only
+    ever created, never appended to, and several runs can share a directory.
+    With `partition` set to "day" or "month", files go to Hive-style
+    directories (`date=2024-01-15/`, `month=2024-01/`) by invoice date.
+    """
+
+    extension = "csv"
+
+    def __init__(self, path: str = DEFAULT_SINK_PATH, partition: Optional[str] = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE, flush_seconds: float = 60.0):
+        if partition and partition not in PARTITIONS:
+            raise ValueError(f"partition must be one of {PARTITIONS}, got {partition!r}")
+        self.path = Path(path)
+        self.partition = partition or None
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.written = 0
+        self._rows: List[Row] = []
+        self._run = uuid.uuid4().hex[:8]
+        self._parts = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def write(self, record: dict, source: Optional[str] = None) -> None:
+        """Buffers one record; flushes when the batch is full or old enough."""
+        row = (
+            str(record["invoice_number"]) if record.get("invoice_number") else None,
+            _to_date(record.get("date")),
+            _to_amount(record.get("total")),
+            source,
+        )
+        with self._lock:
+            self._rows.append(row)
+            due = len(self._rows) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_seconds
+        if due:
+            self.flush()
+
+    def _partition_value(self, day: Optional[datetime.date]) -> Optional[str]:
+        if self.partition is None:
+            return None
+        if day is None:
+            return UNKNOWN_PARTITION
+        return day.isoformat() if self.partition == "day" else day.isoformat()[:7]
+
+    def _partition_dir(self, value: Optional[str]) -> Path:
+        if value is None:
+            return self.path
+        return self.path / f"{'date' if self.partition == 'day' else 'month'}={value}"
+
+    def flush(self) -> None:
+        """Writes all buffered records, one part file per partition."""
+        with self._lock:
+            rows, self._rows = self._rows, []
+            self._last_flush = time.monotonic()
+            if not rows:
+                return
+            groups: Dict[Optional[str], List[Row]] = defaultdict(list)
+            for row in rows:
+                groups[self._partition_value(row[1])].append(row)
+            for value, group in groups.items():
+                directory = self._partition_dir(value)
+                directory.mkdir(parents=True, exist_ok=True)
+                self._write_part(directory / f"part-{self._run}-{self._parts:05d}.{self.extension}", group)
+            self._parts += 1
+            self.written += len(rows)
+
+    def _write_part(self, file_path: Path, rows: List[Row]) -> None:
+        with open(file_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(COLUMNS)
+            writer.writerows(rows)
+
+    def close(self) -> None:
+        self.flush()
+
+
+class ParquetSink(CsvSink):
+    """
+    Writes Parquet part files with typed columns: the date as date32 and the
+    total as decimal(18, 2). Requires pyarrow.
+    """
+
+    extension = "parquet"
+
+    def __init__(self, *args, **kwargs):
+        try:
+            import pyarrow
+        except ImportError as e:
+            raise ImportError("The parquet and arrow sinks need pyarrow: pip install pyarrow") from e
+        self._pa = pyarrow
+        self._schema = pyarrow.schema([
+            ("invoice_number", pyarrow.string()),
+            ("date", pyarrow.date32()),
+            ("total", pyarrow.decimal128(18, 2)),
+            ("source", pyarrow.string()),
+        ])
+        super().__init__(*args, **kwargs)
+
+    def _table(self, rows: List[Row]):
+        columns = list(zip(*rows))
+        return self._pa.table(
+            {name: self._pa.array(column, type=self._schema.field(name).type) for name, column in zip(COLUMNS, columns)},
+            schema=self._schema,
+        )
+
+    def _write_part(self, file_path: Path, rows: List[Row]) -> None:
+        import pyarrow.parquet as pq
+
+        pq.write_table(self._table(rows), file_path)
+
+
+class ArrowSink(ParquetSink):
+    """Writes Arrow IPC (Feather v2) part files, for zero-copy reads."""
+
+    extension = "arrow"
+
+    def _write_part(self, file_path: Path, rows: List[Row]) -> None:
+        table = self._table(rows)
+        with self._pa.OSFile(str(file_path), "wb") as f, self._pa.ipc.new_file(f, table.schema) as writer:
+            writer.write_table(table)
+
+
+SINKS = {"csv": CsvSink, "parquet": ParquetSink, "arrow": ArrowSink}
+
+
+def sink_from_env(kind: Optional[str] = None):
+    """
+    Sink selected by INVOICE_SINK (`csv`, `parquet`, `arrow` or `none`,
+    the default), written under INVOICE_SINK_PATH and partitioned by
+    INVOICE_SINK_PARTITION (`day` or `month`). Buffered records are flushed
+    when the process exits.
+    """
+    kind = (kind or os.getenv("INVOICE_SINK", "none")).lower()
+    if kind == "none":
+        return None
+    if kind not in SINKS:
+        raise ValueError(f"INVOICE_SINK must be one of {', '.join(SINKS)} or none, got {kind!r}")
+    sink = SINKS[kind](
+        os.getenv("INVOICE_SINK_PATH", DEFAULT_SINK_PATH),
+        partition=os.getenv("INVOICE_SINK_PARTITION") or None,
+        batch_size=int(os.getenv("INVOICE_SINK_BATCH", DEFAULT_BATCH_SIZE)),
+    )
+    atexit.register(sink.close)
+    return sink
@@ -0,0 +1,531 @@
+import heapq
+import math
+import mmap
+import os
+import re
+import sqlite3
+import struct
+import sys
+import threading
+import time
+import unicodedata
+from array import array
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
+from operator import itemgetter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_ARTICLES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "articles")
+DEFAULT_INDEX_PATH = ".kb_index"
+DEFAULT_TOP_K = 3
+DEFAULT_MAX_POSTINGS = 2000
+# Postings scored at a time
+BLOCK = 128
+# Best candidates scored exactly when a search stops early
+CANDIDATES = 32
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Changed articles are indexed into a new segment; all segments are merged
+# into one when there would be more than this many...
+MAX_SEGMENTS = 8
+# ...or when this share of the live articles have old versions still indexed.
+MAX_DELETED_RATIO = 0.1
+
+ARTICLE_SUFFIXES = (".md", ".txt")
+SNIPPET_CHARS = 240
+
+_MAGIC = b"KBS1"
+# magic, byte order, documents, terms, postings, then the offset of each section
+_HEADER = struct.Struct("<4sBxxxIIIQQQQQQQQQ")
+_TOKEN = re.compile(r"[a-z0-9]+")
+_SENTENCE = re.compile(r"(?<=[.!?])\s+|\n+")
+
+STOPWORDS = frozenset("""
+a an and are as at be but by can do does for from has have how i if in is it its my no not of on or our so
+that the their then there these this to was we what when where which who why will with you your
+o os as um uma uns umas de do da dos das em no na nos nas ao aos por para com sem que se e ou mas meu minha
+meus minhas seu sua nao sim como qual quando onde eu voce ele ela isso este esta esse essa foi ser estar
+tem ter
+""".split())
+
+
+def normalize(text: str) -> str:
+    """Lowercase, without accents."""
+    return unicodedata.normalize("NFKD", text.lower()).encode("ascii", "ignore").decode("ascii")
+
+
+def tokenize(text: str) -> List[str]:
+    """Searchable words of a text: normalized, without stopwords and single characters, Wi-Fi as wifi."""
+    return [token for token in _TOKEN.findall(normalize(text).replace("-", ""))
+            if len(token) > 1 and token not in STOPWORDS]
+
+
+@dataclass
+class Hit:
+    path: str
+    title: str
+    score: float
+    snippet: str
+
+
+def _align(f) -> int:
+    f.write(b"\0" * (-f.tell() % 8))
+    return f.tell()
+
+
+def write_segment(path: Path, documents: List[Tuple[int, str, Dict[str, int], int]], average_length: float) -> None:
+    """
+    Writes a segment file for `documents`, (number, path, term counts,
+    length) each.
+
+    Each posting is a 4-byte document number and a 1-byte impact: the
+    term-frequency part of its BM25 weight, quantized from 1 to 255 (the
+    idf is applied at query time, so segments written at different times
+    are searched together). Each term's postings are sorted by decreasing
+    impact. The same impacts are also stored by document, as the sorted
+    numbers of its terms, to score candidates exactly.
+    """
+    documents = sorted(documents, key=itemgetter(0))
+    postings = defaultdict(list)
+    for number, _, counts, length in documents:
+        norm = K1 * (1 - B + B * length / average_length)
+        for term, count in counts.items():
+            # (255 - impact, number) packed into one int, so sorting puts the highest impacts first
+            postings[term].append((255 - max(1, round(255 * count / (count + norm)))) << 32 | number)
+
+    terms = sorted(postings)
+    positions = {number: position for position, (number, _, _, _) in enumerate(documents)}
+    starts, impacts, docs = array("I", [0]), bytearray(), array("I")
+    # Terms are numbered in order, so each document's term numbers come out sorted
+    document_terms = [array("I") for _ in documents]
+    document_impacts = [bytearray() for _ in documents]
+    for number, term in enumerate(terms):
+        keys = postings.pop(term)
+        keys.sort()
+        for key in keys:
+            impact, doc = 255 - (key >> 32), key & 0xFFFFFFFF
+            impacts.append(impact)
+            docs.append(doc)
+            position = positions[doc]
+            document_terms[position].append(number)
+            document_impacts[position].append(impact)
+        starts.append(len(docs))
+    document_starts = array("I", [0])
+    for entries in document_terms:
+        document_starts.append(document_starts[-1] + len(entries))
+
+    temporary = path.with_suffix(".tmp")
+    with open(temporary, "wb") as f:
+        f.write(b"\0" * _HEADER.size)
+        offsets = []
+        for section in (
+            "\n".join(terms).encode("utf-8"),
+            array("I", (number for number, _, _, _ in documents)).tobytes(),
+            "\n".join(path for _, path, _, _ in documents).encode("utf-8"),
+            starts.tobytes(),
+            bytes(impacts),
+            docs.tobytes(),
+            document_starts.tobytes(),
+            b"".join(entries.tobytes() for entries in document_terms),
+            b"".join(document_impacts),
+        ):
+            offsets.append(_align(f))
+            f.write(section)
+        f.seek(0)
+        f.write(_HEADER.pack(_MAGIC, sys.byteorder == "little", len(documents), len(terms), len(docs), *offsets))
+    os.replace(temporary, path)
+
+
+@lru_cache(maxsize=1025)
+def _weights(ratio: int) -> bytes:
+    """Translation table from impacts to weights, for a term whose idf is `ratio`/1024 of the highest."""
+    return bytes(round(impact * ratio / 1024) for impact in range(256))
+
+
+class _Segment:
+    """A memory-mapped segment file: its terms are loaded into a dict, its postings are read in place."""
+
+    def __init__(self, path: Path):
+        with open(path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, little, documents, terms, postings, *offsets = _HEADER.unpack_from(data)
+        if magic != _MAGIC or little != (sys.byteorder == "little"):
+            raise ValueError(f"{path} is not an index segment for this machine")
+        view = memoryview(data)
+        terms_text = bytes(view[offsets[0]:offsets[1]]).rstrip(b"\0").decode("utf-8")
+        paths_text = bytes(view[offsets[2]:offsets[3]]).rstrip(b"\0").decode("utf-8")
+        numbers = view[offsets[1]:offsets[1] + 4 * documents].cast("I")
+        self.terms = {term: number for number, term in enumerate(terms_text.split("\n"))} if terms else {}
+        self.paths = dict(zip(numbers, paths_text.split("\n"))) if documents else {}
+        self.positions = {number: position for position, number in enumerate(numbers)}
+        self.starts = view[offsets[3]:offsets[3] + 4 * (terms + 1)].cast("I")
+        self.impacts = view[offsets[4]:offsets[4] + postings]
+        self.docs = view[offsets[5]:offsets[5] + 4 * postings].cast("I")
+        self.document_starts = view[offsets[6]:offsets[6] + 4 * (documents + 1)].cast("I")
+        self.document_terms = view[offsets[7]:offsets[7] + 4 * postings].cast("I")
+        self.document_impacts = view[offsets[8]:offsets[8] + postings]
+        # Old versions of changed articles, skipped when scoring
+        self.deleted = set()
+
+    def postings(self, term: str) -> Tuple[int, int]:
+        """Where the postings of `term` start and end."""
+        number = self.terms.get(term)
+        return (0, 0) if number is None else (self.starts[number], self.starts[number + 1])
+
+    def score(self, doc: int, weights: List[Tuple[int, bytes]]) -> int:
+        """Exact score of a document, for (term number, translation table) `weights`."""
+        position = self.positions[doc]
+        start, end = self.document_starts[position], self.document_starts[position + 1]
+        score = 0
+        for number, table in weights:
+            found = bisect_left(self.document_terms, number, start, end)
+            if found < end and self.document_terms[found] == number:
+                score += table[self.document_impacts[found]]
+        return score
+
+
+@dataclass
+class _Reader:
+    segments: List[_Segment]
+    # Live articles by document number, and the segment holding each
+    paths: Dict[int, str]
+    owners: Dict[int, _Segment]
+
+
+class KnowledgeIndex:
+    """
+    BM25 search over a directory of support articles (.md and .txt files,
+    the first line being the title).
+
+    The index is a few segment files (see write_segment) and a SQLite
+    manifest listing them along with each article's size, modification time
+    and term counts. `reindex()` only reads the articles added or changed
+    since the last run and writes them to a new segment; their old versions
+    stay in the older segments, marked deleted, until the segments are
+    merged back into one.
+
+    `search()` scores by impact, as in JASS: blocks of postings of the
+    query terms are added up from the highest weight down until
+    `max_postings` are scored, so common terms cost little beyond their
+    best postings, and the best candidates then get their exact score from
+    their impacts by document.
+    """
+
+    def __init__(self, articles_path: Optional[str] = None, index_path: Optional[str] = None,
+                 max_postings: Optional[int] = None):
+        self.articles_path = Path(articles_path or os.getenv("KB_ARTICLES_PATH", DEFAULT_ARTICLES_PATH))
+        self.index_path = Path(index_path or os.getenv("KB_INDEX_PATH", DEFAULT_INDEX_PATH))
+        self.max_postings = max_postings or int(os.getenv("KB_MAX_POSTINGS", DEFAULT_MAX_POSTINGS))
+        self._lock = threading.Lock()
+        self._reader: Optional[_Reader] = None
+
+    # Indexing
+
+    def _manifest(self) -> sqlite3.Connection:
+        self.index_path.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(self.index_path / "manifest.sqlite")
+        db.executescript("""
+            CREATE TABLE IF NOT EXISTS articles (
+                path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, number INTEGER, length INTEGER, terms TEXT);
+            CREATE TABLE IF NOT EXISTS segments (name TEXT PRIMARY KEY, documents INTEGER);
+            CREATE TABLE IF NOT EXISTS deleted (number INTEGER PRIMARY KEY);
+        """)
+        return db
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        found = {}
+        for root, _, files in os.walk(self.articles_path):
+            for name in files:
+                if name.endswith(ARTICLE_SUFFIXES):
+                    full = os.path.join(root, name)
+                    stat = os.stat(full)
+                    found[os.path.relpath(full, self.articles_path)] = (stat.st_size, stat.st_mtime_ns)
+        return found
+
+    @staticmethod
+    def _counts(terms: str) -> Dict[str, int]:
+        fields = terms.split()
+        return dict(zip(fields[::2], map(int, fields[1::2])))
+
+    def reindex(self) -> Dict[str, float]:
+        """Brings the index up to date with the articles directory; returns what changed."""
+        started = time.perf_counter()
+        with self._lock:
+            db = self._manifest()
+            try:
+                known = {path: (size, mtime) for path, size, mtime in db.execute(
+                    "SELECT path, size, mtime_ns FROM articles")}
+                found = self._scan()
+                removed = [path for path in known if path not in found]
+                changed = [path for path, stamp in found.items() if known.get(path) != stamp]
+                segments = [name for name, in db.execute("SELECT name FROM segments")]
+                deleted = (db.execute("SELECT COUNT(*) FROM deleted").fetchone()[0]
+                           + len(removed) + sum(path in known for path in changed))
+                merge = (not segments or len(segments) >= MAX_SEGMENTS or deleted > MAX_DELETED_RATIO * len(found)
+                         or not all((self.index_path / name).exists() for name in segments))
+                report = {"articles": len(found), "added_or_changed": len(changed), "removed": len(removed)}
+                if not (changed or removed or merge):
+                    return {**report, "segments": len(segments), "seconds": round(time.perf_counter() - started, 3)}
+
+                # The old versions of changed and removed articles are marked deleted
+                db.executemany("INSERT OR IGNORE INTO deleted SELECT number FROM articles WHERE path = ?",
+                               [(path,) for path in removed + changed])
+                db.executemany("DELETE FROM articles WHERE path = ?", [(path,) for path in removed])
+                last = db.execute("SELECT MAX(number) FROM (SELECT number FROM articles"
+                                  " UNION ALL SELECT number FROM deleted)").fetchone()[0]
+                for number, path in enumerate(changed, start=0 if last is None else last + 1):
+                    tokens = tokenize((self.articles_path / path).read_text(encoding="utf-8", errors="replace"))
+                    terms = " ".join(f"{term} {count}" for term, count in Counter(tokens).items())
+                    db.execute("INSERT OR REPLACE INTO articles VALUES (?, ?, ?, ?, ?, ?)",
+                               (path, *found[path], number, len(tokens), terms))
+                average_length = db.execute("SELECT AVG(length) FROM articles").fetchone()[0] or 1.0
+
+                if merge:
+                    # Everything goes into one new segment, numbered from 0 again
+                    rows = db.execute("SELECT path, length, terms FROM articles ORDER BY path").fetchall()
+                    db.executemany("UPDATE articles SET number = ? WHERE path = ?",
+                                   [(number, path) for number, (path, _, _) in enumerate(rows)])
+                    documents = [(number, path, self._counts(terms), length)
+                                 for number, (path, length, terms) in enumerate(rows)]
+                    db.execute("DELETE FROM deleted")
+                    db.execute("DELETE FROM segments")
+                else:
+                    documents = [(number, path, self._counts(terms), length)
+                                 for path, number, length, terms in db.execute(
+                                     "SELECT path, number, length, terms FROM articles"
+                                     f" WHERE path IN ({','.join('?' * len(changed))})", changed)]
+                if documents:
+                    name = f"segment-{time.time_ns()}.idx"
+                    write_segment(self.index_path / name, documents, average_length)
+                    db.execute("INSERT INTO segments VALUES (?, ?)", (name, len(documents)))
+                db.commit()
+                if merge:
+                    for name in segments:
+                        (self.index_path / name).unlink(missing_ok=True)
+                # Searches already running keep the segments they mapped
+                self._reader = None
+                segments = db.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+                return {**report, "segments": segments, "merged": merge,
+                        "seconds": round(time.perf_counter() - started, 3)}
+            except BaseException:
+                db.rollback()
+                raise
+            finally:
+                db.close()
+
+    # Searching
+
+    def _open(self) -> _Reader:
+        with self._lock:
+            if self._reader is None:
+                db = self._manifest()
+                try:
+                    segments = [_Segment(self.index_path / name) for name, in db.execute("SELECT name FROM segments")]
+                    deleted = {number for number, in db.execute("SELECT number FROM deleted")}
+                finally:
+                    db.close()
+                paths, owners = {}, {}
+                for segment in segments:
+                    segment.deleted = deleted.intersection(segment.paths)
+                    paths.update(segment.paths)
+                    owners.update(dict.fromkeys(segment.paths, segment))
+                for number in deleted:
+                    paths.pop(number, None)
+                    owners.pop(number, None)
+                self._reader = _Reader(segments, paths, owners)
+            return self._reader
+
+    def rank(self, query: str, k: int = DEFAULT_TOP_K) -> List[Tuple[str, float]]:
+        """(article path, BM25 score) of the `k` best matches, best first."""
+        reader = self._reader or self._open()
+        terms = set(tokenize(query))
+        if not terms or k <= 0:
+            return []
+
+        found = {}
+        for term in terms:
+            postings = [(segment, start, end) for segment in reader.segments
+                        for start, end in [segment.postings(term)] if end > start]
+            # Old versions count in the document frequency until merged, as in Lucene
+            frequency = sum(end - start for _, start, end in postings)
+            if frequency:
+                found[term] = (math.log(1 + max(0.0, len(reader.paths) - frequency + 0.5) / (frequency + 0.5)),
+                               postings)
+        if not found:
+            return []
+        # Scores are summed as integers, in units of the highest idf; each
+        # term's impacts are turned into those units by a translation table.
+        unit = max(idf for idf, _ in found.values())
+        cursors = []
+        weights = defaultdict(list)
+        for term, (idf, postings) in found.items():
+            table = _weights(round(idf / unit * 1024))
+            for segment, start, end in postings:
+                cursors.append((-table[segment.impacts[start]], len(cursors), start, end, table, segment))
+                weights[segment].append((segment.terms[term], table))
+        # Each term's postings in each segment, the one with the highest weight next first
+        heapq.heapify(cursors)
+        scored = 0
+
+        scores: Dict[int, int] = {}
+        # Candidates, from the postings with the highest weights, until max_postings are scored
+        while cursors and scored < self.max_postings:
+            _, number, start, end, table, segment = cursors[0]
+            stop = min(start + BLOCK, end)
+            block = bytes(segment.impacts[start:stop]).translate(table)
+            # A block of postings is added in one call, only the articles scored before one by one
+            fresh = (dict.fromkeys(segment.docs[start:stop], block[0]) if block[0] == block[-1] else
+                     dict(zip(segment.docs[start:stop], block)))
+            if segment.deleted:
+                for doc in fresh.keys() & segment.deleted:
+                    del fresh[doc]
+            for doc in fresh.keys() & scores.keys():
+                fresh[doc] += scores[doc]
+            scores.update(fresh)
+            scored += stop - start
+            if stop < end:
+                heapq.heapreplace(cursors, (-table[segment.impacts[stop]], number, stop, end, table, segment))
+            else:
+                heapq.heappop(cursors)
+
+        # The best candidates get their exact score, with the postings not reached
+        if cursors:
+            candidates = heapq.nlargest(max(k, CANDIDATES), scores, key=scores.__getitem__)
+            scores = {doc: reader.owners[doc].score(doc, weights[reader.owners[doc]]) for doc in candidates}
+        scale = unit * (K1 + 1) / 255
+        return [(reader.paths[doc], score * scale)
+                for doc, score in heapq.nlargest(k, scores.items(), key=itemgetter(1)) if score]
+
+    def search(self, query: str, k: Optional[int] = None) -> List[Hit]:
+        """The `k` articles (KB_TOP_K, 3 by default) that best match `query`, each with its most relevant passage."""
+        wanted = set(tokenize(query))
+        hits = []
+        for path, score in self.rank(query, k or int(os.getenv("KB_TOP_K", DEFAULT_TOP_K))):
+            try:
+                text = (self.articles_path / path).read_text(encoding="utf-8", errors="replace")
+            except OSError:
+                continue
+            title, _, body = text.strip().partition("\n")
+            passages = [passage.strip() for passage in _SENTENCE.split(body) if passage.strip()] or [title]
+            best = max(passages, key=lambda passage: len(wanted.intersection(tokenize(passage))))
+            snippet = best if len(best) <= SNIPPET_CHARS else best[:SNIPPET_CHARS - 3].rstrip() + "..."
+            hits.append(Hit(path, title.lstrip("# ").strip(), round(score, 3), snippet))
+        return hits
+
+
+_default_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _default_index() -> KnowledgeIndex:
+    index = KnowledgeIndex()
+    index.reindex()
+    return index
+
+
+def default_index() -> KnowledgeIndex:
+    """The index of KB_ARTICLES_PATH, brought up to date on first use."""
+    # Tools run in threads: only one of them indexes
+    with _default_lock:
+        return _default_index()
+
+
+def benchmark(articles: int = 100000, queries: int = 2000, path: Optional[str] = None) -> None:
+    """
+    Indexes a synthetic corpus of `articles` support articles (written to
+    `path`, a temporary directory by default), reindexes it after changing 1%
+    of them, and times `queries` searches, comparing the top `DEFAULT_TOP_K`
+    with the ones from scoring every posting.
+    """
+    import random
+    import shutil
+    import tempfile
+    from itertools import accumulate
+
+    rng = random.Random(42)
+    # Zipf-distributed vocabulary, so frequent terms have long posting lists
+    topics = ["internet", "router", "wifi", "password", "invoice", "payment", "refund", "login", "error", "slow",
+              "connection", "cache", "browser", "account", "billing", "update", "install", "crash", "network", "email"]
+    vocabulary = [f"w{number}" for number in range(50000)]
+    # Support topics rank from about 1 in 20 articles to 1 in 100
+    for rank, topic in enumerate(topics):
+        vocabulary.insert(200 + 50 * rank, topic)
+    cumulative = list(accumulate(1 / (rank + 5) for rank in range(len(vocabulary))))
+    root = Path(path or tempfile.mkdtemp(prefix="kb_articles_"))
+    root.mkdir(parents=True, exist_ok=True)
+
+    def write(number: int) -> None:
+        words = rng.choices(vocabulary, cum_weights=cumulative, k=rng.randint(40, 160))
+        sentences = (" ".join(words[start:start + 12]) for start in range(0, len(words), 12))
+        (root / f"article-{number:06d}.md").write_text(f"# Article {number}\n" + ". ".join(sentences) + ".\n")
+
+    started = time.perf_counter()
+    for number in range(articles):
+        write(number)
+    print(f"📝 Wrote {articles} articles to {root} in {time.perf_counter() - started:.1f}s")
+
+    shutil.rmtree(root / ".kb_index", ignore_errors=True)
+    index = KnowledgeIndex(str(root), str(root / ".kb_index"))
+    print(f"🗂️ Full index: {index.reindex()}")
+    for number in rng.sample(range(articles), max(1, articles // 100)):
+        write(number)
+    print(f"🗂️ Reindex after changing 1%: {index.reindex()}")
+    size = sum(file.stat().st_size for file in index.index_path.glob("*.idx"))
+    print(f"💾 Segments: {size / 1e6:.1f} MB")
+
+    samples = [" ".join(rng.sample(topics, rng.randint(1, 3))
+                        + rng.choices(vocabulary, cum_weights=cumulative, k=rng.randint(0, 2)))
+               for _ in range(queries)]
+    index.rank(samples[0])
+    for label, run in (("rank", index.rank), ("search with snippets", index.search)):
+        latencies = []
+        for query in samples:
+            started = time.perf_counter()
+            run(query)
+            latencies.append((time.perf_counter() - started) * 1000)
+        latencies.sort()
+        print(f"🔎 {label}: p50 {latencies[len(latencies) // 2]:.3f} ms, "
+              f"p95 {latencies[int(len(latencies) * 0.95)]:.3f} ms, "
+              f"p99 {latencies[int(len(latencies) * 0.99)]:.3f} ms ({queries} queries)")
+
+    exhaustive = KnowledgeIndex(str(root), str(root / ".kb_index"), max_postings=sys.maxsize)
+    checked = samples[:200]
+    found = sum(len({path for path, _ in index.rank(query)} & {path for path, _ in exhaustive.rank(query)})
+                for query in checked)
+    print(f"🎯 Top {DEFAULT_TOP_K} also found scoring every posting: "
+          f"{found / (DEFAULT_TOP_K * len(checked)):.1%} ({len(checked)} queries)")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="BM25 index of the support articles behind knowledge_base.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    subcommands.add_parser("index", help="Index the articles added or changed since the last run")
+    search = subcommands.add_parser("search", help="Search the articles")
+    search.add_argument("query")
+    search.add_argument("-k", type=int, help="Articles to show (KB_TOP_K, 3 by default)")
+    bench = subcommands.add_parser("benchmark", help="Time indexing and searches on a synthetic corpus")
+    bench.add_argument("--articles", type=int, default=100000)
+    bench.add_argument("--queries", type=int, default=2000)
+    bench.add_argument("--path", help="Directory for the synthetic articles (a temporary one by default)")
+    args = parser.parse_args()
+
+    if args.command == "benchmark":
+        benchmark(args.articles, args.queries, args.path)
+        return
+    index = KnowledgeIndex()
+    print(f"🗂️ {index.reindex()}")
+    if args.command == "search":
+        for hit in index.search(args.query, args.k):
+            print(f"{hit.score:6.2f}  {hit.title} ({hit.path})\n        {hit.snippet}")
+
+
+if __name__ == "__main__":
+    main()
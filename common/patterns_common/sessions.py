@@ -0,0 +1,108 @@
+"""
+Bounded per-session state for the coordinators' multi-turn conversations.
+
+The LangGraph checkpointer and the CrewAI flow persistence of the
+coordinator-dispatcher patterns both keep their records in a SessionStore.
+"""
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+DEFAULT_MAX_SESSIONS = 10000
+DEFAULT_TTL_SECONDS = 1800.0
+
+
+class SessionStore:
+    """
+    Conversation state keyed by session ID, as compact serialized records.
+
+    Sessions idle for more than `ttl_seconds` are dropped. Beyond
+    `max_sessions` in memory, the least recently used are evicted: dropped,
+    or written to the SQLite file at `spill_path` if one is set, and loaded
+    back into memory when their conversation resumes. Idle time is measured
+    with `clock` (seconds, `time.time` by default).
+    """
+
+    def __init__(self, max_sessions: Optional[int] = None, ttl_seconds: Optional[float] = None,
+                 spill_path: Optional[str] = None, clock: Callable[[], float] = time.time):
+        self.max_sessions = max_sessions or int(os.getenv("SESSION_STORE_SIZE", DEFAULT_MAX_SESSIONS))
+        self.ttl_seconds = ttl_seconds or float(os.getenv("SESSION_STORE_TTL", DEFAULT_TTL_SECONDS))
+        self.spill_path = spill_path or os.getenv("SESSION_STORE_SPILL_PATH") or None
+        self.clock = clock
+        self.expired = 0
+        self.spilled = 0
+        self.restored = 0
+        # session -> (last used, record), least recently used first
+        self._records: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if self.spill_path:
+            self._db = sqlite3.connect(self.spill_path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, last_used REAL, record BLOB)")
+            self._db.commit()
+
+    def get(self, session_id: str) -> Optional[bytes]:
+        """The record of a session, or None if it is unknown or expired."""
+        now = self.clock()
+        with self._lock:
+            entry = self._records.pop(session_id, None)
+            if entry is None and self._db is not None:
+                entry = self._db.execute(
+                    "SELECT last_used, record FROM sessions WHERE id = ?", (session_id,)).fetchone()
+                if entry is not None:
+                    self._db.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+                    self._db.commit()
+                    self.restored += entry[0] + self.ttl_seconds > now
+            if entry is None:
+                return None
+            if entry[0] + self.ttl_seconds <= now:
+                self.expired += 1
+                return None
+            self._records[session_id] = (now, entry[1])
+            self._evict(now)
+            return entry[1]
+
+    def put(self, session_id: str, record: bytes) -> None:
+        now = self.clock()
+        with self._lock:
+            self._records.pop(session_id, None)
+            self._records[session_id] = (now, record)
+            self._evict(now)
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._records.pop(session_id, None)
+            if self._db is not None:
+                self._db.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+                self._db.commit()
+
+    def _evict(self, now: float) -> None:
+        # Records are kept in order of last use, so the idle ones come first.
+        while self._records and next(iter(self._records.values()))[0] + self.ttl_seconds <= now:
+            self._records.popitem(last=False)
+            self.expired += 1
+        spill = []
+        while len(self._records) > self.max_sessions:
+            session_id, (last_used, record) = self._records.popitem(last=False)
+            spill.append((session_id, last_used, record))
+        if spill and self._db is not None:
+            self._db.executemany("INSERT OR REPLACE INTO sessions VALUES (?, ?, ?)", spill)
+            self._db.execute("DELETE FROM sessions WHERE last_used <= ?", (now - self.ttl_seconds,))
+            self._db.commit()
+            self.spilled += len(spill)
+
+    def stats(self) -> dict:
+        """Sessions in memory and on disk, the bytes of their records, and eviction counters."""
+        with self._lock:
+            on_disk = self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0] if self._db is not None else 0
+            return {
+                "sessions": len(self._records),
+                "record_bytes": sum(len(record) for _, record in self._records.values()),
+                "spilled_sessions": on_disk,
+                "expired": self.expired,
+                "spilled": self.spilled,
+                "restored": self.restored,
+            }
@@ -0,0 +1,307 @@
+"""
+Per-stage tracing shared by every pattern in every framework.
+
+A Tracer records each agent, node, task, tool and LLM call as a span with
+its wall time, token counts, payload sizes and time to first token. The
+framework hooks live next to it: `adk.instrument`, the LangChain
+`langchain_callbacks.LLMSpanHandler` and the CrewAI
+`crewai_events.SpanEventListener`.
+"""
+import inspect
+import json
+import os
+import statistics
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from functools import wraps
+from pathlib import Path
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+DEFAULT_TRACE_PATH = ".traces/spans.jsonl"
+DEFAULT_OTLP_PATH = ".traces/spans.otlp.jsonl"
+
+# Usage field names used by LangChain, google-genai and OpenAI/CrewAI.
+_TOKEN_FIELDS = (
+    ("input_tokens", "output_tokens"),
+    ("prompt_token_count", "candidates_token_count"),
+    ("prompt_tokens", "completion_tokens"),
+)
+
+
+def payload_size(value: Any) -> int:
+    """Size in bytes of a payload, serialized as JSON when it is not text."""
+    if value is None:
+        return 0
+    if isinstance(value, bytes):
+        return len(value)
+    if not isinstance(value, str):
+        try:
+            value = json.dumps(value, default=str)
+        except (TypeError, ValueError):
+            value = str(value)
+    return len(value.encode("utf-8", "replace"))
+
+
+def token_counts(usage: Any) -> Optional[Tuple[int, int]]:
+    """(input, output) token counts from any of the usage objects the frameworks return."""
+    if usage is None:
+        return None
+    for input_field, output_field in _TOKEN_FIELDS:
+        if isinstance(usage, dict):
+            tokens_in, tokens_out = usage.get(input_field), usage.get(output_field)
+        else:
+            tokens_in, tokens_out = getattr(usage, input_field, None), getattr(usage, output_field, None)
+        if tokens_in is not None or tokens_out is not None:
+            return int(tokens_in or 0), int(tokens_out or 0)
+    return None
+
+
+@dataclass
+class Span:
+    """One timed stage: an agent, node, task, tool or LLM call."""
+
+    name: str
+    kind: str
+    trace_id: str
+    parent_id: Optional[str] = None
+    span_id: str = field(default_factory=lambda: uuid.uuid4().hex[:16])
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: Optional[int] = None
+    status: str = "ok"
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def set_payload(self, direction: str, value: Any) -> None:
+        """Records the size of the `input` or `output` payload."""
+        self.attributes[f"{direction}_bytes"] = payload_size(value)
+
+    def add_tokens(self, usage: Any) -> None:
+        counts = token_counts(usage)
+        if counts:
+            self.attributes["input_tokens"] = self.attributes.get("input_tokens", 0) + counts[0]
+            self.attributes["output_tokens"] = self.attributes.get("output_tokens", 0) + counts[1]
+
+    def mark_first_token(self, at_ns: Optional[int] = None) -> None:
+        """Records the time to the first token of a streamed reply; later calls are ignored."""
+        if "ttft_ms" not in self.attributes:
+            self.attributes["ttft_ms"] = round(((at_ns or time.time_ns()) - self.start_ns) / 1e6, 3)
+
+
+class JsonlExporter:
+    """Appends one JSON object per finished span."""
+
+    def __init__(self, path: str = DEFAULT_TRACE_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def _line(self, span: Span, resource: Dict[str, str]) -> dict:
+        return {**resource, **asdict(span), "duration_ms": round(span.duration_ms, 3)}
+
+    def export(self, span: Span, resource: Dict[str, str]) -> None:
+        line = json.dumps(self._line(span, resource), default=str)
+        with self._lock:
+            # Created with the first span, so importing a pattern leaves no directory behind.
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(values: Dict[str, Any]) -> List[dict]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in values.items() if value is not None]
+
+
+class OtlpJsonExporter(JsonlExporter):
+    """
+    Writes spans in the OTLP/JSON encoding, one ExportTraceServiceRequest
+    per line, as read by the OpenTelemetry Collector's file receiver.
+    """
+
+    def __init__(self, path: str = DEFAULT_OTLP_PATH):
+        super().__init__(path)
+
+    def _line(self, span: Span, resource: Dict[str, str]) -> dict:
+        otlp_span = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": _otlp_attributes({"stage.kind": span.kind, **span.attributes}),
+            "status": {"code": 1 if span.status == "ok" else 2},
+        }
+        if span.parent_id:
+            otlp_span["parentSpanId"] = span.parent_id
+        return {"resourceSpans": [{
+            "resource": {"attributes": _otlp_attributes({"service.name": resource["pattern"], **resource})},
+            "scopeSpans": [{"scope": {"name": "multi-agents-design-patterns.tracing"}, "spans": [otlp_span]}],
+        }]}
+
+
+def exporter_from_env():
+    """
+    Exporter selected by TRACE_EXPORTER: `none` (default), `jsonl` or `otlp`.
+    The file defaults to .traces/ and can be set with TRACE_EXPORT_PATH.
+    """
+    kind = os.getenv("TRACE_EXPORTER", "none").lower()
+    if kind == "none":
+        return None
+    if kind == "otlp":
+        return OtlpJsonExporter(os.getenv("TRACE_EXPORT_PATH", DEFAULT_OTLP_PATH))
+    return JsonlExporter(os.getenv("TRACE_EXPORT_PATH", DEFAULT_TRACE_PATH))
+
+
+class Tracer:
+    """
+    Creates spans for one pattern in one framework.
+
+    Spans opened with `span()` or `traced()` nest through a context variable.
+    Frameworks that report start and end in separate callbacks use `begin()`
+    and `finish()` with a key that identifies the stage instead.
+    """
+
+    def __init__(self, framework: str, pattern: str, exporter=None):
+        self.resource = {"framework": framework, "pattern": pattern}
+        self.exporter = exporter if exporter is not None else exporter_from_env()
+        self._current: ContextVar[Optional[Span]] = ContextVar(f"span_{framework}_{pattern}", default=None)
+        self._open: Dict[Hashable, List[Span]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def current(self) -> Optional[Span]:
+        """The span of the enclosing `span()` or `traced()` block, if any."""
+        return self._current.get()
+
+    def start(self, name: str, kind: str, parent: Optional[Span] = None, trace_id: Optional[str] = None,
+              start_ns: Optional[int] = None) -> Span:
+        parent = parent or self._current.get()
+        span = Span(name, kind, trace_id or (parent.trace_id if parent else uuid.uuid4().hex),
+                    parent.span_id if parent else None)
+        if start_ns:
+            span.start_ns = start_ns
+        return span
+
+    def end(self, span: Span, error: Any = None, end_ns: Optional[int] = None) -> None:
+        span.end_ns = end_ns or time.time_ns()
+        if error is not None:
+            span.status = "error"
+            span.attributes["error"] = error if isinstance(error, str) else f"{type(error).__name__}: {error}"
+        if self.exporter is not None:
+            self.exporter.export(span, self.resource)
+
+    @contextmanager
+    def span(self, name: str, kind: str, payload: Any = None):
+        """Times the enclosed block as a child of the current span."""
+        span = self.start(name, kind)
+        if payload is not None:
+            span.set_payload("input", payload)
+        token = self._current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            self.end(span, error=e)
+            raise
+        else:
+            self.end(span)
+        finally:
+            self._current.reset(token)
+
+    def traced(self, kind: str, name: Optional[str] = None):
+        """Decorator that records every call of a function (or coroutine function) as a span."""
+
+        def decorator(func):
+            if inspect.iscoroutinefunction(func):
+                @wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    with self.span(name or func.__name__, kind, payload=[args, kwargs] if kwargs else args) as span:
+                        result = await func(*args, **kwargs)
+                        span.set_payload("output", result)
+                        return result
+
+                return async_wrapper
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name or func.__name__, kind, payload=[args, kwargs] if kwargs else args) as span:
+                    result = func(*args, **kwargs)
+                    span.set_payload("output", result)
+                    return result
+
+            return wrapper
+
+        return decorator
+
+    def begin(self, key: Hashable, name: str, kind: str, parent: Optional[Span] = None,
+              trace_id: Optional[str] = None, payload: Any = None, start_ns: Optional[int] = None) -> Span:
+        """Opens a span that a later `finish(key)` closes."""
+        span = self.start(name, kind, parent, trace_id, start_ns)
+        if payload is not None:
+            span.set_payload("input", payload)
+        with self._lock:
+            self._open[key].append(span)
+        return span
+
+    def opened(self, key: Hashable) -> Optional[Span]:
+        """The most recent span still open under `key`."""
+        with self._lock:
+            spans = self._open.get(key)
+            return spans[-1] if spans else None
+
+    def finish(self, key: Hashable, payload: Any = None, usage: Any = None, error: Any = None,
+               end_ns: Optional[int] = None) -> Optional[Span]:
+        """Closes the oldest span open under `key`."""
+        with self._lock:
+            spans = self._open.get(key)
+            if not spans:
+                return None
+            span = spans.pop(0)
+            if not spans:
+                del self._open[key]
+        if payload is not None:
+            span.set_payload("output", payload)
+        span.add_tokens(usage)
+        self.end(span, error=error, end_ns=end_ns)
+        return span
+
+
+def summarize(path: str = DEFAULT_TRACE_PATH) -> None:
+    """
+    Prints latency, time to first token and token totals per stage from a
+    JSONL trace file, so the same pattern can be compared across frameworks.
+    """
+    stages = defaultdict(list)
+    first_tokens = defaultdict(list)
+    tokens = defaultdict(int)
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            span = json.loads(line)
+            key = (span["framework"], span["pattern"], span["kind"], span["name"])
+            stages[key].append(span["duration_ms"])
+            if "ttft_ms" in span["attributes"]:
+                first_tokens[key].append(span["attributes"]["ttft_ms"])
+            tokens[key] += span["attributes"].get("input_tokens", 0) + span["attributes"].get("output_tokens", 0)
+
+    print(f"{'framework':<10} {'pattern':<24} {'kind':<8} {'stage':<28} {'calls':>6} {'p50 ms':>10} "
+          f"{'ttft p50':>10} {'total ms':>11} {'tokens':>8}")
+    for key in sorted(stages, key=lambda k: (k[0], k[1], -sum(stages[k]))):
+        durations = stages[key]
+        ttft = f"{statistics.median(first_tokens[key]):.1f}" if first_tokens[key] else "-"
+        print(f"{key[0]:<10} {key[1]:<24} {key[2]:<8} {key[3][:28]:<28} {len(durations):>6} "
+              f"{statistics.median(durations):>10.1f} {ttft:>10} {sum(durations):>11.1f} {tokens[key]:>8}")
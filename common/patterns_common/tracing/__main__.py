@@ -0,0 +1,5 @@
+import sys
+
+from . import DEFAULT_TRACE_PATH, summarize
+
+summarize(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_TRACE_PATH)
@@ -0,0 +1,129 @@
+import inspect
+import uuid
+
+from . import Tracer
+
+
+def _trace_id(invocation_id: str) -> str:
+    return uuid.uuid5(uuid.NAMESPACE_URL, invocation_id).hex
+
+
+def _content_text(content) -> str:
+    if content is None or not getattr(content, "parts", None):
+        return ""
+    return "".join(part.text or "" for part in content.parts)
+
+
+def _as_list(callback) -> list:
+    if callback is None:
+        return []
+    return list(callback) if isinstance(callback, list) else [callback]
+
+
+async def _run_callbacks(callbacks: list, **kwargs):
+    """Runs callbacks in order until one returns a value, as ADK does."""
+    for callback in callbacks:
+        result = callback(**kwargs)
+        if inspect.isawaitable(result):
+            result = await result
+        if result is not None:
+            return result
+    return None
+
+
+def instrument(agent, tracer: Tracer, parent=None):
+    """
+    Wraps the callbacks of an agent tree so every agent, model call and tool
+    call is recorded as a span. Existing callbacks keep running, in order,
+    inside the wrappers; when one short-circuits a stage the span still ends.
+
+    Args:
+        agent: The root agent (workflow agents are walked recursively).
+        tracer: Tracer that receives the spans.
+
+    Returns:
+        The same agent, instrumented.
+    """
+    name = agent.name
+    parent_name = parent.name if parent is not None else None
+    output_key = getattr(agent, "output_key", None)
+    agent_before, agent_after = _as_list(agent.before_agent_callback), _as_list(agent.after_agent_callback)
+
+    async def before_agent(callback_context):
+        invocation = callback_context.invocation_id
+        tracer.begin(
+            (invocation, name), name, "agent",
+            parent=tracer.opened((invocation, parent_name)) if parent_name else None,
+            trace_id=_trace_id(invocation),
+            payload=_content_text(callback_context.user_content) if parent is None else None,
+        )
+        result = await _run_callbacks(agent_before, callback_context=callback_context)
+        if result is not None:
+            tracer.opened((invocation, name)).attributes["short_circuit"] = True
+            tracer.finish((invocation, name), payload=_content_text(result))
+        return result
+
+    async def after_agent(callback_context):
+        result = await _run_callbacks(agent_after, callback_context=callback_context)
+        output = _content_text(result) if result is not None else (callback_context.state.get(output_key) if output_key else None)
+        tracer.finish((callback_context.invocation_id, name), payload=output)
+        return result
+
+    agent.before_agent_callback = before_agent
+    agent.after_agent_callback = after_agent
+
+    if hasattr(agent, "before_model_callback"):
+        model_before, model_after = _as_list(agent.before_model_callback), _as_list(agent.after_model_callback)
+        tool_before, tool_after = _as_list(agent.before_tool_callback), _as_list(agent.after_tool_callback)
+
+        async def before_model(callback_context, llm_request):
+            invocation = callback_context.invocation_id
+            tracer.begin(
+                (invocation, name, "llm"), llm_request.model or "llm", "llm",
+                parent=tracer.opened((invocation, name)),
+                payload="".join(_content_text(content) for content in llm_request.contents),
+            )
+            result = await _run_callbacks(model_before, callback_context=callback_context, llm_request=llm_request)
+            if result is not None:
+                tracer.finish((invocation, name, "llm"), payload=_content_text(result.content), usage=result.usage_metadata)
+            return result
+
+        async def after_model(callback_context, llm_response):
+            if llm_response.partial:
+                span = tracer.opened((callback_context.invocation_id, name, "llm"))
+                if span is not None:
+                    span.mark_first_token()
+            result = await _run_callbacks(model_after, callback_context=callback_context, llm_response=llm_response)
+            if not llm_response.partial:
+                response = result or llm_response
+                tracer.finish((callback_context.invocation_id, name, "llm"),
+                              payload=_content_text(response.content), usage=response.usage_metadata)
+            return result
+
+        async def before_tool(tool, args, tool_context):
+            key = (tool_context.invocation_id, name, tool.name, tool_context.function_call_id)
+            tracer.begin(key, tool.name, "tool", parent=tracer.opened((tool_context.invocation_id, name)), payload=args)
+            result = await _run_callbacks(tool_before, tool=tool, args=args, tool_context=tool_context)
+            if result is not None:
+                tracer.finish(key, payload=result)
+            return result
+
+        async def after_tool(tool, args, tool_context, tool_response):
+            result = await _run_callbacks(tool_after, tool=tool, args=args, tool_context=tool_context, tool_response=tool_response)
+            key = (tool_context.invocation_id, name, tool.name, tool_context.function_call_id)
+            span = tracer.finish(key, payload=tool_response if result is None else result)
+            # The agent's slowest tool call, which sets its latency when the calls run together
+            agent_span = tracer.opened((tool_context.invocation_id, name))
+            if span is not None and agent_span is not None and span.duration_ms > agent_span.attributes.get("slowest_tool_ms", 0):
+                agent_span.attributes["slowest_tool"] = span.name
+                agent_span.attributes["slowest_tool_ms"] = round(span.duration_ms, 3)
+            return result
+
+        agent.before_model_callback = before_model
+        agent.after_model_callback = after_model
+        agent.before_tool_callback = before_tool
+        agent.after_tool_callback = after_tool
+
+    for sub_agent in agent.sub_agents:
+        instrument(sub_agent, tracer, agent)
+    return agent
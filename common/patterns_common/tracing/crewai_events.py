@@ -0,0 +1,154 @@
+from collections import defaultdict
+from typing import Dict, Hashable, Optional, Tuple
+
+from crewai.events import (
+    AgentExecutionCompletedEvent,
+    AgentExecutionErrorEvent,
+    AgentExecutionStartedEvent,
+    BaseEventListener,
+    CrewKickoffCompletedEvent,
+    CrewKickoffFailedEvent,
+    CrewKickoffStartedEvent,
+    FlowFinishedEvent,
+    FlowStartedEvent,
+    LLMCallCompletedEvent,
+    LLMCallFailedEvent,
+    LLMCallStartedEvent,
+    LLMStreamChunkEvent,
+    MethodExecutionFailedEvent,
+    MethodExecutionFinishedEvent,
+    MethodExecutionStartedEvent,
+    TaskCompletedEvent,
+    TaskFailedEvent,
+    TaskStartedEvent,
+    ToolUsageErrorEvent,
+    ToolUsageFinishedEvent,
+    ToolUsageStartedEvent,
+)
+
+from . import Span, Tracer
+
+
+def _event_ns(event) -> Optional[int]:
+    timestamp = getattr(event, "timestamp", None)
+    return int(timestamp.timestamp() * 1e9) if timestamp else None
+
+
+def _task_key(task) -> str:
+    return str(getattr(task, "id", id(task)))
+
+
+class SpanEventListener(BaseEventListener):
+    """
+    Turns CrewAI events into spans: flows and their methods, crew kickoffs,
+    tasks, agent executions, tool calls and LLM calls. Instantiate it once,
+    before kickoff, for the listener to be registered on the event bus.
+    """
+
+    def __init__(self, tracer: Tracer):
+        self.tracer = tracer
+        # Most recently opened span of each kind, used as the parent of the next level.
+        self.active: Dict[str, Optional[Span]] = defaultdict(lambda: None)
+        super().__init__()
+
+    def _begin(self, kind: str, key: Hashable, name: str, parent_kinds: Tuple[str, ...], event, payload=None) -> None:
+        parent = next((self.active[k] for k in parent_kinds if self.active[k] is not None), None)
+        self.active[kind] = self.tracer.begin(key, name, kind, parent=parent, payload=payload, start_ns=_event_ns(event))
+
+    def _finish(self, kind: str, key: Hashable, event, payload=None, usage=None, error=None) -> None:
+        span = self.tracer.finish(key, payload=payload, usage=usage, error=error, end_ns=_event_ns(event))
+        if span is not None and self.active[kind] is span:
+            self.active[kind] = None
+
+    def setup_listeners(self, crewai_event_bus):
+        @crewai_event_bus.on(FlowStartedEvent)
+        def on_flow_started(source, event):
+            self._begin("flow", ("flow", event.flow_name), event.flow_name, (), event, getattr(event, "inputs", None))
+
+        @crewai_event_bus.on(FlowFinishedEvent)
+        def on_flow_finished(source, event):
+            self._finish("flow", ("flow", event.flow_name), event, getattr(event, "result", None))
+
+        @crewai_event_bus.on(MethodExecutionStartedEvent)
+        def on_method_started(source, event):
+            key = ("method", event.flow_name, event.method_name)
+            self._begin("method", key, event.method_name, ("flow",), event, getattr(event, "params", None))
+
+        @crewai_event_bus.on(MethodExecutionFinishedEvent)
+        def on_method_finished(source, event):
+            self._finish("method", ("method", event.flow_name, event.method_name), event, getattr(event, "result", None))
+
+        @crewai_event_bus.on(MethodExecutionFailedEvent)
+        def on_method_failed(source, event):
+            self._finish("method", ("method", event.flow_name, event.method_name), event, error=event.error)
+
+        @crewai_event_bus.on(CrewKickoffStartedEvent)
+        def on_crew_started(source, event):
+            self._begin("crew", ("crew", event.crew_name), event.crew_name or "crew", ("method",), event, event.inputs)
+
+        @crewai_event_bus.on(CrewKickoffCompletedEvent)
+        def on_crew_completed(source, event):
+            output = event.output
+            self._finish("crew", ("crew", event.crew_name), event,
+                         getattr(output, "raw", output), getattr(output, "token_usage", None))
+
+        @crewai_event_bus.on(CrewKickoffFailedEvent)
+        def on_crew_failed(source, event):
+            self._finish("crew", ("crew", event.crew_name), event, error=event.error)
+
+        @crewai_event_bus.on(TaskStartedEvent)
+        def on_task_started(source, event):
+            task = event.task
+            name = getattr(task, "name", None) or "task"
+            self._begin("task", ("task", _task_key(task)), name, ("crew",), event, getattr(task, "description", None))
+
+        @crewai_event_bus.on(TaskCompletedEvent)
+        def on_task_completed(source, event):
+            self._finish("task", ("task", _task_key(event.task)), event, getattr(event.output, "raw", event.output))
+
+        @crewai_event_bus.on(TaskFailedEvent)
+        def on_task_failed(source, event):
+            self._finish("task", ("task", _task_key(event.task)), event, error=event.error)
+
+        @crewai_event_bus.on(AgentExecutionStartedEvent)
+        def on_agent_started(source, event):
+            self._begin("agent", ("agent", _task_key(event.task)), event.agent.role, ("task",), event, event.task_prompt)
+
+        @crewai_event_bus.on(AgentExecutionCompletedEvent)
+        def on_agent_completed(source, event):
+            self._finish("agent", ("agent", _task_key(event.task)), event, event.output)
+
+        @crewai_event_bus.on(AgentExecutionErrorEvent)
+        def on_agent_error(source, event):
+            self._finish("agent", ("agent", _task_key(event.task)), event, error=event.error)
+
+        @crewai_event_bus.on(ToolUsageStartedEvent)
+        def on_tool_started(source, event):
+            key = ("tool", event.agent_key, event.tool_name)
+            self._begin("tool", key, event.tool_name, ("agent",), event, event.tool_args)
+
+        @crewai_event_bus.on(ToolUsageFinishedEvent)
+        def on_tool_finished(source, event):
+            self._finish("tool", ("tool", event.agent_key, event.tool_name), event, event.output)
+
+        @crewai_event_bus.on(ToolUsageErrorEvent)
+        def on_tool_error(source, event):
+            self._finish("tool", ("tool", event.agent_key, event.tool_name), event, error=event.error)
+
+        @crewai_event_bus.on(LLMCallStartedEvent)
+        def on_llm_started(source, event):
+            self._begin("llm", ("llm",), getattr(event, "model", None) or "llm", ("agent", "method"), event, event.messages)
+
+        @crewai_event_bus.on(LLMStreamChunkEvent)
+        def on_llm_chunk(source, event):
+            span = self.tracer.opened(("llm",))
+            if span is not None:
+                span.mark_first_token(_event_ns(event))
+
+        @crewai_event_bus.on(LLMCallCompletedEvent)
+        def on_llm_completed(source, event):
+            self._finish("llm", ("llm",), event, event.response, getattr(event, "usage", None))
+
+        @crewai_event_bus.on(LLMCallFailedEvent)
+        def on_llm_failed(source, event):
+            self._finish("llm", ("llm",), event, error=event.error)
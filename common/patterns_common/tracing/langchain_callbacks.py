@@ -0,0 +1,40 @@
+from langchain_core.callbacks import BaseCallbackHandler
+
+from . import Tracer
+
+
+class LLMSpanHandler(BaseCallbackHandler):
+    """
+    LangChain callback handler that records every LLM call as a span under
+    the node that made it, with prompt/response sizes, token usage and,
+    when the reply is streamed, the time to its first token.
+    """
+
+    def __init__(self, tracer: Tracer):
+        self.tracer = tracer
+
+    @staticmethod
+    def _name(serialized, kwargs) -> str:
+        return (kwargs.get("metadata") or {}).get("ls_model_name") or (serialized or {}).get("name") or "llm"
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        prompt = "".join(str(message.content) for batch in messages for message in batch)
+        self.tracer.begin(run_id, self._name(serialized, kwargs), "llm", payload=prompt)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self.tracer.begin(run_id, self._name(serialized, kwargs), "llm", payload="".join(prompts))
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        span = self.tracer.opened(run_id)
+        if span is not None:
+            span.mark_first_token()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        usage = (response.llm_output or {}).get("token_usage")
+        generations = [generation for batch in response.generations for generation in batch]
+        if usage is None:
+            usage = next((getattr(g.message, "usage_metadata", None) for g in generations if hasattr(g, "message")), None)
+        self.tracer.finish(run_id, payload="".join(g.text for g in generations), usage=usage)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self.tracer.finish(run_id, error=error)
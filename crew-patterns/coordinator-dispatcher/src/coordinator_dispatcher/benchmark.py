@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+"""
+Per-request construction cost of the coordinator, built per message versus
+leased from the warm runtime (see runtime.py). No model is called: only the
+LLM clients, crews and flows are built, so a placeholder API key will do.
+
+    uv run benchmark [requests]
+"""
+import os
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark-placeholder")
+os.environ.setdefault("TRACE_EXPORTER", "none")
+
+from crewai import LLM
+
+from coordinator_dispatcher import main
+from coordinator_dispatcher.crews.billing_crew.billing_crew import BillingCrew
+from coordinator_dispatcher.crews.tech_support_crew.tech_support_crew import TechSupportCrew
+
+
+def _time(func: Callable[[], object]) -> float:
+    started = time.perf_counter()
+    func()
+    return (time.perf_counter() - started) * 1000
+
+
+def _lease(pool) -> Callable[[], None]:
+    def lease():
+        with pool.lease():
+            pass
+
+    return lease
+
+
+def run():
+    """Prints the median cost per request of each component, cold and warm."""
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    cold = {
+        "coordinator LLM": lambda: LLM(model="gpt-4o-mini", response_format=main.IntentResult),
+        "billing crew": lambda: main.streaming(BillingCrew().crew()),
+        "tech support crew": lambda: main.streaming(TechSupportCrew().crew()),
+        "flow": main.CoordinatorFlow,
+    }
+    # Build once so imports and caches are not charged to the first request.
+    for build in cold.values():
+        build()
+    print(f"🔥 Runtime warmed up in {main.warm():.2f}s")
+    warm = {
+        "coordinator LLM": main.coordinator_llm,
+        "billing crew": _lease(main.billing_crews),
+        "tech support crew": _lease(main.tech_support_crews),
+        "flow": _lease(main.flows),
+    }
+
+    results: Dict[str, List[List[float]]] = {name: [[], []] for name in cold}
+    for _ in range(requests):
+        for name in cold:
+            results[name][0].append(_time(cold[name]))
+            results[name][1].append(_time(warm[name]))
+
+    print(f"\n{'component':<20} {'built ms':>10} {'warm ms':>10}   ({requests} requests, median)")
+    medians = {}
+    for name, (built, reused) in results.items():
+        medians[name] = statistics.median(built), statistics.median(reused)
+        print(f"{name:<20} {medians[name][0]:>10.2f} {medians[name][1]:>10.3f}")
+
+    # A message routed to a crew uses the coordinator LLM, a flow and one crew.
+    saved = [medians[name][0] - medians[name][1] for name in ("coordinator LLM", "flow")]
+    crews = [medians[name][0] - medians[name][1] for name in ("billing crew", "tech support crew")]
+    print(f"\nSaved per routed message: {sum(saved) + statistics.mean(crews):.1f} ms before the first model call")
+
+
+if __name__ == "__main__":
+    run()
@@ -3,7 +3,7 @@ from typing import List
 from crewai import Agent, Crew, Process, Task
 from crewai.agents.agent_builder.base_agent import BaseAgent
 from crewai.project import CrewBase, agent, crew, task
-from coordinator_dispatcher.tools.tools import billing_system_db, invoice_generator
+from coordinator_dispatcher.tools.tools import bill_customer, billing_system_db
 
 @CrewBase
 class BillingCrew:
@@ -19,7 +19,7 @@ class BillingCrew:
     def billing_specialist(self) -> Agent:
         return Agent(
             config=self.agents_config["billing_specialist"],
-            tools=[billing_system_db, invoice_generator],
+            tools=[billing_system_db, bill_customer],
             verbose=True
         )
 
@@ -3,7 +3,7 @@ from typing import List
 from crewai import Agent, Crew, Process, Task
 from crewai.agents.agent_builder.base_agent import BaseAgent
 from crewai.project import CrewBase, agent, crew, task
-from coordinator_dispatcher.tools.tools import diagnostic_tool, knowledge_base
+from coordinator_dispatcher.tools.tools import troubleshoot_issue
 
 @CrewBase
 class TechSupportCrew:
@@ -20,7 +20,7 @@ class TechSupportCrew:
         return Agent(
             config=self.agents_config["tech_support_specialist"],
             verbose=True,
-            tools=[diagnostic_tool, knowledge_base]
+            tools=[troubleshoot_issue]
 
         )
 
@@ -1,14 +1,53 @@
 #!/usr/bin/env python
+import os
 import sys
 import json
+import time
+import uuid
+from functools import lru_cache
 from pydantic import BaseModel, Field
 from typing import Optional
 from crewai.flow.flow import Flow, listen, start, router
-from crewai import LLM
+from crewai.flow.persistence import persist
+from crewai import LLM, Crew
+from crewai.types.streaming import StreamChunkType
+from patterns_common.intents.cache import IntentCache
+from patterns_common.intents.classifier import IntentClassifier
+from patterns_common.tracing import Tracer
+from patterns_common.tracing.crewai_events import SpanEventListener
 
+from coordinator_dispatcher.runtime import Pool, reset_crew
+from coordinator_dispatcher.sessions import SessionPersistence
 from coordinator_dispatcher.crews.billing_crew.billing_crew import BillingCrew
 from coordinator_dispatcher.crews.tech_support_crew.tech_support_crew import TechSupportCrew
 
+# Every flow method, crew, task, agent, tool and LLM call is recorded as a span (see patterns_common.tracing)
+tracing_listener = SpanEventListener(Tracer("crewai", "coordinator-dispatcher"))
+
+# Print the crews' replies token by token as they arrive (set STREAM_TOKENS=0 to wait for the full reply)
+STREAM_TOKENS = os.getenv("STREAM_TOKENS", "1") != "0"
+
+
+def streaming(crew: Crew) -> Crew:
+    """Has the crew's agents stream their LLM replies when STREAM_TOKENS is on."""
+    if STREAM_TOKENS:
+        for agent in crew.agents:
+            if agent.llm is not None:
+                agent.llm.stream = True
+    return crew
+
+# Greetings and clear-cut billing/technical messages are routed by a local
+# classifier (see patterns_common.intents.classifier); only the rest go to the coordinator LLM.
+intent_classifier = IntentClassifier.from_file()
+
+# The LLM's classifications of the remaining messages are cached by
+# normalized text, so repeated questions skip the call (see patterns_common.intents.cache).
+intent_cache = IntentCache()
+
+# The flow state of each conversation is kept between messages, keyed by
+# session ID, with idle sessions evicted (see sessions.py).
+sessions = SessionPersistence()
+
 # Schema
 class IntentResult(BaseModel):
     intent: str = Field(..., description="The classification: 'billing', 'technical', or 'general'.")
@@ -23,8 +62,22 @@ class SupportState(BaseModel):
     final_result: str = ""
     
 
+def carry_over(result: IntentResult, previous: Optional[IntentResult]) -> IntentResult:
+    """Fills the customer name and amount missing from `result` with those of the previous message."""
+    if previous is None:
+        return result
+    return result.model_copy(update={
+        "customer_name": result.customer_name or previous.customer_name,
+        "amount_invoice": result.amount_invoice or previous.amount_invoice,
+    })
+
+
 # Flow
+@persist(sessions)
 class CoordinatorFlow(Flow[SupportState]):
+    # kickoff() returns a stream of the LLM tokens generated during the flow
+    stream = STREAM_TOKENS
+
     @start()
     def route_intent(self):
         """
@@ -32,35 +85,48 @@ class CoordinatorFlow(Flow[SupportState]):
         """
         print(f"🔍 Analyzing request: {self.state.user_query}")
 
-        # agent coordinator
-        llm = LLM(
-            model="gpt-4o-mini",
-            response_format=IntentResult
-        )
-
-        response = llm.call(
-            messages=[
-                {
-                    "role": "system", 
-                    "content": "You are a Support Coordinator. Output ONLY JSON."
-                },
-                {
-                    "role": "user", 
-                    "content": f"""
-                    Analyze this request: '{self.state.user_query}'
+        # Name and amount given earlier in the conversation
+        previous = self.state.intent_result
+
+        prediction = intent_classifier.route(self.state.user_query)
+        if prediction is not None:
+            print(f"⚡ Classified locally ({prediction.source}, confidence {prediction.confidence:.2f})")
+            self.state.intent_result = carry_over(IntentResult(intent=prediction.intent, reply=prediction.reply), previous)
+            if prediction.intent == "general":
+                self.state.final_result = prediction.reply
+            print(f"🚦 Routing to: {prediction.intent}")
+            return prediction.intent
+
+        cached = intent_cache.get(self.state.user_query)
+        if cached is not None:
+            print("📦 Intent from cache")
+            response = IntentResult(**cached)
+        else:
+            response = coordinator_llm().call(
+                messages=[
+                    {
+                        "role": "system", 
+                        "content": "You are a Support Coordinator. Output ONLY JSON."
+                    },
+                    {
+                        "role": "user", 
+                        "content": f"""
+                        Analyze this request: '{self.state.user_query}'
                     
-                    Classify into ONE category:
-                    - 'billing' (invoices, payments, money)
-                    - 'technical' (bugs, errors, system failure)
-                    - 'general' (greetings, others)
+                        Classify into ONE category:
+                        - 'billing' (invoices, payments, money)
+                        - 'technical' (bugs, errors, system failure)
+                        - 'general' (greetings, others)
                     
-                    Extract 'customer_name' and 'amount_invoice' if present.
-                    """
-                }
-            ]
-        )
+                        Extract 'customer_name' and 'amount_invoice' if present.
+                        """
+                    }
+                ]
+            )
+            if isinstance(response, IntentResult):
+                intent_cache.put(self.state.user_query, response.model_dump())
         
-        self.state.intent_result = response
+        self.state.intent_result = carry_over(response, previous)
         
         if self.state.intent_result.intent == "general":
             self.state.final_result = self.state.intent_result.reply
@@ -96,7 +162,8 @@ class CoordinatorFlow(Flow[SupportState]):
             "amount_invoice": self.state.intent_result.amount_invoice
         }
        
-        result = BillingCrew().crew().kickoff(inputs=inputs) 
+        with billing_crews.lease() as crew:
+            result = crew.kickoff(inputs=inputs)
         
         self.state.final_result = result.raw
     
@@ -106,7 +173,8 @@ class CoordinatorFlow(Flow[SupportState]):
         Run the tech support crew
         """
         print("🛠️ Activating Tech Crew")
-        result = TechSupportCrew().crew().kickoff(inputs={"query": self.state.user_query})
+        with tech_support_crews.lease() as crew:
+            result = crew.kickoff(inputs={"query": self.state.user_query})
         self.state.final_result = result.raw
 
 
@@ -119,6 +187,41 @@ class CoordinatorFlow(Flow[SupportState]):
         if not self.state.final_result:
             self.state.final_result = "How can I help you today?"
 
+# Runtime: the coordinator LLM client, the crews and the flows are built once
+# per process and reused by every message (see runtime.py), so a request only
+# pays for its model calls.
+@lru_cache(maxsize=None)
+def coordinator_llm() -> LLM:
+    """The coordinator's LLM client, shared so its HTTP connections are reused."""
+    return LLM(model="gpt-4o-mini", response_format=IntentResult)
+
+
+billing_crews = Pool(lambda: streaming(BillingCrew().crew()), reset=reset_crew)
+tech_support_crews = Pool(lambda: streaming(TechSupportCrew().crew()), reset=reset_crew)
+flows = Pool(CoordinatorFlow)
+
+
+def warm() -> float:
+    """Builds the LLM client, crews and flows ahead of the first message; returns the seconds it took."""
+    started = time.perf_counter()
+    coordinator_llm()
+    for pool in (billing_crews, tech_support_crews, flows):
+        pool.warm()
+    return time.perf_counter() - started
+
+
+def run_flow(flow: CoordinatorFlow, query: str, session_id: str):
+    """
+    Kicks off a pooled flow for a new message of conversation `session_id`:
+    the state saved by its previous message is restored, and every other
+    field left by the flow's previous run is reset.
+    """
+    restored = sessions.load_state(session_id) or {}
+    restored.pop("id", None)
+    flow.state.id = session_id
+    return flow.kickoff(inputs={**SupportState().model_dump(), **restored, "user_query": query, "final_result": ""})
+
+
 def plot():
     """Generate a visualization of the flow """
     flow = CoordinatorFlow()
@@ -127,13 +230,17 @@ def plot():
 
 def kickoff():
     """ Run the flow """
+    print(f"🔥 Runtime warmed up in {warm():.2f}s")
     print("🤖 Coordinator Dispatcher System Initialized")
     print("Type 'exit', 'quit' or 'sair' to stop.")
+    session_id = uuid.uuid4().hex
     
     while True:
         try:
             query = input("\n👤 Enter your request: ")
             if query.lower() in ['exit', 'quit', 'sair']:
+                print(f"🚦 {intent_classifier.report()}")
+                print(f"📦 Intent cache: {intent_cache.stats()}")
                 print("� Exiting...")
                 break
                 
@@ -141,9 +248,20 @@ def kickoff():
                 continue
                 
             print(f"🚀 Processing: '{query}'")
-            flow = CoordinatorFlow()
-            flow.kickoff(inputs={"user_query": query})
-            print(f"🏁 Final Result: {flow.state.final_result}")
+            with flows.lease() as flow:
+                started = time.perf_counter()
+                output = run_flow(flow, query, session_id)
+                if STREAM_TOKENS:
+                    first_token = None
+                    for chunk in output:
+                        if chunk.chunk_type != StreamChunkType.TEXT:
+                            continue
+                        if first_token is None:
+                            first_token = time.perf_counter() - started
+                        print(chunk.content, end="", flush=True)
+                    if first_token is not None:
+                        print(f"\n⏱️ First token after {first_token * 1000:.0f} ms")
+                print(f"🏁 Final Result: {flow.state.final_result}")
             
         except KeyboardInterrupt:
             print("\n👋 Exiting...")
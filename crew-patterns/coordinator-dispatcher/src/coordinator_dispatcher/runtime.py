@@ -0,0 +1,92 @@
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Callable, Generic, Iterator, Optional, TypeVar
+
+from crewai import Crew
+
+T = TypeVar("T")
+
+DEFAULT_POOL_SIZE = 4
+
+
+def reset_crew(crew: Crew) -> Crew:
+    """
+    Clears what a kickoff leaves on a crew, so the next request starts clean:
+    task outputs, usage metrics, and the conversation and iteration count of
+    each agent's executor, which CrewAI reuses across kickoffs (left as is,
+    every request would resend the previous ones and count against
+    `max_iter`). Task descriptions are re-interpolated by every kickoff.
+    """
+    for task in crew.tasks:
+        task.output = None
+    for agent in crew.agents:
+        executor = getattr(agent, "agent_executor", None)
+        if executor is not None:
+            executor.messages.clear()
+            executor.iterations = 0
+    crew.usage_metrics = None
+    return crew
+
+
+class Pool(Generic[T]):
+    """
+    Ready-built instances of a crew, flow or client, leased to one request at
+    a time and returned afterwards, so they are built once per process rather
+    than once per message.
+
+    Instances are built on demand up to `size`, or ahead of time by `warm()`.
+    When all are leased, `lease()` waits for one to be returned. `reset` runs
+    on every instance as it is returned.
+    """
+
+    def __init__(self, factory: Callable[[], T], size: Optional[int] = None,
+                 reset: Optional[Callable[[T], object]] = None):
+        self.factory = factory
+        self.size = size or int(os.getenv("COORDINATOR_POOL_SIZE", DEFAULT_POOL_SIZE))
+        self.reset = reset
+        self.created = 0
+        self.leases = 0
+        self.waits = 0
+        self._idle: "queue.LifoQueue[T]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+
+    def _build(self) -> Optional[T]:
+        with self._lock:
+            if self.created >= self.size:
+                return None
+            self.created += 1
+        try:
+            return self.factory()
+        except BaseException:
+            with self._lock:
+                self.created -= 1
+            raise
+
+    def warm(self) -> "Pool[T]":
+        """Builds the instances not built yet, so no request pays for it."""
+        while (instance := self._build()) is not None:
+            self._idle.put(instance)
+        return self
+
+    @contextmanager
+    def lease(self) -> Iterator[T]:
+        """An idle instance for the duration of the block."""
+        try:
+            instance = self._idle.get_nowait()
+        except queue.Empty:
+            instance = self._build()
+            if instance is None:
+                self.waits += 1
+                instance = self._idle.get()
+        self.leases += 1
+        try:
+            yield instance
+        finally:
+            if self.reset is not None:
+                self.reset(instance)
+            self._idle.put(instance)
+
+    def stats(self) -> dict:
+        return {"size": self.size, "created": self.created, "leases": self.leases, "waits": self.waits}
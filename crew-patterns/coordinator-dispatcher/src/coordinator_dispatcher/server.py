@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+"""
+Serves the coordinator flow to many conversations at once over HTTP, and load
+tests it:
+
+    uv run service serve [--concurrency 16] [--stub-llm]
+    uv run service load --sessions 200 --messages 5
+"""
+import asyncio
+import os
+import time
+from typing import Any, Dict
+
+from crewai.llms.base_llm import BaseLLM
+from patterns_common.chat_server import Handler, command_line, run_load_test, run_server
+
+
+class StubLLM(BaseLLM):
+    """
+    Offline stand-in for the coordinator and crew models, for load tests
+    without an API key. Waits `latency` seconds per call, like a remote model
+    would; the coordinator gets a general intent, the agents a final answer.
+    """
+
+    def __init__(self, latency: float = 0.2, **kwargs):
+        super().__init__(model="stub", **kwargs)
+        self.latency = latency
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, from_task=None,
+             from_agent=None, response_model=None, **kwargs):
+        time.sleep(self.latency)
+        if from_agent is not None:
+            return "Thought: I now know the final answer\nFinal Answer: [stub reply]"
+        from coordinator_dispatcher.main import IntentResult
+        return IntentResult(intent="general", reply="[stub reply]")
+
+    def supports_function_calling(self) -> bool:
+        return False
+
+
+def use_stub_llm(latency: float) -> None:
+    """Swaps every model of the coordinator for a StubLLM, before the runtime is warmed up."""
+    from coordinator_dispatcher import main
+
+    llm = StubLLM(latency)
+    main.coordinator_llm = lambda: llm
+    for pool in (main.billing_crews, main.tech_support_crews):
+        def factory(build=pool.factory):
+            crew = build()
+            for agent in crew.agents:
+                agent.llm = llm
+            return crew
+        pool.factory = factory
+
+
+def coordinator_handler() -> Handler:
+    """
+    Runs each message through a pooled CoordinatorFlow, restoring the state
+    of its session (see sessions.py). The flow's methods and crews are
+    synchronous, so each kickoff runs in a worker thread instead of blocking
+    the event loop.
+    """
+    from coordinator_dispatcher import main
+
+    def run(session_id: str, message: str) -> Dict[str, Any]:
+        with main.flows.lease() as flow:
+            main.run_flow(flow, message, session_id)
+            intent = flow.state.intent_result.intent if flow.state.intent_result else "general"
+            return {"reply": flow.state.final_result, "intent": intent}
+
+    async def handle(session_id: str, message: str) -> Dict[str, Any]:
+        return await asyncio.to_thread(run, session_id, message)
+
+    return handle
+
+
+def main():
+    args = command_line("Serve the coordinator-dispatcher to many conversations at once.", default_concurrency=16,
+                        concurrency_help="Messages processed at once (one pooled flow and thread each)",
+                        stub_help="Use an offline stub LLM with this latency instead of the real models")
+    if args.command == "load":
+        run_load_test(args)
+        return
+
+    if args.stub_llm is not None:
+        os.environ.setdefault("OPENAI_API_KEY", "sk-stub")
+    from coordinator_dispatcher import main as coordinator
+
+    # Replies are returned whole, so the flows do not stream; every worker
+    # gets its own flow and crews.
+    coordinator.CoordinatorFlow.stream = False
+    for pool in (coordinator.billing_crews, coordinator.tech_support_crews, coordinator.flows):
+        pool.size = max(pool.size, args.concurrency)
+    if args.stub_llm is not None:
+        use_stub_llm(args.stub_llm)
+    print(f"🔥 Runtime warmed up in {coordinator.warm():.2f}s")
+
+    run_server(coordinator_handler(), args, extra_stats=lambda: {
+        "sessions": coordinator.sessions.store.stats(), "intent_cache": coordinator.intent_cache.stats(),
+        "pools": {"flows": coordinator.flows.stats(), "billing_crews": coordinator.billing_crews.stats(),
+                  "tech_support_crews": coordinator.tech_support_crews.stats()},
+    }, on_stop=lambda: print(f"🚦 {coordinator.intent_classifier.report()}"))
+
+
+if __name__ == "__main__":
+    main()
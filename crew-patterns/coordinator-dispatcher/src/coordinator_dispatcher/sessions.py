@@ -0,0 +1,60 @@
+import json
+import sys
+import tracemalloc
+from typing import Any, Dict, Optional, Union
+
+from crewai.flow.persistence.base import FlowPersistence
+from patterns_common.sessions import SessionStore
+from pydantic import BaseModel
+
+
+class SessionPersistence(FlowPersistence):
+    """
+    CrewAI flow state persistence on a SessionStore, with the flow state ID
+    as session ID. Only the latest state of a flow is kept, as compact JSON
+    without the fields left empty.
+    """
+
+    def __init__(self, store: Optional[SessionStore] = None):
+        self.store = store or SessionStore()
+
+    def init_db(self) -> None:
+        pass
+
+    def save_state(self, flow_uuid: str, method_name: str, state_data: Union[Dict[str, Any], BaseModel]) -> None:
+        if isinstance(state_data, BaseModel):
+            state = state_data.model_dump(exclude_none=True, exclude={"id"})
+        else:
+            state = {k: v for k, v in state_data.items() if k != "id" and v is not None}
+        self.store.put(flow_uuid, json.dumps(state, separators=(",", ":"), default=str).encode("utf-8"))
+
+    def load_state(self, flow_uuid: str) -> Optional[Dict[str, Any]]:
+        record = self.store.get(flow_uuid)
+        return {**json.loads(record), "id": flow_uuid} if record is not None else None
+
+
+def measure(sessions: int = 100000) -> None:
+    """Memory held per idle session: a mid-conversation flow state saved for each of `sessions` flows."""
+    from coordinator_dispatcher.main import IntentResult, SupportState
+
+    persistence = SessionPersistence(SessionStore(max_sessions=sessions))
+    state = SupportState(
+        user_query="Quero uma fatura para Ana de 100 reais",
+        intent_result=IntentResult(intent="billing", customer_name="Ana", amount_invoice=100.0),
+        final_result="Invoice #10001 generated for Ana: $100.00. Billing record found, status: active.",
+    )
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for number in range(sessions):
+        persistence.save_state(f"session-{number}", "run_billing_crew", state)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    stats = persistence.store.stats()
+    print(f"{sessions} idle sessions: {used / sessions:.0f} bytes each in memory "
+          f"({stats['record_bytes'] / sessions:.0f} bytes of record)")
+
+
+if __name__ == "__main__":
+    measure(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
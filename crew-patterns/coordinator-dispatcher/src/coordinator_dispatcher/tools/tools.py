@@ -1,5 +1,8 @@
 from crewai.tools import tool
 
+from patterns_common.concurrent_tools import run_tools, slowest
+from patterns_common.knowledge_index import default_index
+
 @tool("Billing System DB")
 def billing_system_db(query: str) -> str:
     """
@@ -39,7 +42,11 @@ def knowledge_base(query: str) -> str:
     Returns:
         Relevant knowledge base articles.
     """
-    return f"Mock Knowledge Base Result for '{query}': Article 1, Article 2."
+    hits = default_index().search(query)
+    if not hits:
+        return f"Knowledge Base: no articles found for '{query}'."
+    return f"Knowledge Base Results for '{query}':\n" + "\n".join(
+        f"{rank}. {hit.title} ({hit.path}): {hit.snippet}" for rank, hit in enumerate(hits, start=1))
 
 @tool("Invoice Generator")
 def invoice_generator(customer_name: str, amount: float) -> str:
@@ -54,3 +61,45 @@ def invoice_generator(customer_name: str, amount: float) -> str:
         Confirmation message with the new invoice ID.
     """
     return f"Mock Invoice Generator: Created Invoice #10001 for {customer_name} with amount ${amount}."
+
+
+def _report(results) -> str:
+    critical = slowest(results)
+    print(f"⏱️ {critical.name} set the latency: {critical.seconds * 1000:.0f} ms")
+    return "\n".join(result.output for result in results.values())
+
+
+@tool("Troubleshoot Issue")
+def troubleshoot_issue(issue: str) -> str:
+    """
+    Runs system diagnostics and searches the knowledge base for an issue, at the same time.
+
+    Args:
+        issue: Description of the technical issue.
+
+    Returns:
+        Diagnostic report and relevant knowledge base articles.
+    """
+    return _report(run_tools({
+        "diagnostic_tool": lambda: diagnostic_tool.run(issue=issue),
+        "knowledge_base": lambda: knowledge_base.run(query=issue),
+    }))
+
+
+@tool("Bill Customer")
+def bill_customer(query: str, customer_name: str, amount: float) -> str:
+    """
+    Looks up the customer's billing record and generates a new invoice, at the same time.
+
+    Args:
+        query: The billing request.
+        customer_name: Name of the customer.
+        amount: The amount to be billed.
+
+    Returns:
+        Billing information and confirmation with the new invoice ID.
+    """
+    return _report(run_tools({
+        "billing_system_db": lambda: billing_system_db.run(query=query),
+        "invoice_generator": lambda: invoice_generator.run(customer_name=customer_name, amount=amount),
+    }))
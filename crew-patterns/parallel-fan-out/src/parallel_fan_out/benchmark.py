@@ -0,0 +1,459 @@
+#!/usr/bin/env python
+import ast
+import io
+import json
+import multiprocessing
+import os
+import platform
+import random
+import re
+import resource
+import sys
+import time
+import tokenize
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+from patterns_common.code_review.analysis import AnalysisContext
+from patterns_common.code_review.review import performance_findings, security_findings
+from patterns_common.code_review.security_rules import RuleEngine, SecurityRule, default_engine
+from patterns_common.code_review.style import iter_style_issues
+
+RULE_COUNTS = [8, 50, 100, 250, 500]
+# Scan time with the most rules may be at most this multiple of the time with the fewest.
+DEFAULT_MAX_RULE_SCALING = 1.5
+RULE_SCALING_RUNS = 7
+
+DEFAULT_SIZES = "1KB,100KB,1MB,10MB,50MB"
+# Timings are recorded relative to a fixed calibration loop, so a baseline
+# recorded on one machine compares on another; the reference one is committed.
+DEFAULT_BASELINE = Path(__file__).resolve().with_name("benchmark_baseline.json")
+DEFAULT_TOLERANCE = 0.25
+
+# Stdlib-only work of the same kind as the tools (parse, walk, tokenize,
+# regex), so that it scales with the machine but not with this code base.
+CALIBRATION_MODULE = "".join(
+    f"def handler_{n}(request):\n"
+    f"    value = request.get('field_{n}')\n"
+    f"    for item in range(len(request)):\n"
+    f"        total = item * {n}\n"
+    f"    return f'processed {{value}} {{total}}'\n\n\n"
+    for n in range(200)
+)
+CALIBRATION_RUNS = 7
+
+# Corpora are split into modules of about this size, the way a repository
+# review feeds the tools one file at a time.
+MODULE_BYTES = 256 * 1024
+
+# Per-rule timings run on a corpus of this size.
+RULE_CORPUS_BYTES = 1024 * 1024
+SHARED_WALK = "(shared AST walk)"
+REPEAT_SECONDS = 1.0
+
+# Differences below these floors are noise, not regressions. A rule must
+# also slow down by more than `tolerance` of the shared AST walk.
+MIN_MEMORY_DELTA_MB = 8.0
+MIN_RULE_DELTA_MS = 2.0
+
+_UNITS = {"KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3, "B": 1}
+
+_SAFE_STATEMENTS = [
+    "{pad}value_{n} = request.get('field_{n}')",
+    "{pad}total_{n} = len(request) * {n}",
+    "{pad}message = f'processed {{value_{n}}} items'",
+    "{pad}items_{n} = [item for item in request if item]",
+]
+_VULNERABLE_STATEMENTS = [
+    "{pad}os.system('echo ' + value_{n})",
+    "{pad}query = \"SELECT * FROM t WHERE id = %s\" % value_{n}",
+    "{pad}result_{n} = eval(value_{n})",
+    "{pad}data_{n} = pickle.loads(value_{n})",
+    "{pad}digest_{n} = hashlib.md5(value_{n}).hexdigest()",
+    "{pad}page = '<script>' + value_{n} + '</script>'",
+]
+
+
+def _synthetic_rules(count: int, rng: random.Random):
+    """Generates `count` extra rules with random identifiers, split across the three kinds."""
+    rules = []
+    for i in range(count):
+        word = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz_") for _ in range(rng.randint(5, 12)))
+        kind = ("text", "call", "string_format")[i % 3]
+        rules.append(SecurityRule(
+            id=f"synthetic-{i}",
+            kind=kind,
+            severity="LOW",
+            message=f"Synthetic rule {i}",
+            callees=(f"{word}.run",) if kind == "call" else (),
+            keywords=(word,) if kind != "call" else (),
+            ignore_case=bool(i % 2),
+        ))
+    return rules
+
+
+def _synthetic_code(lines: int, rng: random.Random) -> str:
+    """Generates valid Python made of small handler functions."""
+    body = [
+        "    value_{n} = request.get('field_{n}')",
+        "    for item in range(len(request)):\n        total_{n} = item * {n}",
+        "    query = \"SELECT * FROM t WHERE id = %s\" % value_{n}",
+        "    os.system('echo ' + value_{n})",
+        "    message = f'processed {{value_{n}}} items'",
+    ]
+    out = []
+    n = 0
+    while len(out) < lines:
+        out.append(f"def handler_{n}(request):")
+        out.extend(line.format(n=n) for line in rng.sample(body, rng.randint(2, len(body))))
+        out.append("    return request")
+        out.append("")
+        n += 1
+    return "\n".join(out)
+
+
+def rule_scaling():
+    """
+    Shows that security scan time stays flat as the rule count grows.
+
+    Scans the same synthetic corpus with the default rule pack plus an
+    increasing number of generated rules and reports the time per scan. The
+    engines take turns, so that a slow spell of the machine does not land on
+    one rule count, and each keeps its fastest run. Exits with an error when
+    the largest rule set scans more than BENCHMARK_MAX_RULE_SCALING (default
+    1.5) times slower than the smallest.
+    """
+    max_scaling = float(os.getenv("BENCHMARK_MAX_RULE_SCALING", DEFAULT_MAX_RULE_SCALING))
+    rng = random.Random(42)
+    code = _synthetic_code(20_000, rng)
+    ctx = AnalysisContext(code)
+    ctx.tree, ctx.line_offsets, ctx.call_names  # parse once, outside the timed region
+
+    base_rules = default_engine().rules
+    engines = [RuleEngine(base_rules + _synthetic_rules(count - len(base_rules), rng)) for count in RULE_COUNTS]
+    runs = [[] for _ in engines]
+    for _ in range(RULE_SCALING_RUNS):
+        for engine, times in zip(engines, runs):
+            start = time.perf_counter()
+            engine.scan(ctx)
+            times.append(time.perf_counter() - start)
+
+    print(f"Corpus: {len(code) / 1024:.0f} KB, {len(ctx.lines)} lines")
+    print(f"{'rules':>8} {'scan (ms)':>12} {'vs smallest':>12}")
+    baseline = min(runs[0]) * 1000
+    for engine, times in zip(engines, runs):
+        elapsed = min(times) * 1000
+        print(f"{len(engine.rules):>8} {elapsed:>12.1f} {elapsed / baseline:>11.2f}x")
+
+    scaling = min(runs[-1]) * 1000 / baseline
+    if scaling > max_scaling:
+        print(f"\n❌ Scan time grew {scaling:.2f}x from {len(engines[0].rules)} to {len(engines[-1].rules)} rules "
+              f"(bound {max_scaling:.2f}x).")
+        sys.exit(1)
+    print(f"\n✅ Scan time grew {scaling:.2f}x from {len(engines[0].rules)} to {len(engines[-1].rules)} rules "
+          f"(bound {max_scaling:.2f}x).")
+
+
+def _parse_size(text: str) -> int:
+    text = text.strip().upper()
+    for unit in ("KB", "MB", "GB", "B"):
+        if text.endswith(unit):
+            return int(float(text[:-len(unit)]) * _UNITS[unit])
+    return int(text)
+
+
+def _format_size(size: int) -> str:
+    for unit in ("GB", "MB", "KB"):
+        if size >= _UNITS[unit] and size % _UNITS[unit] == 0:
+            return f"{size // _UNITS[unit]}{unit}"
+    return f"{size}B"
+
+
+def _synthetic_function(n: int, nesting: int, vuln_density: float, rng: random.Random) -> str:
+    """A handler whose body sits `nesting` loops deep; each statement is vulnerable with probability `vuln_density`."""
+    lines = [f"def handler_{n}(request):", f"    value_{n} = request.get('field_{n}')"]
+    for depth in range(nesting):
+        lines.append(f"{'    ' * (depth + 1)}for i{depth} in range(len(request)):")
+    pad = "    " * (nesting + 1)
+    for _ in range(4):
+        pool = _VULNERABLE_STATEMENTS if rng.random() < vuln_density else _SAFE_STATEMENTS
+        lines.append(rng.choice(pool).format(pad=pad, n=n))
+    lines.append(f"    return value_{n}")
+    return "\n".join(lines) + "\n\n\n"
+
+
+def synthetic_corpus(size: int, nesting: int = 2, vuln_density: float = 0.1, seed: int = 42) -> Iterator[str]:
+    """
+    Generates valid Python modules totalling about `size` bytes.
+
+    Args:
+        size: Total corpus size in bytes.
+        nesting: Loop nesting depth inside every generated function.
+        vuln_density: Fraction of statements that trigger a security rule.
+        seed: Random seed, so the same settings always produce the same corpus.
+
+    Yields:
+        Module sources of at most MODULE_BYTES each.
+    """
+    rng = random.Random(seed)
+    header = "import hashlib\nimport os\nimport pickle\n\n\n"
+    remaining = size
+    n = 0
+    while remaining > 0:
+        budget = min(remaining, MODULE_BYTES)
+        parts = [header]
+        written = len(header)
+        while written < budget:
+            function = _synthetic_function(n, nesting, vuln_density, rng)
+            parts.append(function)
+            written += len(function)
+            n += 1
+        remaining -= written
+        yield "".join(parts)
+
+
+def _run_security(code: str) -> int:
+    return len(security_findings(AnalysisContext(code)))
+
+
+def _run_style(code: str) -> int:
+    return sum(1 for _ in iter_style_issues(io.StringIO(code)))
+
+
+def _run_performance(code: str) -> int:
+    return len(performance_findings(AnalysisContext(code)))
+
+
+# Each tool gets a fresh AnalysisContext, so parsing is part of its cost.
+TOOLS = {
+    "code_security_scanner": _run_security,
+    "style_checker": _run_style,
+    "complexity_analyzer": _run_performance,
+}
+
+
+def _max_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 ** 2) if sys.platform == "darwin" else rss / 1024
+
+
+def _measure(tool: str, size: int, nesting: int, vuln_density: float) -> Dict[str, float]:
+    """Runs one tool over one corpus. Executed in a fresh process so peak RSS is its own."""
+    run = TOOLS[tool]
+    rss_before = _max_rss_mb()
+    total_bytes = 0
+    elapsed = 0.0
+    findings = 0
+    for code in synthetic_corpus(size, nesting, vuln_density):
+        # Small corpora are timed repeatedly for up to REPEAT_SECONDS and the
+        # fastest run is kept, which filters out scheduler noise.
+        runs = []
+        while not runs or (size <= RULE_CORPUS_BYTES and len(runs) < 50 and sum(runs) < REPEAT_SECONDS):
+            start = time.perf_counter()
+            findings_in_module = run(code)
+            runs.append(time.perf_counter() - start)
+        elapsed += min(runs)
+        findings += findings_in_module
+        total_bytes += len(code.encode("utf-8"))
+    return {
+        "mb_per_s": round(total_bytes / (1024 ** 2) / elapsed, 3),
+        "peak_mb": round(max(_max_rss_mb() - rss_before, 0.0), 1),
+        "findings": findings,
+    }
+
+
+def _relative(metrics: Dict[str, float], calibration: float) -> Dict[str, float]:
+    """Adds `cost`: seconds per MB in calibration loops, the machine-independent form of `mb_per_s`."""
+    return {"cost": round(1 / metrics["mb_per_s"] / calibration, 2), **metrics}
+
+
+def _calibration_loop() -> int:
+    tree = ast.parse(CALIBRATION_MODULE)
+    nodes = sum(1 for _ in ast.walk(tree))
+    tokens = sum(1 for _ in tokenize.generate_tokens(io.StringIO(CALIBRATION_MODULE).readline))
+    return nodes + tokens + len(re.findall(r"\bvalue\b", CALIBRATION_MODULE))
+
+
+def calibration_seconds() -> float:
+    """Fastest time of the calibration loop on this machine: the unit of the recorded timings."""
+    runs = []
+    for _ in range(CALIBRATION_RUNS):
+        start = time.perf_counter()
+        _calibration_loop()
+        runs.append(time.perf_counter() - start)
+    return min(runs)
+
+
+def _scan_ms(engine: RuleEngine, contexts: List[AnalysisContext]) -> float:
+    runs = []
+    for _ in range(5):
+        start = time.perf_counter()
+        for ctx in contexts:
+            engine.scan(ctx)
+        runs.append(time.perf_counter() - start)
+    return min(runs) * 1000
+
+
+def rule_timings(nesting: int, vuln_density: float) -> Dict[str, float]:
+    """
+    Milliseconds each default security rule adds over a 1 MB corpus.
+
+    Parsing is excluded. The AST walk every scan performs is reported once
+    as SHARED_WALK, and each rule's time is what it costs on top of that.
+    """
+    contexts = [AnalysisContext(code) for code in synthetic_corpus(RULE_CORPUS_BYTES, nesting, vuln_density)]
+    for ctx in contexts:
+        ctx.tree, ctx.line_offsets, ctx.call_names
+
+    shared = _scan_ms(RuleEngine([]), contexts)
+    timings = {SHARED_WALK: round(shared, 2)}
+    for rule in default_engine().rules:
+        timings[rule.id] = round(max(_scan_ms(RuleEngine([rule]), contexts) - shared, 0.0), 2)
+    return timings
+
+
+def host_fingerprint() -> Dict[str, Any]:
+    """The machine and interpreter a baseline was recorded on, for reference."""
+    return {
+        "node": platform.node(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "python": f"{platform.python_implementation()} {platform.python_version()}",
+    }
+
+
+def compare_to_baseline(results: dict, baseline: dict, tolerance: float) -> Tuple[List[str], int]:
+    """
+    Lists every metric that is worse than the baseline by more than `tolerance`.
+
+    Tool cost and rule time are compared in calibration units, so the
+    baseline may come from another machine. They and peak memory may grow
+    by at most the tolerance before counting as a regression; changes below
+    a small absolute floor are ignored. Metrics missing from either side are
+    not compared.
+
+    Returns:
+        The regressions and the number of metrics compared.
+    """
+    regressions = []
+    compared = 0
+    for tool, sizes in results["tools"].items():
+        for size, current in sizes.items():
+            previous = baseline.get("tools", {}).get(tool, {}).get(size)
+            if previous is None:
+                continue
+            compared += 1
+            if current["cost"] > previous["cost"] * (1 + tolerance):
+                regressions.append(
+                    f"{tool} @ {size}: {current['cost']:.1f} calibration loops per MB, baseline {previous['cost']:.1f}"
+                )
+            if current["peak_mb"] > previous["peak_mb"] * (1 + tolerance) \
+                    and current["peak_mb"] - previous["peak_mb"] > MIN_MEMORY_DELTA_MB:
+                regressions.append(
+                    f"{tool} @ {size}: peak memory {current['peak_mb']:.1f} MB, baseline {previous['peak_mb']:.1f} MB"
+                )
+
+    min_delta = MIN_RULE_DELTA_MS / 1000 / results["calibration_seconds"]
+    rule_floor = max(min_delta, tolerance * baseline.get("rules", {}).get(SHARED_WALK, 0.0))
+    for rule, elapsed in results["rules"].items():
+        previous = baseline.get("rules", {}).get(rule)
+        if previous is None:
+            continue
+        compared += 1
+        if elapsed > previous * (1 + tolerance) and elapsed - previous > rule_floor:
+            regressions.append(f"rule {rule}: {elapsed:.2f} calibration loops, baseline {previous:.2f}")
+    return regressions, compared
+
+
+def tool_benchmark():
+    """
+    Benchmarks the three analysis tools offline, without any LLM.
+
+    Generates synthetic corpora, runs every tool over each of them in a fresh
+    process and reports throughput, peak memory and per-rule timing. Times
+    are also recorded in units of a fixed calibration loop timed on the same
+    machine, and those are compared against the committed baseline: the run
+    exits with an error on any regression. Without --strict, a missing
+    baseline is recorded instead and one taken with other corpus settings is
+    skipped; with it (or when CI is set), both fail the run.
+
+    Usage:
+        benchmark_tools                     # compare against the baseline
+        benchmark_tools --strict            # ... and fail when there is nothing to compare against
+        benchmark_tools --update-baseline   # record a new baseline
+
+    Environment:
+        BENCHMARK_SIZES: Comma-separated corpus sizes (default 1KB,100KB,1MB,10MB,50MB).
+        BENCHMARK_NESTING: Loop nesting depth of the generated code (default 2).
+        BENCHMARK_VULN_DENSITY: Fraction of vulnerable statements (default 0.1).
+        BENCHMARK_TOLERANCE: Allowed slowdown before failing (default 0.25).
+        BENCHMARK_BASELINE: Baseline file (default benchmark_baseline.json next to this module).
+        CI: When set, runs as with --strict.
+    """
+    sizes = [_parse_size(size) for size in os.getenv("BENCHMARK_SIZES", DEFAULT_SIZES).split(",") if size.strip()]
+    nesting = int(os.getenv("BENCHMARK_NESTING", 2))
+    vuln_density = float(os.getenv("BENCHMARK_VULN_DENSITY", 0.1))
+    tolerance = float(os.getenv("BENCHMARK_TOLERANCE", DEFAULT_TOLERANCE))
+    baseline_path = Path(os.getenv("BENCHMARK_BASELINE") or DEFAULT_BASELINE)
+    update = "--update-baseline" in sys.argv[1:]
+    strict = "--strict" in sys.argv[1:] or bool(os.getenv("CI"))
+
+    calibration = calibration_seconds()
+    settings = {"nesting": nesting, "vuln_density": vuln_density}
+    results = {"settings": settings, "host": host_fingerprint(), "calibration_seconds": calibration,
+               "tools": {}, "rules": {}}
+    spawn = multiprocessing.get_context("spawn")
+
+    print(f"Corpus settings: nesting={nesting}, vuln_density={vuln_density}")
+    print(f"Calibration loop: {calibration * 1000:.2f} ms; cost is seconds per MB in calibration loops")
+    print(f"{'tool':<24} {'size':>6} {'MB/s':>9} {'cost':>9} {'peak MB':>9} {'findings':>9}")
+    for tool in TOOLS:
+        results["tools"][tool] = {}
+        for size in sizes:
+            with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as pool:
+                metrics = _relative(pool.submit(_measure, tool, size, nesting, vuln_density).result(), calibration)
+            results["tools"][tool][_format_size(size)] = metrics
+            print(f"{tool:<24} {_format_size(size):>6} {metrics['mb_per_s']:>9.2f} {metrics['cost']:>9.1f} "
+                  f"{metrics['peak_mb']:>9.1f} {metrics['findings']:>9}")
+
+    rule_ms = rule_timings(nesting, vuln_density)
+    results["rules"] = {rule: round(elapsed / 1000 / calibration, 3) for rule, elapsed in rule_ms.items()}
+    print(f"\nPer-rule security scan time over {_format_size(RULE_CORPUS_BYTES)} (parse excluded):")
+    for rule, elapsed in sorted(rule_ms.items(), key=lambda item: -item[1]):
+        print(f"  {rule:<28} {elapsed:>8.2f} ms {results['rules'][rule]:>8.2f} loops")
+
+    if update or (not strict and not baseline_path.exists()):
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+        print(f"\nBaseline written to {baseline_path}")
+        return
+
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8")) if baseline_path.exists() else None
+    if baseline is None or "calibration_seconds" not in baseline:
+        problem = "does not exist" if baseline is None else "has no calibrated timings"
+        print(f"\nBaseline {baseline_path} {problem}. Run with --update-baseline to record one.")
+        sys.exit(1 if strict else 0)
+    if baseline.get("settings") != settings:
+        print(f"\nBaseline was recorded with {baseline.get('settings')}; not comparing.")
+        sys.exit(1 if strict else 0)
+    if baseline.get("host") != results["host"]:
+        print(f"\nBaseline was recorded on {baseline.get('host')}; comparing calibrated timings.")
+
+    regressions, compared = compare_to_baseline(results, baseline, tolerance)
+    if not compared:
+        print(f"\nNo metric of this run is in {baseline_path}; nothing compared.")
+        sys.exit(1 if strict else 0)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) against {baseline_path} (tolerance {tolerance:.0%}):")
+        for regression in regressions:
+            print(f"  - {regression}")
+        sys.exit(1)
+    print(f"\n✅ No regressions in {compared} metrics against {baseline_path} (tolerance {tolerance:.0%}).")
+
+
+if __name__ == "__main__":
+    if "--rules" in sys.argv[1:]:
+        rule_scaling()
+    else:
+        tool_benchmark()
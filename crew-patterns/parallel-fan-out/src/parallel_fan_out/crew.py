@@ -1,9 +1,14 @@
 from crewai import Agent, Crew, Process, Task
 from crewai.project import CrewBase, agent, crew, task
 from crewai.agents.agent_builder.base_agent import BaseAgent
-from typing import List
+from typing import FrozenSet, List
+from patterns_common.tracing import Tracer
+from patterns_common.tracing.crewai_events import SpanEventListener
 from .tools.tools import code_security_scanner, style_checker, complexity_analyzer
 
+# Every crew, task, agent, tool and LLM call is recorded as a span (see patterns_common.tracing)
+tracing_listener = SpanEventListener(Tracer("crewai", "parallel-fan-out"))
+
 
 @CrewBase
 class ParallelFanOut():
@@ -12,13 +17,30 @@ class ParallelFanOut():
     agents: List[BaseAgent]
     tasks: List[Task]
 
+    # Reviewer tasks whose branch was settled by the deterministic pre-pass.
+    skip_tasks: FrozenSet[str] = frozenset()
+
+    def __init__(self, repository_mode: bool = False):
+        # In repository mode `code_input` is a findings digest rather than code:
+        # the reviewers get tasks written for findings and no code tools. Set
+        # here because CrewBase builds the agents and tasks right after.
+        self.repository_mode = repository_mode
+
+    def _code_tools(self, *tools) -> list:
+        return [] if self.repository_mode else list(tools)
+
+    def _review_config(self, name: str) -> dict:
+        if self.repository_mode:
+            name = name.replace("_task", "_repository_task")
+        return self.tasks_config[name]
+
     
     @agent
     def security_auditor(self) -> Agent:
         return Agent(
             config=self.agents_config['security_auditor'],
             verbose=True,
-            tools=[code_security_scanner]
+            tools=self._code_tools(code_security_scanner)
         )
 
     @agent
@@ -26,7 +48,7 @@ class ParallelFanOut():
         return Agent(
             config=self.agents_config['style_enforcer'],
             verbose=True,
-            tools=[style_checker]
+            tools=self._code_tools(style_checker)
         )
 
     @agent
@@ -34,7 +56,7 @@ class ParallelFanOut():
         return Agent(
             config=self.agents_config['performance_analyst'],
             verbose=True,
-            tools=[complexity_analyzer]
+            tools=self._code_tools(complexity_analyzer)
         )
 
     @agent
@@ -48,19 +70,19 @@ class ParallelFanOut():
     @task
     def security_audit_task(self) -> Task:
         return Task(
-            config=self.tasks_config['security_audit_task'],
+            config=self._review_config('security_audit_task'),
         )
 
     @task
     def style_check_task(self) -> Task:
         return Task(
-            config=self.tasks_config['style_check_task'],
+            config=self._review_config('style_check_task'),
         )
 
     @task
     def performance_analysis_task(self) -> Task:
         return Task(
-            config=self.tasks_config['performance_analysis_task'],
+            config=self._review_config('performance_analysis_task'),
         )
 
     @task
@@ -74,9 +96,14 @@ class ParallelFanOut():
     def crew(self) -> Crew:
         """Creates the ParallelFanOut crew with sequential process and context-based synthesis"""
 
+        tasks = [t for t in self.tasks if t.name not in self.skip_tasks]
+        for t in tasks:
+            if isinstance(t.context, list):
+                t.context = [context for context in t.context if context in tasks]
+
         return Crew(
             agents=self.agents,
-            tasks=self.tasks,
+            tasks=tasks,
             process=Process.sequential,
             verbose=True,
         )
@@ -0,0 +1,52 @@
+import json
+from dataclasses import asdict
+from typing import List, Tuple
+
+from patterns_common.code_review.analysis import AnalysisContext
+from patterns_common.cache import cache_key
+from patterns_common.code_review.cache import ReviewCache
+from patterns_common.code_review.findings import Finding, rank_key
+from patterns_common.code_review.regions import ChangedRegion
+from patterns_common.code_review.review import performance_findings, security_findings, style_findings
+
+# Bump when the deterministic tools change so stale tool findings are not reused.
+TOOLS_VERSION = "1"
+
+
+def region_findings(region: ChangedRegion, cache: ReviewCache) -> List[Finding]:
+    """
+    Deterministic tool findings for one region, reused from the cache when the
+    region's body is unchanged.
+    """
+    key = cache_key("tools", TOOLS_VERSION, region.source)
+    cached = cache.get(key)
+    if cached is not None:
+        findings = [Finding(**item) for item in json.loads(cached)]
+    else:
+        ctx = AnalysisContext(region.source)
+        findings = security_findings(ctx) + style_findings(ctx) + performance_findings(ctx)
+        cache.put(key, json.dumps([asdict(finding) for finding in findings]))
+    return [finding.at(f"{region.path}:{region.name}") for finding in findings]
+
+
+def incremental_input(regions: List[ChangedRegion], cache: ReviewCache) -> Tuple[str, List[Finding]]:
+    """
+    Builds the `code_input` for an incremental review: only the changed
+    regions, each followed by its (possibly cached) tool findings.
+
+    Returns:
+        The review input and the tool findings of all regions.
+    """
+    sections = [
+        f"Incremental review of {len(regions)} changed function(s). "
+        "Only the code below changed; line numbers are relative to each snippet.\n"
+    ]
+    all_findings = []
+    for region in regions:
+        findings = sorted(region_findings(region, cache), key=rank_key)
+        all_findings.extend(findings)
+        section = f"{region.heading}\n```python\n{region.source}\n```\n"
+        if findings:
+            section += "Tool findings:\n" + "".join(f"- [{f.severity}] {f.text}\n" for f in findings)
+        sections.append(section)
+    return "\n".join(sections), all_findings
@@ -2,12 +2,38 @@
 import sys
 import warnings
 from datetime import datetime
+from pathlib import Path
+
+from patterns_common.cache import cache_key
+from patterns_common.code_review.cache import ReviewCache
+from patterns_common.code_review.regions import ChangedRegion, diff_regions
 
 from parallel_fan_out.crew import ParallelFanOut
+from parallel_fan_out.incremental import TOOLS_VERSION, incremental_input
+from parallel_fan_out.prepass import PrePassResult, prepass_findings, prepass_snippet
+from parallel_fan_out.repository import collect_files, findings_digest, review_files
 
 warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
 
 
+def review_crew(prepass: PrePassResult, repository: bool = False):
+    """
+    Builds the crew without the reviewer tasks the pre-pass already settled.
+
+    With `repository`, the reviewers get the findings-digest variant of their
+    tasks and no code tools (see repository_review).
+    """
+    review = ParallelFanOut(repository_mode=repository)
+    review.skip_tasks = prepass.skip_tasks
+    if prepass.skip_tasks:
+        print(f"⏭️ Deterministic pre-pass: skipping {', '.join(sorted(prepass.skip_tasks))}")
+    return review.crew()
+
+
+def review_inputs(code_input: str, prepass: PrePassResult) -> dict:
+    return {"code_input": code_input, "prepass_reports": prepass.summary_input()}
+
+
 def run():
     """
     Run the crew.
@@ -27,14 +53,106 @@ def process_user_input(user_input):
     return result
 """
 
-    inputs = {"code_input": sample_code}
+    prepass = prepass_snippet(sample_code)
 
     try:
-        ParallelFanOut().crew().kickoff(inputs=inputs)
+        review_crew(prepass).kickoff(inputs=review_inputs(sample_code, prepass))
     except Exception as e:
         raise Exception(f"An error occurred while running the crew: {e}")
 
 
+def repository_review(targets, max_workers=None):
+    """
+    Prepares a repository-scale review.
+
+    The deterministic tools run over every file in a process pool and only the
+    aggregated, ranked findings are handed to the LLM reviewers.
+
+    Returns:
+        The findings digest to use as `code_input` and the pre-pass result.
+    """
+    files = collect_files(targets)
+    if not files:
+        raise Exception(f"No Python files found in: {', '.join(map(str, targets))}")
+
+    findings = review_files(files, max_workers=max_workers)
+    return findings_digest(findings, len(files)), prepass_findings(findings)
+
+
+def run_repository():
+    """
+    Run the crew over a directory or a list of files.
+    """
+    if len(sys.argv) < 2:
+        raise Exception("No paths provided. Please provide one or more directories or files as arguments.")
+
+    code_input, prepass = repository_review(sys.argv[1:])
+
+    try:
+        review_crew(prepass, repository=True).kickoff(inputs=review_inputs(code_input, prepass))
+    except Exception as e:
+        raise Exception(f"An error occurred while running the crew: {e}")
+
+
+def review_region(region: ChangedRegion, cache: ReviewCache) -> str:
+    """
+    Reviews one changed function with its own crew run.
+
+    Each task's output is cached by the function body plus the task
+    instruction, so an unchanged function is not sent to the LLM again
+    whatever else changed in the diff, even if it moved.
+    """
+    code_input, findings = incremental_input([region], cache)
+    prepass = prepass_findings(findings)
+    crew = review_crew(prepass)
+    keys = [cache_key("llm", TOOLS_VERSION, region.source, task.description) for task in crew.tasks]
+    cached = [cache.get(key) for key in keys]
+
+    if all(output is not None for output in cached):
+        print(f"♻️ Reusing cached review of {region.path}: {region.name}")
+        return cached[-1]
+
+    try:
+        output = crew.kickoff(inputs=review_inputs(code_input, prepass))
+    except Exception as e:
+        raise Exception(f"An error occurred while running the crew: {e}")
+    for key, task_output in zip(keys, output.tasks_output):
+        cache.put(key, task_output.raw)
+    return output.raw
+
+
+def run_incremental():
+    """
+    Review only the functions changed by a unified diff.
+
+    Usage: run_incremental <diff_file | -> [repo_root]
+
+    Every changed function is reviewed on its own and the reviews are merged
+    under per-function headings. Tool findings and LLM outputs are cached per
+    function body, so re-pushes only send the functions that changed to the
+    LLM.
+    """
+    if len(sys.argv) < 2:
+        raise Exception("No diff provided. Please provide a diff file path or '-' to read from stdin.")
+
+    diff_text = sys.stdin.read() if sys.argv[1] == "-" else Path(sys.argv[1]).read_text(encoding="utf-8")
+    root = sys.argv[2] if len(sys.argv) > 2 else "."
+
+    regions = diff_regions(diff_text, root)
+    if not regions:
+        print("No changed Python functions to review.")
+        return None
+
+    cache = ReviewCache()
+    try:
+        result = "\n\n".join(f"{region.heading}\n{review_region(region, cache)}" for region in regions)
+        print(result)
+        print(f"📦 Review cache: {cache.stats()}")
+    finally:
+        cache.close()
+    return result
+
+
 def train():
     """
     Train the crew for a given number of iterations.
@@ -46,7 +164,7 @@ def fibonacci(n):
     return fibonacci(n-1) + fibonacci(n-2)
 """
     
-    inputs = {"code_input": sample_code}
+    inputs = review_inputs(sample_code, PrePassResult())
     
     try:
         ParallelFanOut().crew().train(n_iterations=int(sys.argv[1]), filename=sys.argv[2], inputs=inputs)
@@ -78,7 +196,7 @@ def bubble_sort(arr):
     return arr
 """
     
-    inputs = {"code_input": sample_code}
+    inputs = review_inputs(sample_code, PrePassResult())
 
     try:
         ParallelFanOut().crew().test(n_iterations=int(sys.argv[1]), eval_llm=sys.argv[2], inputs=inputs)
@@ -100,13 +218,17 @@ def run_with_trigger():
     except json.JSONDecodeError:
         raise Exception("Invalid JSON payload provided as argument")
 
-    inputs = {
-        "crewai_trigger_payload": trigger_payload,
-        "code_input": trigger_payload.get("code_input", "")
-    }
+    repository = bool(trigger_payload.get("paths"))
+    if repository:
+        code_input, prepass = repository_review(trigger_payload["paths"], trigger_payload.get("max_workers"))
+    else:
+        code_input = trigger_payload.get("code_input", "")
+        prepass = prepass_snippet(code_input)
+    inputs = review_inputs(code_input, prepass)
+    inputs["crewai_trigger_payload"] = trigger_payload
 
     try:
-        result = ParallelFanOut().crew().kickoff(inputs=inputs)
+        result = review_crew(prepass, repository=repository).kickoff(inputs=inputs)
         return result
     except Exception as e:
         raise Exception(f"An error occurred while running the crew with trigger: {e}")
@@ -0,0 +1,79 @@
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Iterable
+
+from patterns_common.code_review.analysis import get_context
+from patterns_common.code_review.findings import CATEGORIES, PERFORMANCE, SECURITY, STYLE, Finding
+from patterns_common.code_review.review import (
+    UNPARSABLE,
+    format_performance_report,
+    format_security_report,
+    format_style_report,
+    performance_findings,
+    security_findings,
+    style_findings,
+)
+
+# Reviewer task that each deterministic tool stands in for.
+CATEGORY_TASKS = {
+    SECURITY: "security_audit_task",
+    STYLE: "style_check_task",
+    PERFORMANCE: "performance_analysis_task",
+}
+
+_CLEAN_REPORTS = {
+    SECURITY: format_security_report([]),
+    STYLE: format_style_report([]),
+    PERFORMANCE: format_performance_report([]),
+}
+
+NO_PREPASS_REPORTS = "None - every branch was reviewed by its agent."
+
+
+@dataclass(frozen=True)
+class PrePassResult:
+    """Templated reports for the review branches that need no LLM call."""
+
+    clean_reports: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def skip_tasks(self) -> FrozenSet[str]:
+        """Reviewer tasks to leave out of the crew."""
+        return frozenset(CATEGORY_TASKS[category] for category in self.clean_reports)
+
+    def summary_input(self) -> str:
+        """Text passed to pr_summary_task as `prepass_reports`."""
+        if not self.clean_reports:
+            return NO_PREPASS_REPORTS
+        return "\n\n".join(
+            f"{self.clean_reports[category]} (deterministic pre-pass, LLM review skipped)"
+            for category in CATEGORIES if category in self.clean_reports
+        )
+
+
+def prepass_findings(findings: Iterable[Finding]) -> PrePassResult:
+    """
+    Decides which branches are clean from already computed findings.
+
+    A branch is clean when its tool reported nothing and the code parsed,
+    since the tools are only high-confidence on valid Python.
+    """
+    findings = list(findings)
+    if any(finding.text == UNPARSABLE for finding in findings):
+        return PrePassResult()
+    dirty = {finding.category for finding in findings}
+    return PrePassResult({category: _CLEAN_REPORTS[category] for category in CATEGORIES if category not in dirty})
+
+
+def prepass_snippet(code: str) -> PrePassResult:
+    """
+    Runs the three deterministic tools over a snippet before any LLM call.
+
+    Args:
+        code: The code under review.
+
+    Returns:
+        The branches whose tool came back clean.
+    """
+    ctx = get_context(code)
+    findings = security_findings(ctx) + style_findings(ctx) + performance_findings(ctx)
+    return prepass_findings(findings)
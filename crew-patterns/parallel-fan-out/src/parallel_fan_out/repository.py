@@ -0,0 +1,116 @@
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from patterns_common.code_review.analysis import AnalysisContext
+from patterns_common.code_review.findings import CATEGORIES, STYLE, Finding, rank_key
+from patterns_common.code_review.review import performance_findings, security_findings
+from patterns_common.code_review.security_rules import SEVERITY_ORDER
+from patterns_common.code_review.style import iter_style_issues
+
+SOURCE_SUFFIXES = {".py"}
+SKIPPED_DIRS = {".git", ".venv", "venv", "__pycache__", "node_modules", "build", "dist", ".tox", ".nox"}
+MAX_DIGEST_FINDINGS = 150
+
+
+def collect_files(targets: Iterable[str]) -> List[Path]:
+    """
+    Expands directories and file paths into the Python files to review.
+
+    Args:
+        targets: Directories and/or file paths.
+
+    Returns:
+        Sorted, de-duplicated list of source files.
+    """
+    files = set()
+    for target in targets:
+        path = Path(target)
+        if path.is_dir():
+            for root, dirs, names in os.walk(path):
+                dirs[:] = [d for d in dirs if d not in SKIPPED_DIRS and not d.startswith(".")]
+                files.update(Path(root) / name for name in names if Path(name).suffix in SOURCE_SUFFIXES)
+        elif path.is_file():
+            files.add(path)
+    return sorted(files)
+
+
+def review_file(path: str) -> List[Finding]:
+    """
+    Runs the three deterministic tools over one file.
+
+    Executed inside the worker processes, so it only takes and returns
+    picklable values. The style check tokenizes straight from the open file;
+    only the AST-based checks need the whole source in memory.
+    """
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            style = list(iter_style_issues(f))
+            f.seek(0)
+            code = f.read()
+    except OSError as e:
+        return [Finding(STYLE, "LOW", f"Could not read file: {e}", path=str(path))]
+
+    # One context per file: worker processes do not share the parent's cache
+    # and each file is analysed exactly once.
+    ctx = AnalysisContext(code)
+    findings = security_findings(ctx) + style + performance_findings(ctx)
+    return [finding.at(str(path)) for finding in findings]
+
+
+def review_files(paths: Iterable, max_workers: Optional[int] = None) -> List[Finding]:
+    """
+    Reviews many files at once by sharding them across a process pool.
+
+    Args:
+        paths: Files to review, typically from collect_files().
+        max_workers: Worker processes; defaults to the number of CPU cores.
+
+    Returns:
+        Findings for every file, most severe first.
+    """
+    files = [str(path) for path in paths]
+    if not files:
+        return []
+
+    workers = min(max_workers or os.cpu_count() or 1, len(files))
+    chunksize = max(1, len(files) // (workers * 4))
+    findings = []
+    if workers == 1:
+        for path in files:
+            findings.extend(review_file(path))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for file_findings in pool.map(review_file, files, chunksize=chunksize):
+                findings.extend(file_findings)
+    return sorted(findings, key=rank_key)
+
+
+def findings_digest(findings: List[Finding], file_count: int, limit: int = MAX_DIGEST_FINDINGS) -> str:
+    """
+    Renders ranked findings as the compact input sent to the LLM reviewers.
+
+    Only the `limit` most severe findings are listed; the rest are summarized
+    as counts so the prompt stays within context on large change sets.
+    """
+    severities = Counter(finding.severity for finding in findings)
+    ordered = sorted(severities.items(), key=lambda item: SEVERITY_ORDER.get(item[0], len(SEVERITY_ORDER)))
+    summary = ", ".join(f"{count} {severity}" for severity, count in ordered)
+
+    digest = "Repository review: pre-computed findings from deterministic analysis "
+    digest += f"of {file_count} file(s). Review these findings instead of raw source.\n"
+    digest += f"Totals: {len(findings)} finding(s){' (' + summary + ')' if summary else ''}.\n"
+
+    for category in CATEGORIES:
+        selected = [finding for finding in findings[:limit] if finding.category == category]
+        if not selected:
+            continue
+        digest += f"\n## {category.title()}\n"
+        for finding in selected:
+            digest += f"- [{finding.severity}] {finding.path}: {finding.text}\n"
+
+    if len(findings) > limit:
+        digest += f"\n... {len(findings) - limit} lower-severity finding(s) omitted.\n"
+    return digest
@@ -1,8 +1,13 @@
 from crewai import Agent, Crew, Process, Task
 from crewai.project import CrewBase, agent, crew, task
 from crewai.agents.agent_builder.base_agent import BaseAgent
-from typing import List
-from .tools.tools import pdf_parser, regex_extractor, summary_engine
+from typing import FrozenSet, List
+from patterns_common.tracing import Tracer
+from patterns_common.tracing.crewai_events import SpanEventListener
+from .tools.tools import pdf_parser, pdf_stream_extractor, regex_extractor, summary_engine
+
+# Every crew, task, agent, tool and LLM call is recorded as a span (see patterns_common.tracing)
+tracing_listener = SpanEventListener(Tracer("crewai", "sequential-pipeline"))
 
 
 
@@ -13,6 +18,9 @@ class SequentialPipeline():
     agents: List[BaseAgent]
     tasks: List[Task]
 
+    # Tasks whose output for this file was found in the result cache.
+    skip_tasks: FrozenSet[str] = frozenset()
+
     
     @agent
     def parser_agent(self) -> Agent:
@@ -27,7 +35,7 @@ class SequentialPipeline():
         return Agent(
             config=self.agents_config['extractor_agent'],
             verbose=True,
-            tools=[regex_extractor]
+            tools=[pdf_stream_extractor, regex_extractor]
         )
 
     @agent
@@ -62,9 +70,14 @@ class SequentialPipeline():
     def crew(self) -> Crew:
         """Creates the SequentialPipeline crew"""
 
+        tasks = [t for t in self.tasks if t.name not in self.skip_tasks]
+        for t in tasks:
+            if isinstance(t.context, list):
+                t.context = [context for context in t.context if context in tasks]
+
         return Crew(
             agents=self.agents,
-            tasks=self.tasks,
+            tasks=tasks,
             process=Process.sequential,
             verbose=True,
         )
@@ -4,27 +4,86 @@ import warnings
 from pathlib import Path
 from datetime import datetime
 
+from patterns_common.invoices.cache import file_digest, stage_key
+from patterns_common.invoices.sink import as_record, sink_from_env
+
 from sequential_pipeline.crew import SequentialPipeline
+from sequential_pipeline.tools.tools import EXTRACTOR_VERSION, PARSER_VERSION, result_cache
 
 warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
 
+# Task outputs cached per invoice content, with the version of each output.
+CACHED_TASKS = {"parser_task": PARSER_VERSION, "extractor_task": EXTRACTOR_VERSION}
+NO_CACHED_OUTPUTS = "None - every task ran."
 
+# Extracted records are also written to a columnar sink when INVOICE_SINK is set (see patterns_common.invoices.sink)
+invoice_sink = sink_from_env()
 
-def run():
+
+def cached_task_outputs(file_path: str) -> dict:
     """
-    Run the crew.
+    Outputs of the parse and extract tasks cached for this file's content.
+
+    The summary only needs the extracted data, so when that is cached the
+    parser task is skipped too (its entry is then None).
     """
+    if not Path(file_path).is_file():
+        return {}
+    digest = file_digest(file_path)
+    extracted = result_cache.get(stage_key("extractor_task", EXTRACTOR_VERSION, digest), "extractor_task")
+    if extracted is not None:
+        return {"parser_task": None, "extractor_task": extracted}
+    parsed = result_cache.get(stage_key("parser_task", PARSER_VERSION, digest), "parser_task")
+    return {} if parsed is None else {"parser_task": parsed}
 
-    base_dir = Path(__file__).resolve().parent
-    invoice_path = base_dir / "invoice.pdf"
 
-    inputs = {"file_path": str(invoice_path)}
+def run_invoice(file_path: str):
+    """
+    Runs the pipeline on one invoice, skipping the tasks whose output for the
+    same file content is in the result cache, caches the new outputs and
+    writes the extracted record to the columnar sink, if one is configured.
+    """
+    cached = cached_task_outputs(file_path)
+    pipeline = SequentialPipeline()
+    pipeline.skip_tasks = frozenset(cached)
+    if cached:
+        print(f"♻️ Result cache: skipping {', '.join(sorted(cached))}")
+    extracted = cached.get("extractor_task")
+    inputs = {
+        "file_path": file_path,
+        "cached_outputs": f"extractor_task: {extracted}" if extracted else NO_CACHED_OUTPUTS,
+    }
 
+    crew = pipeline.crew()
     try:
-        SequentialPipeline().crew().kickoff(inputs=inputs)
+        result = crew.kickoff(inputs=inputs)
     except Exception as e:
         raise Exception(f"An error occurred while running the crew: {e}")
 
+    outputs = {task.name: task_output.raw for task, task_output in zip(crew.tasks, result.tasks_output)}
+    if Path(file_path).is_file():
+        digest = file_digest(file_path)
+        for name, output in outputs.items():
+            if name in CACHED_TASKS:
+                result_cache.put(stage_key(name, CACHED_TASKS[name], digest), output)
+
+    record = as_record(extracted or outputs.get("extractor_task"))
+    if invoice_sink is not None and record is not None:
+        invoice_sink.write(record, source=file_path)
+    print(f"📦 Result cache: {result_cache.stats()}")
+    return result
+
+
+def run():
+    """
+    Run the crew.
+    """
+
+    base_dir = Path(__file__).resolve().parent
+    invoice_path = base_dir / "invoice.pdf"
+
+    run_invoice(str(invoice_path))
+
 
 def train():
     """
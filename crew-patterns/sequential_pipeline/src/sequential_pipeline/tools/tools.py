@@ -1,25 +1,124 @@
 from crewai.tools import tool
-import re
+import mmap
 import os
+import re
+from typing import Iterable, Iterator
+
+from pypdf import PdfReader, __version__ as PYPDF_VERSION
+from pypdf.errors import EmptyFileError, PdfReadError
+from patterns_common.invoices.cache import ResultCache, cached_stage
+
+# Upper bound on the text pdf_parser hands to the model. Extraction does not
+# need it: the PDF Stream Extractor streams every page of the file.
+MAX_PARSER_CHARS = int(os.getenv("PDF_PARSER_MAX_CHARS", 20000))
+
+# Versions of the stage outputs, part of the result cache key (see patterns_common.invoices.cache).
+# Bump EXTRACTOR_VERSION whenever FIELDS_PATTERN or the field handling changes.
+PARSER_VERSION = f"2/pypdf-{PYPDF_VERSION}/{MAX_PARSER_CHARS}"
+EXTRACTOR_VERSION = f"1/{PARSER_VERSION}"
+
+# Parse and extract results, cached by file content across runs.
+result_cache = ResultCache()
+
+FIELDS = ("invoice_number", "date", "total")
+
+# All fields in one alternation, so a text is scanned once whatever the
+# number of fields; `match.lastgroup` tells which field matched.
+FIELDS_PATTERN = re.compile(
+    r"Invoice #(?P<invoice_number>\d+)"
+    r"|Date: (?P<date>\d{4}-\d{2}-\d{2})"
+    r"|Total: \$(?P<total>\d+\.\d{2})"
+)
+
+
+def iter_pdf_pages(file_path: str) -> Iterator[str]:
+    """
+    Yields the text of a PDF one page at a time.
+
+    The file is memory-mapped instead of read into memory, and each page is
+    parsed only when the caller asks for it. Parsed objects are released
+    after every page, so memory stays flat on 500-page statements.
+
+    Args:
+        file_path: Path to the PDF file.
+
+    Yields:
+        The extracted text of each page, in order.
+
+    Raises:
+        PdfReadError: The file is empty, corrupt or has no pages.
+    """
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise EmptyFileError("the file is empty")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            reader = PdfReader(mapped)
+            if len(reader.pages) == 0:
+                raise PdfReadError("the PDF has no pages")
+            for page in reader.pages:
+                yield page.extract_text() or ""
+                reader.resolved_objects.clear()
+
 
 @tool("PDF Parser")
+@cached_stage(result_cache, "pdf_parser", PARSER_VERSION)
 def pdf_parser(file_path: str) -> str:
     """
     Parses a PDF file and extracts its text content.
-    
+
+    Pages are streamed and reading stops after MAX_PARSER_CHARS characters,
+    so a long statement is not loaded in full just to be shown to the model.
+
     Args:
         file_path: Path to the PDF file.
-        
+
     Returns:
-        The extracted text from the PDF.
+        The extracted text from the PDF, or an "Error: ..." message when the
+        file is missing, empty, corrupt, has no pages or no extractable text.
     """
-    
     if not os.path.exists(file_path):
         return f"Error: File {file_path} not found."
-    
-    return f"Mock content extracted from {file_path}:\nInvoice #12345\nDate: 2023-10-27\nTotal: $500.00\nItems: Service A, Service B"
 
-@tool("Regex Extractor")
+    parts = []
+    remaining = MAX_PARSER_CHARS
+    try:
+        for number, text in enumerate(iter_pdf_pages(file_path), 1):
+            if len(text) > remaining:
+                parts.append(text[:remaining])
+                parts.append(f"[Truncated at page {number}. Use the PDF Stream Extractor to process the whole file.]")
+                break
+            parts.append(text)
+            remaining -= len(text)
+    except PdfReadError as e:
+        return f"Error: Could not parse {file_path}: {e}"
+    if not any(part.strip() for part in parts):
+        return f"Error: No text could be extracted from {file_path} (is it a scanned image?)"
+    return "\n".join(parts)
+
+
+def _scan(text: str, found: dict) -> bool:
+    """Fills the missing fields of `found` from one text; True once all are set."""
+    for match in FIELDS_PATTERN.finditer(text):
+        name = match.lastgroup
+        if found[name] is None:
+            found[name] = match.group(name)
+            if None not in found.values():
+                return True
+    return False
+
+
+def extract_fields(chunks: Iterable[str]) -> dict:
+    """
+    Runs the field pattern over text chunks (e.g. PDF pages) as they arrive,
+    keeping the first match of each field and stopping once all are found.
+    """
+    found = dict.fromkeys(FIELDS)
+    for chunk in chunks:
+        if _scan(chunk, found):
+            break
+    return found
+
+
 def regex_extractor(text: str) -> dict:
     """
     Extracts structured data (Invoice No, Date, Total) from text using Regex.
@@ -30,19 +129,28 @@ def regex_extractor(text: str) -> dict:
     Returns:
         A dictionary containing the extracted fields.
     """
-    invoice_pattern = r"Invoice #(\d+)"
-    date_pattern = r"Date: (\d{4}-\d{2}-\d{2})"
-    total_pattern = r"Total: \$(\d+\.\d{2})"
-    
-    invoice_match = re.search(invoice_pattern, text)
-    date_match = re.search(date_pattern, text)
-    total_match = re.search(total_pattern, text)
-    
-    return {
-        "invoice_number": invoice_match.group(1) if invoice_match else None,
-        "date": date_match.group(1) if date_match else None,
-        "total": total_match.group(1) if total_match else None
-    }
+    return extract_fields([text])
+
+
+@tool("PDF Stream Extractor")
+@cached_stage(result_cache, "pdf_stream_extractor", EXTRACTOR_VERSION)
+def pdf_stream_extractor(file_path: str) -> dict:
+    """
+    Extracts structured data (Invoice No, Date, Total) directly from a PDF,
+    streaming its pages into the regex extractor without building the full text.
+
+    Args:
+        file_path: Path to the PDF file.
+
+    Returns:
+        A dictionary containing the extracted fields.
+    """
+    if not os.path.exists(file_path):
+        return {"error": f"File {file_path} not found."}
+    try:
+        return extract_fields(iter_pdf_pages(file_path))
+    except PdfReadError as e:
+        return {"error": f"Could not parse {file_path}: {e}"}
 
 @tool("Summary Engine")
 def summary_engine(structured_data: dict) -> str:
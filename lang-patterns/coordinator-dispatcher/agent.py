@@ -1,12 +1,20 @@
 import operator
 import os
-import json
+import uuid
 from dotenv import load_dotenv
 from typing import Annotated, TypedDict, Dict, Any, Optional
 from langchain_core.messages import HumanMessage
+from langchain_core.output_parsers import JsonOutputParser
 from langchain_openai import ChatOpenAI
+from langgraph.config import get_stream_writer
 from langgraph.graph import StateGraph, START, END
+from patterns_common.concurrent_tools import ToolResult, run_tools, slowest
+from patterns_common.intents.cache import IntentCache
+from patterns_common.intents.classifier import IntentClassifier
+from patterns_common.tracing import Tracer
+from patterns_common.tracing.langchain_callbacks import LLMSpanHandler
 
+from session_store import SessionCheckpointer
 from tools import billing_system_db, diagnostic_tool, knowledge_base, invoice_generator
 
 # Setup paths dynamically
@@ -15,6 +23,25 @@ load_dotenv(os.path.join(BASE_DIR, ".env"))
 
 MODEL_NAME = "gpt-4o-mini"
 
+# Print replies token by token as they arrive (set STREAM_TOKENS=0 to wait for the full reply)
+STREAM_TOKENS = os.getenv("STREAM_TOKENS", "1") != "0"
+
+# Every node, tool and LLM call is recorded as a span (see patterns_common.tracing)
+tracer = Tracer("langgraph", "coordinator-dispatcher")
+billing_system_db = tracer.traced("tool")(billing_system_db)
+diagnostic_tool = tracer.traced("tool")(diagnostic_tool)
+knowledge_base = tracer.traced("tool")(knowledge_base)
+invoice_generator = tracer.traced("tool")(invoice_generator)
+
+# Greetings and clear-cut billing/technical messages are routed by a local
+# classifier (see patterns_common.intents.classifier); only the rest go to the coordinator LLM.
+intent_classifier = IntentClassifier.from_file()
+classify_intent = tracer.traced("tool", "intent_classifier")(intent_classifier.route)
+
+# The LLM's classifications of the remaining messages are cached by
+# normalized text, so repeated questions skip the call (see patterns_common.intents.cache).
+intent_cache = IntentCache()
+
 # State
 class SupportState(TypedDict):
     user_query: str
@@ -25,11 +52,23 @@ class SupportState(TypedDict):
 
 # LLM
 #llm = ChatGoogleGenerativeAI(model=MODEL_NAME)
-llm = ChatOpenAI(model=MODEL_NAME)
+llm = ChatOpenAI(model=MODEL_NAME, callbacks=[LLMSpanHandler(tracer)])
 
 # Nodes
 def coordinator_node(state: SupportState):
     """Analyze user intent. Route billing issues to BillingSpecialist and bugs to TechSupportSpecialist."""
+    writer = get_stream_writer()
+
+    prediction = classify_intent(state["user_query"])
+    if prediction is not None:
+        if prediction.reply:
+            writer({"token": prediction.reply})
+        return {
+            "intent": prediction.intent,
+            "customer_name": state.get("customer_name"),
+            "amount_invoice": state.get("amount_invoice"),
+            "final_result": prediction.reply if prediction.intent == "general" else state.get("final_result"),
+        }
     
     prompt = f"""
     You are a Support Coordinator.
@@ -54,11 +93,25 @@ def coordinator_node(state: SupportState):
     User Request: {state['user_query']}
     """
     
-    response = llm.invoke([HumanMessage(content=prompt)])
-    
     try:
-        content = response.content.strip().replace("```json", "").replace("```", "")
-        data = json.loads(content)
+        data = intent_cache.get(state["user_query"])
+        if data is not None:
+            if data.get("intent") == "general" and data.get("reply"):
+                writer({"token": data["reply"]})
+        else:
+            # The JSON is parsed while it streams, so a general reply reaches
+            # the stream writer (see stream_reply) token by token.
+            data, shown = {}, ""
+            for data in (llm | JsonOutputParser()).stream([HumanMessage(content=prompt)]):
+                if not isinstance(data, dict):
+                    continue
+                partial_reply = data.get("reply")
+                if data.get("intent") == "general" and isinstance(partial_reply, str) and len(partial_reply) > len(shown):
+                    writer({"token": partial_reply[len(shown):]})
+                    shown = partial_reply
+            if not isinstance(data, dict) or not data:
+                raise ValueError("no JSON object in the reply")
+            intent_cache.put(state["user_query"], data)
         intent = data.get("intent", "general").lower()
         new_name = data.get("customer_name")
         new_amount = data.get("amount_invoice")
@@ -82,6 +135,22 @@ def coordinator_node(state: SupportState):
         "final_result": reply if intent == "general" else state.get("final_result")
     }
 
+def run_node_tools(calls) -> Dict[str, ToolResult]:
+    """
+    Runs a node's independent tool calls concurrently (see patterns_common.concurrent_tools)
+    and records on the node's span the tool that set its latency.
+    """
+    results = run_tools(calls)
+    critical = slowest(results)
+    span = tracer.current()
+    if span is not None:
+        span.attributes["slowest_tool"] = critical.name
+        span.attributes["slowest_tool_ms"] = round(critical.seconds * 1000, 3)
+        timed_out = [result.name for result in results.values() if result.timed_out]
+        if timed_out:
+            span.attributes["timed_out_tools"] = ",".join(timed_out)
+    return results
+
 def billing_node(state: SupportState):
     """Handle billing inquiries and invoices."""
     query = state["user_query"]
@@ -91,16 +160,20 @@ def billing_node(state: SupportState):
     if not customer_name or not amount_invoice:
         return {"final_result": "Please provide the Customer Name and Invoice Amount so I can proceed."}
     
-    billing_info = billing_system_db(query)
-    invoice = invoice_generator(customer_name, amount_invoice)
-    return {"final_result": f"{billing_info}\n{invoice}"}
+    results = run_node_tools({
+        "billing_system_db": lambda: billing_system_db(query),
+        "invoice_generator": lambda: invoice_generator(customer_name, amount_invoice),
+    })
+    return {"final_result": f"{results['billing_system_db'].output}\n{results['invoice_generator'].output}"}
     
 def technical_node(state: SupportState):
     """Troubleshoot technical issues."""
     issue = state["user_query"]
-    diagnostics = diagnostic_tool(issue)
-    kb = knowledge_base(issue)
-    return {"final_result": f"{diagnostics}\n{kb}"}
+    results = run_node_tools({
+        "diagnostic_tool": lambda: diagnostic_tool(issue),
+        "knowledge_base": lambda: knowledge_base(issue),
+    })
+    return {"final_result": f"{results['diagnostic_tool'].output}\n{results['knowledge_base'].output}"}
 
 def route_intent(state: SupportState):
     """Route based on intent."""
@@ -113,9 +186,9 @@ def route_intent(state: SupportState):
 workflow = StateGraph(SupportState)
 
 # Add nodes
-workflow.add_node("coordinator", coordinator_node)
-workflow.add_node("billing", billing_node)
-workflow.add_node("technical", technical_node)
+workflow.add_node("coordinator", tracer.traced("node", "coordinator")(coordinator_node))
+workflow.add_node("billing", tracer.traced("node", "billing")(billing_node))
+workflow.add_node("technical", tracer.traced("node", "technical")(technical_node))
 
 # Add edges
 workflow.add_edge(START, "coordinator")
@@ -134,42 +207,72 @@ workflow.add_conditional_edges(
 workflow.add_edge("billing", END)
 workflow.add_edge("technical", END)
 
-# Compile
-app = workflow.compile()
+# Compile: the checkpointer keeps each conversation's state between messages,
+# keyed by thread_id, with idle sessions evicted (see session_store.py).
+checkpointer = SessionCheckpointer()
+app = workflow.compile(checkpointer=checkpointer)
 
-# Show workflow
-DIR = "lang-patterns/coordinator-dispatcher"
-graph_image = app.get_graph().draw_mermaid_png()
-workflow_path = os.path.join(BASE_DIR, "workflow.png")
-with open(workflow_path, "wb") as f:
-    f.write(graph_image)
-    print(f"📸 Graph saved as '{workflow_path}'")
 
+def session_config(session_id: str) -> Dict[str, Any]:
+    """Run config that picks up the state of conversation `session_id`."""
+    return {"configurable": {"thread_id": session_id}}
 
 
+def stream_reply(state: Dict[str, Any], config: Dict[str, Any], span) -> Dict[str, Any]:
+    """
+    Runs the graph in streaming mode, printing the reply token by token as
+    the coordinator generates it, and records the time to the first token on
+    `span`. Replies built by the billing and technical nodes print at the end.
+    """
+    result, streamed = state, False
+    for mode, chunk in app.stream(state, config, stream_mode=["custom", "values"]):
+        if mode == "values":
+            result = chunk
+            continue
+        if not streamed:
+            span.mark_first_token()
+            print("🤖 Agent: ", end="", flush=True)
+            streamed = True
+        print(chunk["token"], end="", flush=True)
+    if streamed:
+        print()
+    else:
+        print("🤖 Agent: ", result["final_result"])
+    return result
 
-# Chat Starting ...
-print("\n💬 CHAT INICIADO")
-print("Tente: 'Quero uma fatura', responda o nome, depois mude para 'Minha internet caiu'.")
-print("Digite 'sair' para encerrar.\n")
+def chat():
+    """Single-user chat in the terminal (see server.py to serve many conversations at once)."""
+    # Show workflow
+    graph_image = app.get_graph().draw_mermaid_png()
+    workflow_path = os.path.join(BASE_DIR, "workflow.png")
+    with open(workflow_path, "wb") as f:
+        f.write(graph_image)
+        print(f"📸 Graph saved as '{workflow_path}'")
 
-session_state = {
-        "user_query": "",
-        "intent": "",
-        "customer_name": None,
-        "amount_invoice": None,
-        "final_result": ""
-    }
+    # Chat Starting ...
+    print("\n💬 CHAT INICIADO")
+    print("Tente: 'Quero uma fatura', responda o nome, depois mude para 'Minha internet caiu'.")
+    print("Digite 'sair' para encerrar.\n")
 
-while True:
-    user_input = input("👤 Usuário: ")
-    if user_input.lower() == "sair":
-        break
+    config = session_config(uuid.uuid4().hex)
+
+    while True:
+        user_input = input("👤 Usuário: ")
+        if user_input.lower() == "sair":
+            print(f"🚦 {intent_classifier.report()}")
+            print(f"📦 Intent cache: {intent_cache.stats()}")
+            break
+
+        # The rest of the state (customer name, amount) comes from the checkpointer
+        message = {"user_query": user_input}
+
+        with tracer.span("graph", "workflow", payload=user_input) as span:
+            if STREAM_TOKENS:
+                stream_reply(message, config, span)
+            else:
+                result = app.invoke(message, config)
+                print("🤖 Agent: ", result["final_result"])
 
-    # Update state
-    session_state["user_query"] = user_input
-    
-    result = app.invoke(session_state)
-    session_state = result
 
-    print("🤖 Agent: ", result["final_result"])
\ No newline at end of file
+if __name__ == "__main__":
+    chat()
@@ -0,0 +1,67 @@
+import json
+import os
+import time
+from typing import Any, Dict
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from patterns_common.chat_server import Handler, command_line, run_load_test, run_server
+
+
+class StubChatModel(BaseChatModel):
+    """
+    Offline stand-in for the coordinator model, for load tests without an API
+    key. Waits `latency` seconds per call, like a remote model would, and
+    answers with a general-intent JSON reply.
+    """
+
+    latency: float = 0.2
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.latency)
+        content = json.dumps({"intent": "general", "customer_name": None, "amount_invoice": None,
+                              "reply": "[stub reply]"})
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+
+def coordinator_handler() -> Handler:
+    """
+    Runs each message through the LangGraph coordinator with `app.ainvoke`.
+    The state of each session is kept by the graph's checkpointer, with the
+    session ID as thread ID (see session_store.py).
+    """
+    import agent
+
+    async def handle(session_id: str, message: str) -> Dict[str, Any]:
+        with agent.tracer.span("graph", "workflow", payload=message):
+            result = await agent.app.ainvoke({"user_query": message}, agent.session_config(session_id))
+        return {"reply": result["final_result"], "intent": result["intent"]}
+
+    return handle
+
+
+def main():
+    args = command_line("Serve the coordinator-dispatcher to many conversations at once.", default_concurrency=64)
+    if args.command == "load":
+        run_load_test(args)
+        return
+
+    if args.stub_llm is not None:
+        os.environ.setdefault("OPENAI_API_KEY", "sk-stub")
+    handle = coordinator_handler()
+    import agent
+    if args.stub_llm is not None:
+        agent.llm = StubChatModel(latency=args.stub_llm, callbacks=[agent.LLMSpanHandler(agent.tracer)])
+
+    run_server(handle, args, extra_stats=lambda: {
+        "sessions": agent.checkpointer.store.stats(), "intent_cache": agent.intent_cache.stats(),
+    }, on_stop=lambda: print(f"🚦 {agent.intent_classifier.report()}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import sys
+import tracemalloc
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    empty_checkpoint,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from patterns_common.sessions import SessionStore
+
+
+class SessionCheckpointer(BaseCheckpointSaver):
+    """
+    LangGraph checkpointer on a SessionStore, with the thread ID as session
+    ID. Only the latest checkpoint of a thread is kept, with its pending
+    writes, serialized as a single record: enough to carry a conversation
+    from one message to the next, but not to replay its history.
+    """
+
+    def __init__(self, store: Optional[SessionStore] = None):
+        super().__init__()
+        self.store = store or SessionStore()
+
+    @staticmethod
+    def _session(config: RunnableConfig) -> str:
+        configurable = config["configurable"]
+        namespace = configurable.get("checkpoint_ns", "")
+        return f"{configurable['thread_id']}:{namespace}" if namespace else str(configurable["thread_id"])
+
+    def _load(self, session_id: str) -> Optional[Tuple[Checkpoint, CheckpointMetadata, Optional[str], Dict]]:
+        record = self.store.get(session_id)
+        if record is None:
+            return None
+        kind, _, data = record.partition(b"\0")
+        return self.serde.loads_typed((kind.decode(), data))
+
+    def _save(self, session_id: str, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+              parent_id: Optional[str], writes: Dict) -> None:
+        kind, data = self.serde.dumps_typed((checkpoint, metadata, parent_id, writes))
+        self.store.put(session_id, kind.encode() + b"\0" + data)
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        configurable = config["configurable"]
+        saved = self._load(self._session(config))
+        if saved is None:
+            return None
+        checkpoint, metadata, parent_id, writes = saved
+        checkpoint_id = get_checkpoint_id(config)
+        if checkpoint_id and checkpoint_id != checkpoint["id"]:
+            return None
+        location = {"thread_id": configurable["thread_id"], "checkpoint_ns": configurable.get("checkpoint_ns", "")}
+        return CheckpointTuple(
+            config={"configurable": {**location, "checkpoint_id": checkpoint["id"]}},
+            checkpoint=checkpoint,
+            metadata=metadata,
+            parent_config={"configurable": {**location, "checkpoint_id": parent_id}} if parent_id else None,
+            pending_writes=[tuple(write) for write in writes.values()],
+        )
+
+    def list(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None,
+             before: Optional[RunnableConfig] = None, limit: Optional[int] = None) -> Iterator[CheckpointTuple]:
+        if config is None or limit == 0:
+            return
+        latest = self.get_tuple(config)
+        if latest is None or (before and get_checkpoint_id(before) <= latest.checkpoint["id"]):
+            return
+        if filter and any(latest.metadata.get(k) != v for k, v in filter.items()):
+            return
+        yield latest
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+            new_versions: ChannelVersions) -> RunnableConfig:
+        # Writes pending on the previous checkpoint are superseded by this one.
+        self._save(self._session(config), checkpoint, get_checkpoint_metadata(config, metadata),
+                   config["configurable"].get("checkpoint_id"), {})
+        return {"configurable": {
+            "thread_id": config["configurable"]["thread_id"],
+            "checkpoint_ns": config["configurable"].get("checkpoint_ns", ""),
+            "checkpoint_id": checkpoint["id"],
+        }}
+
+    def put_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str,
+                   task_path: str = "") -> None:
+        session_id = self._session(config)
+        saved = self._load(session_id)
+        if saved is None or saved[0]["id"] != config["configurable"]["checkpoint_id"]:
+            return
+        checkpoint, metadata, parent_id, pending = saved
+        for index, (channel, value) in enumerate(writes):
+            index = WRITES_IDX_MAP.get(channel, index)
+            key = f"{task_id}:{index}"
+            # Special writes (errors, interrupts) are replaced, regular ones kept once
+            if index >= 0 and key in pending:
+                continue
+            pending[key] = (task_id, channel, value)
+        self._save(session_id, checkpoint, metadata, parent_id, pending)
+
+    def delete_thread(self, thread_id: str) -> None:
+        self.store.delete(str(thread_id))
+
+    # The store is in memory (or a local SQLite file), so the async API runs
+    # the same calls directly.
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return self.get_tuple(config)
+
+    async def alist(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None,
+                    before: Optional[RunnableConfig] = None,
+                    limit: Optional[int] = None) -> AsyncIterator[CheckpointTuple]:
+        for item in self.list(config, filter=filter, before=before, limit=limit):
+            yield item
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                   new_versions: ChannelVersions) -> RunnableConfig:
+        return self.put(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str,
+                          task_path: str = "") -> None:
+        self.put_writes(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        self.delete_thread(thread_id)
+
+
+def measure(sessions: int = 100000) -> None:
+    """Memory held per idle session: a mid-conversation checkpoint saved for each of `sessions` threads."""
+    checkpointer = SessionCheckpointer(SessionStore(max_sessions=sessions))
+    checkpoint = empty_checkpoint()
+    checkpoint["channel_values"] = {
+        "user_query": "Quero uma fatura para Ana de 100 reais", "intent": "billing",
+        "customer_name": "Ana", "amount_invoice": 100.0,
+        "final_result": "Billing Record: Found. Status: Active.\nInvoice generated for Ana: $100.0",
+    }
+    checkpoint["channel_versions"] = {name: 3 for name in checkpoint["channel_values"]}
+    checkpoint["versions_seen"] = {"coordinator": {"branch:to:coordinator": 2}, "billing": {"branch:to:billing": 3}}
+    metadata = {"source": "loop", "step": 2, "parents": {}}
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for number in range(sessions):
+        checkpointer.put({"configurable": {"thread_id": f"session-{number}", "checkpoint_ns": ""}},
+                         checkpoint, metadata, {})
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    stats = checkpointer.store.stats()
+    print(f"{sessions} idle sessions: {used / sessions:.0f} bytes each in memory "
+          f"({stats['record_bytes'] / sessions:.0f} bytes of record)")
+
+
+if __name__ == "__main__":
+    measure(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
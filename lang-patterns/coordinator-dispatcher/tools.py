@@ -1,3 +1,4 @@
+from patterns_common.knowledge_index import default_index
 
 
 def billing_system_db(query: str) -> str:
@@ -36,7 +37,11 @@ def knowledge_base(query: str) -> str:
     Returns:
         Relevant knowledge base articles.
     """
-    return f"Mock Knowledge Base Result for '{query}': Article 1, Article 2."
+    hits = default_index().search(query)
+    if not hits:
+        return f"Knowledge Base: no articles found for '{query}'."
+    return f"Knowledge Base Results for '{query}':\n" + "\n".join(
+        f"{rank}. {hit.title} ({hit.path}): {hit.snippet}" for rank, hit in enumerate(hits, start=1))
 
 def invoice_generator(customer_name: str, amount: float) -> str:
     """
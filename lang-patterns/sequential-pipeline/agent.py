@@ -1,84 +1,104 @@
-import operator
+import atexit
+import os
 from dotenv import load_dotenv
-from typing import Annotated, TypedDict, Dict, Any
-from langchain_core.messages import HumanMessage
+from typing import Dict, Any, Callable, Optional
 from langchain_google_genai import ChatGoogleGenerativeAI
-from langgraph.graph import StateGraph, START, END
+from langchain_openai import ChatOpenAI
+from patterns_common.tracing import Tracer
+from patterns_common.invoices.cache import ResultCache
+from patterns_common.invoices.sink import sink_from_env
+from patterns_common.tracing.langchain_callbacks import LLMSpanHandler
 
 
-from tools import pdf_parser, regex_extractor, summary_engine
+from checkpoint import BatchedSqliteSaver
+from pipeline import PipelineStats, build_pipeline, is_finished, resume_inputs, thread_config
 
 load_dotenv()
 MODEL_NAME = "gpt-4o-mini"
 
-# State
-class SequentialState(TypedDict):
-    file_path: str
-    raw_text: str
-    structured_data: Dict[str, Any]
-    final_summary: str
+# Print LLM replies token by token as they arrive (set STREAM_TOKENS=0 to wait for the full reply)
+STREAM_TOKENS = os.getenv("STREAM_TOKENS", "1") != "0"
+
+# Parse and extract results are cached by file content (see patterns_common.invoices.cache)
+result_cache = ResultCache()
+
+# Every node, tool and LLM call is recorded as a span (see patterns_common.tracing)
+tracer = Tracer("langgraph", "sequential-pipeline")
 
 # LLM
-llm = ChatOpenAI(model=MODEL_NAME)
-#llm = ChatGoogleGenerativeAI(model=MODEL_NAME)
-
-# Nodes
-def parser_node(state: SequentialState):
-    """Step 1: Parse the PDF using the existing tool."""
-    file_path = state["file_path"]
-    text = pdf_parser(file_path)
-    return {"raw_text": text}
-
-def extractor_node(state: SequentialState):
-    """Step 2: Extract structured data using the existing tool."""
-    text = state["raw_text"]
-    data = regex_extractor(text)
-    return {"structured_data": data}
-
-def summarizer_node(state: SequentialState):
-    """Step 3: Summarize using the existing tool."""
-    data = state["structured_data"]
-    summary = summary_engine(data)
-
-    prompt = f"""Create a professional summary of this invoice data.
-    
-    Invoice Data: {data}
+llm = ChatOpenAI(model=MODEL_NAME, callbacks=[LLMSpanHandler(tracer)])
+#llm = ChatGoogleGenerativeAI(model=MODEL_NAME, callbacks=[LLMSpanHandler(tracer)])
+
+# Extracted records are also written to a columnar sink when INVOICE_SINK is set (see patterns_common.invoices.sink)
+invoice_sink = sink_from_env()
+
+# Per-node time and fast-path vs LLM fallback counts of the summarizer
+pipeline_stats = PipelineStats()
+
+# The graph (nodes and edges are in pipeline.py, shared with batch.py). The
+# state of each document is checkpointed after every node in a local SQLite
+# file, committed in batches (see checkpoint.py), so a rerun resumes where it
+# stopped. The file is opened on the first run, not at import.
+checkpointer = BatchedSqliteSaver()
+atexit.register(checkpointer.flush)
+app = build_pipeline(llm, checkpointer=checkpointer, cache=result_cache, tracer=tracer,
+                     invoice_sink=invoice_sink, stats=pipeline_stats)
+
+
+def run_document(file_path: str, on_token: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
     """
+    Runs the pipeline for one PDF under its own checkpoint thread. A document
+    whose earlier run stopped part way resumes after its last completed node,
+    and a finished one is returned from its checkpoint.
 
-    reponse = llm.invoke([HumanMessage(content=prompt)])
-    return {"final_summary": reponse.content}
-
-# Graph
-workflow = StateGraph(SequentialState)
-
-# Add nodes
-workflow.add_node("parser", parser_node)
-workflow.add_node("extractor", extractor_node)
-workflow.add_node("summarizer", summarizer_node)
-
-# Add edges
-workflow.add_edge(START, "parser",)
-workflow.add_edge("parser", "extractor")
-workflow.add_edge("extractor", "summarizer")
-workflow.add_edge("summarizer", END)
-
-# Compile
-app = workflow.compile()
-
-# Show workflow
-DIR = "lang-patterns/sequential-pipeline"
-graph_image = app.get_graph().draw_mermaid_png()
-with open(f"{DIR}/workflow.png", "wb") as f:
-    f.write(graph_image)
-print("📸 Graph saved as 'workflow.png'")
-
-
-# Invoke
-result = app.invoke({"file_path": f"{DIR}/invoice.pdf"})
-print("🚀 Running Pipeline...")
-print("\nStage 1: Parser")
-print(result["raw_text"])
-print("\nStage 2: Extractor")
-print(result["structured_data"])
-print("\nStage 3: Summarizer")
-print(result["final_summary"])
+    With `on_token`, the graph is streamed and every token of an LLM summary
+    is passed to it as it arrives, instead of waiting for the whole reply.
+    """
+    config = thread_config(file_path)
+    snapshot = app.get_state(config)
+    if is_finished(snapshot):
+        return snapshot.values
+    inputs = resume_inputs(snapshot, file_path)
+    if on_token is None:
+        return app.invoke(inputs, config)
+
+    result = snapshot.values
+    for mode, chunk in app.stream(inputs, config, stream_mode=["messages", "values"]):
+        if mode == "values":
+            result = chunk
+            continue
+        message, metadata = chunk
+        if metadata.get("langgraph_node") == "summarizer" and message.content:
+            on_token(message.content)
+    return result
+
+if __name__ == "__main__":
+    # Show workflow
+    DIR = "lang-patterns/sequential-pipeline"
+    graph_image = app.get_graph().draw_mermaid_png()
+    with open(f"{DIR}/workflow.png", "wb") as f:
+        f.write(graph_image)
+    print("📸 Graph saved as 'workflow.png'")
+
+
+    # Invoke (see batch.py for whole directories of invoices). With
+    # STREAM_TOKENS=1 an LLM summary is printed token by token as it arrives.
+    print("🚀 Running Pipeline...")
+    with tracer.span("graph", "workflow") as span:
+        def print_token(token: str) -> None:
+            span.mark_first_token()
+            print(token, end="", flush=True)
+
+        result = run_document(f"{DIR}/invoice.pdf", on_token=print_token if STREAM_TOKENS else None)
+    if "ttft_ms" in span.attributes:
+        print(f"\n⏱️ First token after {span.attributes['ttft_ms']:.0f} ms")
+    print("\nStage 1: Parser")
+    print(result["raw_text"])
+    if result.get("error"):
+        raise SystemExit(result["error"])
+    print("\nStage 2: Extractor")
+    print(result["structured_data"])
+    print("\nStage 3: Summarizer")
+    print(result["final_summary"])
+    print(f"\n📦 Result cache: {result_cache.stats()}")
+    print(f"📝 {pipeline_stats.summaries.report()}")
@@ -0,0 +1,330 @@
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+from dotenv import load_dotenv
+from langchain_core.messages import AIMessage
+from patterns_common.invoices.cache import ResultCache
+from patterns_common.invoices.sink import DEFAULT_SINK_PATH, PARTITIONS, SINKS, sink_from_env
+
+from checkpoint import DEFAULT_CHECKPOINT_PATH, BatchedSqliteSaver, connect
+from pipeline import (
+    STAGES, PipelineStats, build_nodes, compile_pipeline, is_finished, next_stage, resume_inputs, thread_config,
+)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+load_dotenv(os.path.join(BASE_DIR, ".env"))
+
+MODEL_NAME = "gpt-4o-mini"
+
+# Marks the end of a stage's input.
+DONE = object()
+
+# Fields of a result written to --output (raw_text is left out).
+OUTPUT_FIELDS = ("file_path", "structured_data", "final_summary", "error")
+
+
+@dataclass
+class BatchStats(PipelineStats):
+    """End-to-end throughput and the time each stage spent working."""
+
+    invoices: int = 0
+    errors: int = 0
+    resumed: int = 0
+    elapsed: float = 0.0
+    latencies: List[float] = field(default_factory=list)
+
+    @property
+    def throughput(self) -> float:
+        return self.invoices / self.elapsed if self.elapsed else 0.0
+
+    def report(self) -> str:
+        lines = [
+            f"Invoices: {self.invoices} ({self.errors} errors, {self.resumed} resumed from checkpoints) "
+            f"in {self.elapsed:.2f}s",
+            f"Throughput: {self.throughput:.1f} invoices/s",
+            self.summaries.report(),
+        ]
+        if self.latencies:
+            ordered = sorted(self.latencies)
+            p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+            lines.append(f"Latency per invoice: p50 {statistics.median(ordered) * 1000:.0f} ms, p95 {p95 * 1000:.0f} ms")
+        lines.append("Stage busy time (summed over workers):")
+        lines.extend(f"  {stage:<11} {seconds:>8.2f}s" for stage, seconds in self.stage_seconds.items())
+        return "\n".join(lines)
+
+
+class StubLLM:
+    """
+    Offline stand-in for the chat model, for load tests without an API key.
+    Waits `latency` seconds per call, like a remote model would, and returns
+    a canned summary.
+    """
+
+    def __init__(self, latency: float = 0.2):
+        self.latency = latency
+
+    async def ainvoke(self, messages):
+        await asyncio.sleep(self.latency)
+        prompt = messages[-1].content
+        return AIMessage(
+            content=f"[stub summary of a {len(prompt)}-character prompt]",
+            usage_metadata={"input_tokens": len(prompt) // 4, "output_tokens": 12, "total_tokens": len(prompt) // 4 + 12},
+        )
+
+
+def invoice_paths(source: str) -> Iterator[str]:
+    """
+    PDF paths from a directory (searched recursively) or a manifest file
+    with one path per line. Relative manifest entries are resolved against
+    the manifest's directory. Paths are yielded lazily.
+    """
+    source_path = Path(source)
+    if source_path.is_dir():
+        for path in sorted(source_path.rglob("*.pdf")):
+            yield str(path)
+        return
+    with source_path.open(encoding="utf-8") as manifest:
+        for line in manifest:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield str(source_path.parent / line)
+
+
+async def run_batch(
+    paths: Iterable[str],
+    llm,
+    parse_workers: Optional[int] = None,
+    llm_concurrency: int = 8,
+    queue_size: int = 64,
+    output: Optional[str] = None,
+    cache: Optional[ResultCache] = None,
+    checkpointer: Optional[BatchedSqliteSaver] = None,
+    invoice_sink=None,
+) -> BatchStats:
+    """
+    Runs the pipeline's nodes (see pipeline.py) over many invoices as a
+    pipeline of stages.
+
+    Each node runs as its own stage, with its own workers, and the stages are
+    connected by bounded queues: invoices overlap across stages, and a slow
+    stage applies backpressure instead of letting work pile up in memory.
+    Invoices move from stage to stage along the graph's edges. The parser
+    runs in a process pool (parsing is CPU-bound), and `llm_concurrency`
+    summarizers keep at most that many LLM calls in flight; records that pass
+    validation get the templated summary without an LLM call. With a `cache`,
+    invoices whose content was already parsed or extracted skip those tools.
+    With a `checkpointer`, every completed node is recorded in the compiled
+    graph's checkpoints under the invoice's own thread, as if the graph had
+    run it, and a restarted batch resumes each invoice after its last
+    completed node (finished invoices are written to `output` from their
+    checkpoint without rework, and not to `invoice_sink` again).
+
+    Args:
+        paths: Invoice PDF paths; consumed lazily.
+        llm: Chat model with an async `ainvoke` (e.g. ChatOpenAI or StubLLM).
+        parse_workers: Parser processes (default: CPU count).
+        llm_concurrency: Maximum LLM calls in flight.
+        queue_size: Capacity of each queue in front of a stage.
+        output: Optional JSONL file for one result per invoice.
+        cache: Optional result cache for the parse and extract tools.
+        checkpointer: Optional graph checkpointer to resume from (see checkpoint.py).
+        invoice_sink: Optional columnar sink (see patterns_common.invoices.sink) for the extracted records.
+
+    Returns:
+        Throughput and per-stage timings.
+    """
+    parse_workers = parse_workers or os.cpu_count() or 1
+    # Two parses in flight per process, so a process never idles while a
+    # result travels back and the next file is handed to it.
+    workers = {"parser": 2 * parse_workers, "extractor": 1, "summarizer": llm_concurrency, "output": 1}
+    queues = {stage: asyncio.Queue(queue_size) for stage in STAGES}
+    stats = BatchStats()
+    sink = open(output, "w", encoding="utf-8") if output else None
+
+    def finish(state: dict, started: float) -> None:
+        stats.invoices += 1
+        stats.errors += bool(state.get("error"))
+        stats.latencies.append(time.perf_counter() - started)
+        if sink:
+            sink.write(json.dumps({key: state[key] for key in OUTPUT_FIELDS if state.get(key)}) + "\n")
+
+    async def feed(app):
+        for path in paths:
+            started = time.perf_counter()
+            stage, state = STAGES[0], {"file_path": path}
+            if checkpointer is not None:
+                snapshot = await app.aget_state(thread_config(path))
+                if snapshot.next or is_finished(snapshot):
+                    stats.resumed += 1
+                if is_finished(snapshot):
+                    finish(snapshot.values, started)
+                    continue
+                if resume_inputs(snapshot, path) is None:
+                    stage, state = snapshot.next[0], dict(snapshot.values)
+            await queues[stage].put((state, started))
+
+    async def work(app, stage: str, node):
+        inbox = queues[stage]
+        while (item := await inbox.get()) is not DONE:
+            state, started = item
+            try:
+                update = await node(state)
+                if checkpointer is not None:
+                    # The parser's checkpoint also records the graph's input.
+                    recorded = {"file_path": state["file_path"], **update} if stage == STAGES[0] else update
+                    await app.aupdate_state(thread_config(state["file_path"]), recorded, as_node=stage)
+            except Exception as e:
+                finish({"file_path": state["file_path"], "error": f"Pipeline failed: {e}"}, started)
+                continue
+            state.update(update)
+            following = next_stage(stage, state)
+            if following is None:
+                finish(state, started)
+            else:
+                await queues[following].put((state, started))
+
+    async def run_stage(app, stage: str, node):
+        await asyncio.gather(*(work(app, stage, node) for _ in range(workers[stage])))
+        # Every invoice bound for the next stage is queued: let its workers stop.
+        following = STAGES.index(stage) + 1
+        if following < len(STAGES):
+            for _ in range(workers[STAGES[following]]):
+                await queues[STAGES[following]].put(DONE)
+
+    async def run_feed(app):
+        await feed(app)
+        for _ in range(workers[STAGES[0]]):
+            await queues[STAGES[0]].put(DONE)
+
+    started = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=parse_workers) as pool:
+            nodes = build_nodes(llm, cache=cache, invoice_sink=invoice_sink, parse_pool=pool,
+                                llm_concurrency=llm_concurrency, stats=stats, asynchronous=True)
+            app = compile_pipeline(nodes, checkpointer)
+            tasks = [asyncio.create_task(run_feed(app))]
+            tasks += [asyncio.create_task(run_stage(app, stage, node)) for stage, node in nodes.items()]
+            try:
+                await asyncio.gather(*tasks)
+            finally:
+                # A failed stage would leave the others waiting on their queues.
+                for task in tasks:
+                    task.cancel()
+    finally:
+        if sink:
+            sink.close()
+        if checkpointer is not None:
+            checkpointer.flush()
+        if invoice_sink is not None:
+            invoice_sink.flush()
+    stats.elapsed = time.perf_counter() - started
+    return stats
+
+
+def _pdf_string(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_invoice_pdf(path: str, number: int, pages: int = 1, date: Optional[str] = None,
+                      total: Optional[str] = None) -> None:
+    """
+    Writes a minimal text PDF with the fields regex_extractor looks for. The
+    date and total are derived from `number` unless given; pages after the
+    first hold filler lines.
+    """
+    date = date or f"2024-{number % 12 + 1:02d}-{number % 28 + 1:02d}"
+    total = total or f"{number % 9000 + 100}.{number % 100:02d}"
+    lines = [f"Invoice #{number}", f"Date: {date}", f"Total: ${total}", "Items: Service A, Service B"]
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in range(pages):
+        body = lines if page == 0 else [f"Statement detail line {page}-{i}" for i in range(40)]
+        stream = "BT /F1 11 Tf 50 750 Td 14 TL " + " ".join(f"({_pdf_string(line)}) '" for line in body) + " ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Contents {len(objects)} 0 R /Resources << /Font << /F1 3 0 R >> >> >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>"
+
+    out = "%PDF-1.4\n"
+    offsets = []
+    for i, obj in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{i} 0 obj\n{obj}\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n" + "".join(f"{o:010d} 00000 n \n" for o in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+    Path(path).write_bytes(out.encode("latin-1"))
+
+
+def generate_invoices(directory: str, count: int) -> None:
+    """Fills a directory with `count` synthetic invoices for offline load tests."""
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    for number in range(count):
+        write_invoice_pdf(os.path.join(directory, f"invoice_{number:06d}.pdf"), 10000 + number)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the invoice pipeline over a directory or manifest of PDFs.")
+    parser.add_argument("source", help="Directory of PDFs, or a manifest file with one path per line")
+    parser.add_argument("--workers", type=int, default=None, help="Parser processes (default: CPU count)")
+    parser.add_argument("--llm-concurrency", type=int, default=8, help="Maximum LLM calls in flight")
+    parser.add_argument("--queue-size", type=int, default=64, help="Capacity of each queue in front of a stage")
+    parser.add_argument("--output", help="Write one JSON result per invoice to this file")
+    parser.add_argument("--stub-llm", type=float, metavar="SECONDS", nargs="?", const=0.2,
+                        help="Use an offline stub LLM with this latency instead of the real model")
+    parser.add_argument("--generate", type=int, metavar="N", help="First write N synthetic invoices into source")
+    parser.add_argument("--no-cache", action="store_true", help="Parse and extract every invoice, ignoring the result cache")
+    parser.add_argument("--checkpoint", metavar="PATH", nargs="?", const="",
+                        help="Checkpoint each completed node in a SQLite file (default: PIPELINE_CHECKPOINT_PATH "
+                             f"or {DEFAULT_CHECKPOINT_PATH}) and resume from it after a crash")
+    parser.add_argument("--restart", action="store_true", help="Discard the checkpoints and process every invoice again")
+    parser.add_argument("--sink", choices=sorted(SINKS), help="Write the extracted records in batches as csv, parquet or arrow "
+                                                               "(default: INVOICE_SINK)")
+    parser.add_argument("--sink-path", default=DEFAULT_SINK_PATH, help="Directory for the sink's part files")
+    parser.add_argument("--partition", choices=PARTITIONS, help="Partition the sink's files by invoice date")
+    args = parser.parse_args()
+
+    if args.generate:
+        generate_invoices(args.source, args.generate)
+        print(f"📝 Generated {args.generate} invoices in {args.source}")
+
+    if args.stub_llm is not None:
+        llm = StubLLM(args.stub_llm)
+    else:
+        from langchain_openai import ChatOpenAI
+        llm = ChatOpenAI(model=MODEL_NAME)
+
+    cache = None if args.no_cache else ResultCache()
+    checkpointer = BatchedSqliteSaver(connect(args.checkpoint or None)) if args.checkpoint is not None else None
+    if checkpointer is not None and args.restart:
+        checkpointer.clear()
+    invoice_sink = SINKS[args.sink](args.sink_path, partition=args.partition) if args.sink else sink_from_env()
+    print("🚀 Running batch pipeline...")
+    stats = asyncio.run(run_batch(
+        invoice_paths(args.source), llm,
+        parse_workers=args.workers, llm_concurrency=args.llm_concurrency,
+        queue_size=args.queue_size, output=args.output, cache=cache, checkpointer=checkpointer,
+        invoice_sink=invoice_sink,
+    ))
+    print(stats.report())
+    if cache is not None:
+        print(f"📦 Result cache: {cache.stats()}")
+        cache.close()
+    if checkpointer is not None:
+        checkpointer.close()
+    if invoice_sink is not None:
+        invoice_sink.close()
+        print(f"🗃️ {invoice_sink.written} records written to {invoice_sink.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+import asyncio
+import os
+import time
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Any, Callable, Dict, Optional, TypedDict
+
+from langchain_core.messages import HumanMessage
+from langgraph.graph import StateGraph, START, END
+from patterns_common.invoices.cache import ResultCache, cached_stage, is_error
+from patterns_common.invoices.sink import as_record
+
+from checkpoint import document_id
+from tools import (
+    EXTRACTOR_VERSION, PARSER_VERSION, SUMMARY_MIN_CONFIDENCE, SummaryStats, is_truncated,
+    pdf_parser, pdf_stream_extractor, regex_extractor, summary_confidence, summary_engine, summary_prompt,
+)
+
+STAGES = ("parser", "extractor", "summarizer", "output")
+
+
+# State
+class SequentialState(TypedDict):
+    file_path: str
+    raw_text: str
+    structured_data: Dict[str, Any]
+    final_summary: str
+    error: str
+
+
+@dataclass
+class PipelineStats:
+    """Time each node spent working (summed over concurrent runs) and the summarizer's fast-path counts."""
+
+    stage_seconds: Dict[str, float] = field(default_factory=lambda: dict.fromkeys(STAGES, 0.0))
+    summaries: SummaryStats = field(default_factory=SummaryStats)
+
+
+def _timed(stats: PipelineStats, stage: str, func):
+    @wraps(func)
+    def wrapper(state):
+        start = time.perf_counter()
+        try:
+            return func(state)
+        finally:
+            stats.stage_seconds[stage] += time.perf_counter() - start
+
+    @wraps(func)
+    async def async_wrapper(state):
+        start = time.perf_counter()
+        try:
+            return await func(state)
+        finally:
+            stats.stage_seconds[stage] += time.perf_counter() - start
+
+    return async_wrapper if asyncio.iscoroutinefunction(func) else wrapper
+
+
+def _in_thread(func):
+    """Async form of a blocking or CPU-bound node, run in a worker thread off the event loop."""
+
+    @wraps(func)
+    async def wrapper(state):
+        return await asyncio.to_thread(func, state)
+
+    return wrapper
+
+
+def _inline(func):
+    """Async form of a quick node, run in the event loop (a thread hop would cost more than the node)."""
+
+    @wraps(func)
+    async def wrapper(state):
+        return func(state)
+
+    return wrapper
+
+
+def build_nodes(llm, cache: Optional[ResultCache] = None, tracer=None, invoice_sink=None,
+                parse_pool: Optional[Executor] = None, llm_concurrency: Optional[int] = None,
+                stats: Optional[PipelineStats] = None, asynchronous: bool = False) -> Dict[str, Callable]:
+    """
+    Builds the parser, extractor, summarizer and output nodes, by stage name.
+
+    Each node takes a document's state and returns its update, timed into
+    `stats` and traced as a span when a tracer is given. build_pipeline()
+    joins them into the StateGraph; batch.py also runs each one as its own
+    stage. Async nodes (`asynchronous=True`) run parsing in `parse_pool`,
+    when given, as it is CPU-bound, or else in worker threads, and at most
+    `llm_concurrency` LLM summaries are in flight.
+
+    Args:
+        llm: Chat model used for records that fail validation.
+        cache: Optional result cache for the parse and extract tools.
+        tracer: Optional Tracer recording every node and tool as a span.
+        invoice_sink: Optional columnar sink (see patterns_common.invoices.sink) for the extracted records.
+        parse_pool: Optional process pool that runs pdf_parser on cache misses.
+        llm_concurrency: Maximum LLM calls in flight across async runs.
+        stats: Collects per-node time and fast-path counts.
+        asynchronous: Build async nodes, for `ainvoke`/`astream`, instead of sync ones.
+
+    Returns:
+        The nodes, keyed by stage name in STAGES order.
+    """
+    stats = stats if stats is not None else PipelineStats()
+    parse, stream_extract, extract, summarize = pdf_parser, pdf_stream_extractor, regex_extractor, summary_engine
+    if parse_pool is not None and asynchronous:
+        # Awaited in the event loop: no worker thread waits on the pool.
+        async def parse_in_pool(file_path: str) -> str:
+            return await asyncio.wrap_future(parse_pool.submit(pdf_parser, file_path))
+
+        parse = wraps(pdf_parser)(parse_in_pool)
+    elif parse_pool is not None:
+        parse = wraps(pdf_parser)(lambda file_path: parse_pool.submit(pdf_parser, file_path).result())
+    # Parse and extract results are cached by file content (see patterns_common.invoices.cache), so
+    # resubmitted invoices skip both stages.
+    if cache is not None:
+        parse = cached_stage(cache, "pdf_parser", PARSER_VERSION)(parse)
+        stream_extract = cached_stage(cache, "pdf_stream_extractor", EXTRACTOR_VERSION)(stream_extract)
+    if tracer is not None:
+        parse, stream_extract, extract, summarize = (
+            tracer.traced("tool")(tool) for tool in (parse, stream_extract, extract, summarize)
+        )
+    llm_slots = asyncio.Semaphore(llm_concurrency) if llm_concurrency else None
+
+    # Nodes
+    def parser_node(state: SequentialState):
+        """Step 1: Parse the PDF using the existing tool (text is capped for display)."""
+        text = parse(state["file_path"])
+        return {"raw_text": text, "error": text if is_error(text) else ""}
+
+    async def aparser_node(state: SequentialState):
+        text = await parse(state["file_path"])
+        return {"raw_text": text, "error": text if is_error(text) else ""}
+
+    def extractor_node(state: SequentialState):
+        """
+        Step 2: Extract structured data from the parsed text. Only when the text
+        was truncated and still lacks a field are the PDF pages streamed into
+        the regex extractor.
+        """
+        data = extract(state["raw_text"])
+        if None in data.values() and is_truncated(state["raw_text"]):
+            streamed = stream_extract(state["file_path"])
+            if "error" not in streamed:
+                data = streamed
+        return {"structured_data": data}
+
+    def summary_request(state: SequentialState):
+        """The templated summary of a validated record, or else the LLM prompt for it."""
+        data = state["structured_data"]
+        confidence, issues = summary_confidence(data)
+        if confidence >= SUMMARY_MIN_CONFIDENCE:
+            stats.summaries.fast_path += 1
+            return {"final_summary": summarize(data)}, None
+        stats.summaries.fallback += 1
+        return None, [HumanMessage(content=summary_prompt(data, issues))]
+
+    def summarizer_node(state: SequentialState):
+        """Step 3: Use the templated summary for validated records; only incomplete or anomalous ones go to the LLM."""
+        result, messages = summary_request(state)
+        if result is None:
+            result = {"final_summary": llm.invoke(messages).content}
+        return result
+
+    async def asummarizer_node(state: SequentialState):
+        result, messages = summary_request(state)
+        if result is None:
+            if llm_slots is None:
+                response = await llm.ainvoke(messages)
+            else:
+                async with llm_slots:
+                    response = await llm.ainvoke(messages)
+            result = {"final_summary": response.content}
+        return result
+
+    def output_node(state: SequentialState):
+        """Step 4: Buffer the extracted record for the columnar sink, if one is configured."""
+        record = as_record(state["structured_data"])
+        if invoice_sink is not None and record is not None:
+            invoice_sink.write(record, source=state["file_path"])
+        return {}
+
+    if asynchronous:
+        nodes = {
+            "parser": aparser_node if asyncio.iscoroutinefunction(parse) else _in_thread(parser_node),
+            "extractor": _inline(extractor_node),
+            "summarizer": asummarizer_node,
+            "output": _inline(output_node),
+        }
+    else:
+        nodes = {"parser": parser_node, "extractor": extractor_node, "summarizer": summarizer_node, "output": output_node}
+
+    wrapped = {}
+    for name, node in nodes.items():
+        node = _timed(stats, name, node)
+        if tracer is not None:
+            node = tracer.traced("node", name)(node)
+        wrapped[name] = node
+    return wrapped
+
+
+def next_stage(stage: str, state: Dict[str, Any]) -> Optional[str]:
+    """The node that follows `stage` for a document's state, or None when its run ends there."""
+    # A file that cannot be parsed ends the run with `error` set.
+    if stage == "parser" and state.get("error"):
+        return None
+    following = STAGES.index(stage) + 1
+    return STAGES[following] if following < len(STAGES) else None
+
+
+def compile_pipeline(nodes: Dict[str, Callable], checkpointer=None):
+    """Joins the nodes from build_nodes() into the parser -> extractor -> summarizer -> output StateGraph."""
+    workflow = StateGraph(SequentialState)
+    for name, node in nodes.items():
+        workflow.add_node(name, node)
+
+    workflow.add_edge(START, "parser")
+    workflow.add_conditional_edges("parser", lambda state: next_stage("parser", state) or END, ["extractor", END])
+    workflow.add_edge("extractor", "summarizer")
+    workflow.add_edge("summarizer", "output")
+    workflow.add_edge("output", END)
+    return workflow.compile(checkpointer=checkpointer)
+
+
+def build_pipeline(llm, checkpointer=None, cache: Optional[ResultCache] = None, tracer=None, invoice_sink=None,
+                   parse_pool: Optional[Executor] = None, llm_concurrency: Optional[int] = None,
+                   stats: Optional[PipelineStats] = None, asynchronous: bool = False):
+    """
+    Compiles the parser -> extractor -> summarizer -> output StateGraph.
+
+    agent.py runs it on one document with `invoke`/`stream`. batch.py runs
+    the same nodes stage by stage and uses the compiled graph for its
+    checkpoints. The arguments are those of build_nodes(), plus an optional
+    LangGraph `checkpointer` (see checkpoint.py).
+
+    Returns:
+        The compiled graph.
+    """
+    nodes = build_nodes(llm, cache=cache, tracer=tracer, invoice_sink=invoice_sink, parse_pool=parse_pool,
+                        llm_concurrency=llm_concurrency, stats=stats, asynchronous=asynchronous)
+    return compile_pipeline(nodes, checkpointer)
+
+
+def thread_config(file_path: str) -> dict:
+    """Checkpoint thread of one document, identified by path, size and mtime (see checkpoint.py)."""
+    thread_id = document_id(file_path) if os.path.isfile(file_path) else file_path
+    return {"configurable": {"thread_id": thread_id}}
+
+
+def resume_inputs(snapshot, file_path: str) -> Optional[dict]:
+    """
+    Graph input that continues a document from its checkpoint: None resumes
+    a run that stopped part way after its last completed node, anything else
+    starts from the parser.
+    """
+    return None if snapshot.next else {"file_path": file_path}
+
+
+def is_finished(snapshot) -> bool:
+    """Whether the checkpointed run of a document already produced its summary."""
+    return not snapshot.next and bool(snapshot.values.get("final_summary"))
@@ -1,31 +1,131 @@
-import re
+import datetime
+import mmap
 import os
+import re
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from pypdf import PdfReader, __version__ as PYPDF_VERSION
+from pypdf.errors import EmptyFileError, PdfReadError
+
+# Upper bound on the text pdf_parser hands to the model. Extraction does not
+# need it: pdf_stream_extractor streams every page of the file.
+MAX_PARSER_CHARS = int(os.getenv("PDF_PARSER_MAX_CHARS", 20000))
+TRUNCATION_NOTE = "[Truncated at page {page}. Use pdf_stream_extractor to process the whole file.]"
+
+# Versions of the stage outputs, part of the result cache key (see patterns_common.invoices.cache).
+# Bump EXTRACTOR_VERSION whenever FIELDS_PATTERN or the field handling changes.
+PARSER_VERSION = f"2/pypdf-{PYPDF_VERSION}/{MAX_PARSER_CHARS}"
+EXTRACTOR_VERSION = f"1/{PARSER_VERSION}"
+
+FIELDS = ("invoice_number", "date", "total")
+
+# A record's templated summary is used as is when its confidence (the share of
+# validation checks it passes) reaches SUMMARY_MIN_CONFIDENCE; otherwise the
+# LLM summarizes it. Totals above SUMMARY_MAX_TOTAL count as anomalous.
+SUMMARY_MIN_CONFIDENCE = float(os.getenv("SUMMARY_MIN_CONFIDENCE", 1.0))
+SUMMARY_MAX_TOTAL = Decimal(os.getenv("SUMMARY_MAX_TOTAL", "1000000"))
+
+# All fields in one alternation, so a text is scanned once whatever the
+# number of fields; `match.lastgroup` tells which field matched.
+FIELDS_PATTERN = re.compile(
+    r"Invoice #(?P<invoice_number>\d+)"
+    r"|Date: (?P<date>\d{4}-\d{2}-\d{2})"
+    r"|Total: \$(?P<total>\d+\.\d{2})"
+)
+
+
+def iter_pdf_pages(file_path: str) -> Iterator[str]:
+    """
+    Yields the text of a PDF one page at a time.
+
+    The file is memory-mapped instead of read into memory, and each page is
+    parsed only when the caller asks for it. Parsed objects are released
+    after every page, so memory stays flat on 500-page statements.
+
+    Args:
+        file_path: Path to the PDF file.
+
+    Yields:
+        The extracted text of each page, in order.
+
+    Raises:
+        PdfReadError: The file is empty, corrupt or has no pages.
+    """
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise EmptyFileError("the file is empty")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            reader = PdfReader(mapped)
+            if len(reader.pages) == 0:
+                raise PdfReadError("the PDF has no pages")
+            for page in reader.pages:
+                yield page.extract_text() or ""
+                reader.resolved_objects.clear()
+
 
 def pdf_parser(file_path: str) -> str:
     """
     Parses a PDF file and extracts its text content.
-    
+
+    Pages are streamed and reading stops after MAX_PARSER_CHARS characters,
+    so a long statement is not loaded in full just to be shown to the model.
+
     Args:
         file_path: Path to the PDF file.
-        
+
     Returns:
-        The extracted text from the PDF.
-    """
-    # Simple mock implementation for demonstration
-    # In a real scenario, you would use libraries like pypdf or PyMuPDF
-    # Example:
-    # import pypdf
-    # reader = pypdf.PdfReader(file_path)
-    # text = ""
-    # for page in reader.pages:
-    #     text += page.extract_text() + "\n"
-    # return text
-    
+        The extracted text from the PDF, or an "Error: ..." message when the
+        file is missing, empty, corrupt, has no pages or no extractable text.
+    """
     if not os.path.exists(file_path):
         return f"Error: File {file_path} not found."
-    
-    # Returning mock text for the "simple" request so it runs without extra deps immediately
-    return f"Mock content extracted from {file_path}:\nInvoice #12345\nDate: 2023-10-27\nTotal: $500.00\nItems: Service A, Service B"
+
+    parts = []
+    remaining = MAX_PARSER_CHARS
+    try:
+        for number, text in enumerate(iter_pdf_pages(file_path), 1):
+            if len(text) > remaining:
+                parts.append(text[:remaining])
+                parts.append(TRUNCATION_NOTE.format(page=number))
+                break
+            parts.append(text)
+            remaining -= len(text)
+    except PdfReadError as e:
+        return f"Error: Could not parse {file_path}: {e}"
+    if not any(part.strip() for part in parts):
+        return f"Error: No text could be extracted from {file_path} (is it a scanned image?)"
+    return "\n".join(parts)
+
+
+def is_truncated(text: str) -> bool:
+    """Whether pdf_parser stopped before the end of the file (see MAX_PARSER_CHARS)."""
+    return text.endswith(TRUNCATION_NOTE[TRUNCATION_NOTE.index("}") + 1:])
+
+
+def _scan(text: str, found: dict) -> bool:
+    """Fills the missing fields of `found` from one text; True once all are set."""
+    for match in FIELDS_PATTERN.finditer(text):
+        name = match.lastgroup
+        if found[name] is None:
+            found[name] = match.group(name)
+            if None not in found.values():
+                return True
+    return False
+
+
+def extract_fields(chunks: Iterable[str]) -> dict:
+    """
+    Runs the field pattern over text chunks (e.g. PDF pages) as they arrive,
+    keeping the first match of each field and stopping once all are found.
+    """
+    found = dict.fromkeys(FIELDS)
+    for chunk in chunks:
+        if _scan(chunk, found):
+            break
+    return found
+
 
 def regex_extractor(text: str) -> dict:
     """
@@ -37,19 +137,26 @@ def regex_extractor(text: str) -> dict:
     Returns:
         A dictionary containing the extracted fields.
     """
-    invoice_pattern = r"Invoice #(\d+)"
-    date_pattern = r"Date: (\d{4}-\d{2}-\d{2})"
-    total_pattern = r"Total: \$(\d+\.\d{2})"
-    
-    invoice_match = re.search(invoice_pattern, text)
-    date_match = re.search(date_pattern, text)
-    total_match = re.search(total_pattern, text)
-    
-    return {
-        "invoice_number": invoice_match.group(1) if invoice_match else None,
-        "date": date_match.group(1) if date_match else None,
-        "total": total_match.group(1) if total_match else None
-    }
+    return extract_fields([text])
+
+
+def pdf_stream_extractor(file_path: str) -> dict:
+    """
+    Extracts structured data (Invoice No, Date, Total) directly from a PDF,
+    streaming its pages into the regex extractor without building the full text.
+
+    Args:
+        file_path: Path to the PDF file.
+
+    Returns:
+        A dictionary containing the extracted fields.
+    """
+    if not os.path.exists(file_path):
+        return {"error": f"File {file_path} not found."}
+    try:
+        return extract_fields(iter_pdf_pages(file_path))
+    except PdfReadError as e:
+        return {"error": f"Could not parse {file_path}: {e}"}
 
 def summary_engine(structured_data: dict) -> str:
     """
@@ -70,3 +177,89 @@ def summary_engine(structured_data: dict) -> str:
     total = structured_data.get("total", "0.00")
     
     return f"Summary: Invoice {invoice} was issued on {date} with a total amount of ${total}."
+
+
+def summary_prompt(structured_data: dict, issues: Sequence[str] = ()) -> str:
+    """Prompt for the LLM summarizer stage, noting the problems validation found."""
+    prompt = f"""Create a professional summary of this invoice data.
+    
+    Invoice Data: {structured_data}
+    """
+    if issues:
+        prompt += f"""
+    The data failed these checks, point them out in the summary: {"; ".join(issues)}
+    """
+    return prompt
+
+
+def _invoice_number_issue(value) -> Optional[str]:
+    if not value:
+        return "invoice number is missing"
+    if not str(value).isdigit():
+        return f"invoice number {value!r} is not numeric"
+    return None
+
+
+def _date_issue(value) -> Optional[str]:
+    if not value:
+        return "date is missing"
+    try:
+        day = datetime.date.fromisoformat(str(value))
+    except ValueError:
+        return f"date {value!r} is not a valid date"
+    if day > datetime.date.today():
+        return f"date {value} is in the future"
+    return None
+
+
+def _total_issue(value) -> Optional[str]:
+    if value is None or value == "":
+        return "total is missing"
+    try:
+        total = Decimal(str(value))
+    except ArithmeticError:
+        return f"total {value!r} is not a number"
+    if not total.is_finite() or total <= 0:
+        return f"total {value} is not a positive amount"
+    if total > SUMMARY_MAX_TOTAL:
+        return f"total {value} is above {SUMMARY_MAX_TOTAL}"
+    return None
+
+
+_CHECKS = {"invoice_number": _invoice_number_issue, "date": _date_issue, "total": _total_issue}
+
+
+def summary_confidence(structured_data: dict) -> Tuple[float, List[str]]:
+    """
+    Validates an extracted record before it is summarized.
+
+    Args:
+        structured_data: The dictionary of extracted data.
+
+    Returns:
+        The share of field checks passed (1.0 for a complete, plausible
+        record) and a description of each failed check.
+    """
+    if not isinstance(structured_data, dict):
+        return 0.0, ["extracted data is not a record"]
+    if "error" in structured_data:
+        return 0.0, [str(structured_data["error"])]
+    issues = [issue for name, check in _CHECKS.items() if (issue := check(structured_data.get(name)))]
+    return 1 - len(issues) / len(_CHECKS), issues
+
+
+@dataclass
+class SummaryStats:
+    """How many records took the templated fast path and how many went to the LLM."""
+
+    fast_path: int = 0
+    fallback: int = 0
+
+    @property
+    def fast_path_rate(self) -> float:
+        total = self.fast_path + self.fallback
+        return self.fast_path / total if total else 0.0
+
+    def report(self) -> str:
+        return (f"Summaries: {self.fast_path} templated, {self.fallback} by the LLM "
+                f"({self.fast_path_rate:.0%} fast path)")
@@ -0,0 +1,87 @@
+"""
+Crash-safe batches of the LangGraph sequential pipeline: a batch interrupted
+part way is rerun against the same BatchedSqliteSaver file, and must resume
+every invoice without redoing or re-sinking the finished ones.
+"""
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+LANG_DIR = ROOT / "lang-patterns" / "sequential-pipeline"
+
+sys.path.insert(0, str(LANG_DIR))
+from batch import StubLLM, generate_invoices, invoice_paths, run_batch  # noqa: E402
+from checkpoint import BatchedSqliteSaver, connect  # noqa: E402
+from pipeline import thread_config  # noqa: E402
+
+INVOICES = 12
+INTERRUPT_AT = 5
+
+
+class Interrupted(BaseException):
+    """Stands in for a crash: not an Exception, so run_batch does not record it as a failed invoice."""
+
+
+class RecordingSink:
+    """In-memory invoice sink that can interrupt the batch on one of its writes."""
+
+    def __init__(self, interrupt_at=None):
+        self.interrupt_at = interrupt_at
+        self.sources = []
+
+    def write(self, record, source=None):
+        if self.interrupt_at is not None and len(self.sources) + 1 == self.interrupt_at:
+            raise Interrupted(source)
+        self.sources.append(source)
+
+    def flush(self):
+        pass
+
+
+def _checkpoint_counts(saver, paths):
+    return {path: len(list(saver.list(thread_config(path)))) for path in paths}
+
+
+def _run(paths, saver, sink, output):
+    return asyncio.run(run_batch(paths, StubLLM(0), parse_workers=1, llm_concurrency=2, queue_size=2,
+                                 output=str(output), checkpointer=saver, invoice_sink=sink))
+
+
+def test_interrupted_batch_resumes_without_redoing_finished_invoices(tmp_path):
+    generate_invoices(str(tmp_path / "invoices"), INVOICES)
+    paths = list(invoice_paths(str(tmp_path / "invoices")))
+    db = str(tmp_path / "checkpoints.sqlite")
+
+    first_sink = RecordingSink(interrupt_at=INTERRUPT_AT)
+    saver = BatchedSqliteSaver(connect(db))
+    with pytest.raises(Interrupted):
+        _run(paths, saver, first_sink, tmp_path / "first.jsonl")
+    finished = set(first_sink.sources)
+    saver.close()
+    assert len(finished) == INTERRUPT_AT - 1
+
+    # Restart: a new saver on the same file, as after a crash.
+    saver = BatchedSqliteSaver(connect(db))
+    before = _checkpoint_counts(saver, paths)
+    second_sink = RecordingSink()
+    stats = _run(paths, saver, second_sink, tmp_path / "second.jsonl")
+    after = _checkpoint_counts(saver, paths)
+    saver.close()
+
+    # Every invoice is sunk exactly once over both runs.
+    assert not finished & set(second_sink.sources)
+    assert sorted(first_sink.sources + second_sink.sources) == sorted(paths)
+    # Finished invoices ran no node again; the others completed.
+    assert all(after[path] == before[path] for path in finished)
+    assert all(after[path] > before[path] for path in set(paths) - finished)
+    assert stats.resumed >= len(finished)
+    assert stats.invoices == INVOICES and stats.errors == 0
+
+    # The output still has one result per invoice, finished ones read from their checkpoint.
+    results = [json.loads(line) for line in (tmp_path / "second.jsonl").read_text().splitlines()]
+    assert sorted(result["file_path"] for result in results) == sorted(paths)
+    assert all(result["final_summary"] for result in results)
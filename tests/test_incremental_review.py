@@ -0,0 +1,298 @@
+"""
+Incremental code review: mapping a diff's hunks to the functions they touch
+(patterns_common.code_review.regions), splitting and merging per-function
+reports, and reusing cached reports across edits (ReviewCache).
+"""
+import difflib
+import textwrap
+
+import pytest
+from patterns_common.cache import cache_key
+from patterns_common.code_review.cache import ReviewCache
+from patterns_common.code_review.regions import (
+    ChangedRegion,
+    changed_regions,
+    diff_regions,
+    is_unified_diff,
+    merge_region_reports,
+    parse_unified_diff,
+    split_by_region,
+)
+
+INSTRUCTION = "Review for security issues."
+
+BEFORE = textwrap.dedent('''\
+    import os
+
+    LIMIT = 10
+
+
+    def load(path):
+        with open(path) as f:
+            return f.read()
+
+
+    class Store:
+        def get(self, key):
+            return self.items[key]
+
+        @property
+        def size(self):
+            return len(self.items)
+
+
+    def outer(values):
+        def inner(value):
+            return value * 2
+        return [inner(v) for v in values]
+''')
+
+
+def _diff(before: str, after: str, path: str = "app.py") -> str:
+    return "".join(difflib.unified_diff(
+        before.splitlines(keepends=True), after.splitlines(keepends=True), f"a/{path}", f"b/{path}",
+    ))
+
+
+def _edit(source: str, old: str, new: str) -> str:
+    assert old in source
+    return source.replace(old, new, 1)
+
+
+def _names(regions):
+    return [region.name for region in regions]
+
+
+def _regions(before: str, after: str, tmp_path, path: str = "app.py"):
+    (tmp_path / path).write_text(after, encoding="utf-8")
+    return diff_regions(_diff(before, after, path), root=str(tmp_path))
+
+
+# Diff parsing
+
+
+def test_parse_unified_diff_reports_added_and_modified_lines():
+    after = _edit(BEFORE, "LIMIT = 10", "LIMIT = 20")
+    after = _edit(after, "        return f.read()\n", "        data = f.read()\n    return data\n")
+    diff = _diff(BEFORE, after)
+
+    assert is_unified_diff(diff)
+    assert parse_unified_diff(diff) == {"app.py": {3, 8, 9}}
+
+
+def test_parse_unified_diff_marks_where_lines_were_deleted():
+    after = _edit(BEFORE, "LIMIT = 10\n", "")
+    assert parse_unified_diff(_diff(BEFORE, after)) == {"app.py": {3}}
+
+
+def test_parse_unified_diff_is_not_fooled_by_lines_that_look_like_headers():
+    before = "a = 1\n-- b\nc = 3\n"
+    after = "a = 1\n++ b\nc = 3\n"
+    assert parse_unified_diff(_diff(before, after)) == {"app.py": {2}}
+
+
+def test_parse_unified_diff_skips_deleted_files():
+    diff = _diff(BEFORE, "", "gone.py").replace("+++ b/gone.py", "+++ /dev/null")
+    assert parse_unified_diff(diff) == {}
+
+
+def test_source_code_is_not_a_diff():
+    assert not is_unified_diff(BEFORE)
+
+
+# Hunk -> function mapping
+
+
+def test_hunk_maps_to_the_function_that_contains_it(tmp_path):
+    after = _edit(BEFORE, "return f.read()", "return f.read().strip()")
+    regions = _regions(BEFORE, after, tmp_path)
+
+    assert _names(regions) == ["load"]
+    assert regions[0].lineno == 6
+    assert regions[0].source.startswith("def load(path):")
+    assert "strip()" in regions[0].source
+
+
+def test_method_changes_map_to_the_method_not_the_class(tmp_path):
+    after = _edit(BEFORE, "return self.items[key]", "return self.items.get(key)")
+    assert _names(_regions(BEFORE, after, tmp_path)) == ["get"]
+
+
+def test_decorator_changes_map_to_the_decorated_function(tmp_path):
+    after = _edit(BEFORE, "@property", "@cached_property")
+    regions = _regions(BEFORE, after, tmp_path)
+
+    assert _names(regions) == ["size"]
+    assert regions[0].source.startswith("@cached_property\ndef size(self):")
+
+
+def test_nested_function_changes_map_to_the_nested_function(tmp_path):
+    after = _edit(BEFORE, "return value * 2", "return value * 3")
+    assert _names(_regions(BEFORE, after, tmp_path)) == ["inner"]
+
+
+def test_changes_outside_functions_map_to_their_statement(tmp_path):
+    after = _edit(BEFORE, "LIMIT = 10", "LIMIT = 20")
+    regions = _regions(BEFORE, after, tmp_path)
+
+    assert _names(regions) == ["<line 3>"]
+    assert regions[0].source == "LIMIT = 20"
+
+
+def test_hunks_in_several_functions_give_one_region_each_in_file_order(tmp_path):
+    after = _edit(BEFORE, "return value * 2", "return value * 3")
+    after = _edit(after, "with open(path) as f:", "with open(path, encoding='utf-8') as f:")
+    after = _edit(after, "return f.read()", "return f.read().strip()")
+    assert _names(_regions(BEFORE, after, tmp_path)) == ["load", "inner"]
+
+
+def test_unparsable_file_is_one_region():
+    code = "def broken(:\n    pass\n"
+    assert changed_regions("bad.py", code, {1}) == [ChangedRegion("bad.py", "<file>", 1, code)]
+
+
+def test_diff_regions_skips_non_python_and_missing_files(tmp_path):
+    (tmp_path / "notes.txt").write_text("new\n", encoding="utf-8")
+    diff = _diff("old\n", "new\n", "notes.txt") + _diff("a = 1\n", "a = 2\n", "missing.py")
+    assert diff_regions(diff, root=str(tmp_path)) == []
+
+
+# Splitting and merging reports
+
+
+@pytest.fixture
+def regions():
+    return [
+        ChangedRegion("app.py", "load", 6, "def load(path): ..."),
+        ChangedRegion("app.py", "load_all", 20, "def load_all(paths): ..."),
+        ChangedRegion("lib/util.py", "get", 3, "def get(self, key): ..."),
+    ]
+
+
+def test_split_by_region_cuts_a_report_at_each_heading(regions):
+    report = textwrap.dedent("""\
+        Intro the model added.
+
+        ## **app.py: load_all** (line 20)
+        Loads every path twice.
+
+        ### app.py: load (line 6)
+        Opens files without an encoding.
+
+        # lib/util.py: get
+        KeyError on missing keys.
+    """)
+    parts = split_by_region(report, regions)
+
+    assert parts == {
+        regions[0]: "Opens files without an encoding.",
+        regions[1]: "Loads every path twice.",
+        regions[2]: "KeyError on missing keys.",
+    }
+
+
+def test_split_by_region_leaves_out_regions_without_a_heading(regions):
+    report = f"{regions[2].heading}\nLooks fine."
+    assert split_by_region(report, regions) == {regions[2]: "Looks fine."}
+
+
+def test_merge_region_reports_keeps_region_order_and_skips_missing_parts(regions):
+    parts = {regions[2]: "KeyError on missing keys.", regions[0]: "Opens files without an encoding."}
+    merged = merge_region_reports(regions, parts)
+
+    assert merged == (
+        f"{regions[0].heading}\nOpens files without an encoding.\n\n"
+        f"{regions[2].heading}\nKeyError on missing keys."
+    )
+
+
+def test_merged_report_splits_back_into_its_parts(regions):
+    parts = {region: f"Report on {region.name}." for region in regions}
+    assert split_by_region(merge_region_reports(regions, parts), regions) == parts
+
+
+# Cached reports across edits
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ReviewCache(str(tmp_path / "reviews.sqlite"))
+    yield cache
+    cache.close()
+
+
+def _review(regions, cache):
+    """Reports of each region: cached ones reused, the others "reviewed" and stored."""
+    reviewed = []
+    reports = {}
+    for region in regions:
+        key = cache_key(region.source, INSTRUCTION)
+        report = cache.get(key)
+        if report is None:
+            report = f"Report on {region.name}."
+            cache.put(key, report)
+            reviewed.append(region.name)
+        reports[region] = report
+    return reports, reviewed
+
+
+def test_unchanged_functions_hit_the_cache_after_an_edit(tmp_path, cache):
+    first = _edit(BEFORE, "return f.read()", "return f.read().strip()")
+    first = _edit(first, "return value * 2", "return value * 3")
+    _, reviewed = _review(_regions(BEFORE, first, tmp_path), cache)
+    assert reviewed == ["load", "inner"]
+    assert (cache.hits, cache.misses) == (0, 2)
+
+    # The next change edits inner again and adds a constant, which only moves load down.
+    second = _edit(first, "LIMIT = 10\n", "LIMIT = 10\nRETRIES = 3\n")
+    second = _edit(second, "return value * 3", "return value * 4")
+    regions = _regions(BEFORE, second, tmp_path)
+    reports, reviewed = _review(regions, cache)
+
+    assert _names(regions) == ["<line 4>", "load", "inner"]
+    assert regions[1].lineno == 7
+    assert reviewed == ["<line 4>", "inner"]
+    assert reports[regions[1]] == "Report on load."
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 4, 4)
+
+
+def test_reverting_an_edit_hits_the_earlier_report(tmp_path, cache):
+    edited = _edit(BEFORE, "return self.items[key]", "return self.items.get(key)")
+    _review(changed_regions("app.py", edited, {13}), cache)
+    _review(changed_regions("app.py", BEFORE, {13}), cache)
+    _, reviewed = _review(changed_regions("app.py", edited, {13}), cache)
+
+    assert reviewed == []
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_reports_are_keyed_by_instruction_too(cache):
+    region = changed_regions("app.py", BEFORE, {7})[0]
+    cache.put(cache_key(region.source, INSTRUCTION), "Security report.")
+    assert cache.get(cache_key(region.source, "Review for style.")) is None
+
+
+def test_reports_persist_across_cache_instances(tmp_path):
+    path = str(tmp_path / "reviews.sqlite")
+    region = changed_regions("app.py", BEFORE, {7})[0]
+    first = ReviewCache(path)
+    first.put(cache_key(region.source, INSTRUCTION), "Report on load.")
+    first.close()
+
+    second = ReviewCache(path)
+    assert second.get(cache_key(region.source, INSTRUCTION)) == "Report on load."
+    second.close()
+
+
+def test_least_recently_used_reports_are_evicted_beyond_the_size_bound(tmp_path):
+    cache = ReviewCache(str(tmp_path / "reviews.sqlite"), max_bytes=25)
+    cache.put("a", "x" * 10)
+    cache.put("b", "x" * 10)
+    assert cache.get("a") is not None
+    cache.put("c", "x" * 10)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["bytes"] <= 25
+    cache.close()
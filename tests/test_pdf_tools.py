@@ -0,0 +1,146 @@
+"""
+PDF tools of the three sequential pipelines (pdf_parser, pdf_stream_extractor,
+iter_pdf_pages), run on PDFs generated for each test.
+"""
+import importlib
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+from pypdf import PdfWriter
+from pypdf.errors import PdfReadError
+
+ROOT = Path(__file__).resolve().parents[1]
+LANG_DIR = ROOT / "lang-patterns" / "sequential-pipeline"
+ADK_TOOLS = ROOT / "adk-google-patterns" / "sequential-pipeline" / "tools.py"
+CREW_SRC = ROOT / "crew-patterns" / "sequential_pipeline" / "src"
+
+sys.path.insert(0, str(LANG_DIR))
+from batch import write_invoice_pdf  # noqa: E402
+
+
+def _load(name: str, path: Path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class CrewTools:
+    """The CrewAI tools module, with the tool objects unwrapped into the plain, uncached functions."""
+
+    def __init__(self, module):
+        self.module = module
+        self.pdf_parser = module.pdf_parser.func.__wrapped__
+        self.pdf_stream_extractor = module.pdf_stream_extractor.func.__wrapped__
+        self.iter_pdf_pages = module.iter_pdf_pages
+
+    def __getattr__(self, name):
+        return getattr(self.module, name)
+
+
+@pytest.fixture(params=["langgraph", "adk", "crewai"])
+def tools(request, tmp_path, monkeypatch):
+    monkeypatch.setenv("PIPELINE_CACHE_PATH", str(tmp_path / "cache.sqlite"))
+    if request.param == "langgraph":
+        return _load("lang_sequential_tools", LANG_DIR / "tools.py")
+    if request.param == "adk":
+        return _load("adk_sequential_tools", ADK_TOOLS)
+    pytest.importorskip("crewai")
+    monkeypatch.syspath_prepend(str(CREW_SRC))
+    return CrewTools(importlib.import_module("sequential_pipeline.tools.tools"))
+
+
+@pytest.fixture
+def invoice(tmp_path):
+    path = tmp_path / "invoice.pdf"
+    write_invoice_pdf(str(path), 12345, date="2023-10-27", total="500.00")
+    return str(path)
+
+
+def test_parses_a_valid_invoice(tools, invoice):
+    text = tools.pdf_parser(invoice)
+
+    assert "Invoice #12345" in text
+    assert "Date: 2023-10-27" in text
+    assert "Total: $500.00" in text
+    assert tools.pdf_stream_extractor(invoice) == {"invoice_number": "12345", "date": "2023-10-27", "total": "500.00"}
+
+
+def test_bundled_sample_invoice_has_text(tools):
+    sample = Path(tools.__file__).resolve().parent
+    sample = next(p for p in (sample / "invoice.pdf", sample.parent / "invoice.pdf") if p.exists())
+
+    assert tools.pdf_stream_extractor(str(sample))["invoice_number"] == "12345"
+
+
+def test_streams_every_page_of_a_multi_page_statement(tools, tmp_path):
+    path = str(tmp_path / "statement.pdf")
+    write_invoice_pdf(path, 777, pages=5)
+
+    pages = list(tools.iter_pdf_pages(path))
+
+    assert len(pages) == 5
+    assert "Invoice #777" in pages[0]
+    assert all("Statement detail line" in page for page in pages[1:])
+    assert tools.pdf_stream_extractor(path)["invoice_number"] == "777"
+
+
+def test_truncates_long_statements_but_extraction_sees_every_page(tools, tmp_path, monkeypatch):
+    path = str(tmp_path / "statement.pdf")
+    write_invoice_pdf(path, 777, pages=5)
+    monkeypatch.setattr(getattr(tools, "module", tools), "MAX_PARSER_CHARS", 200)
+
+    text = tools.pdf_parser(path)
+
+    assert "[Truncated at page" in text
+    assert "Statement detail line 4-" not in text
+    assert tools.pdf_stream_extractor(path)["total"] is not None
+
+
+@pytest.mark.parametrize("content, message", [
+    (b"", "empty"),
+    (b"not a pdf at all" * 8, "Could not parse"),
+])
+def test_empty_or_corrupt_files_are_errors(tools, tmp_path, content, message):
+    path = tmp_path / "broken.pdf"
+    path.write_bytes(content)
+
+    assert tools.pdf_parser(str(path)).startswith("Error:")
+    assert message in tools.pdf_parser(str(path))
+    assert "error" in tools.pdf_stream_extractor(str(path))
+
+
+def test_truncated_file_is_an_error(tools, invoice, tmp_path):
+    data = Path(invoice).read_bytes()
+    path = tmp_path / "truncated.pdf"
+    path.write_bytes(data[: len(data) // 2])
+
+    assert tools.pdf_parser(str(path)).startswith("Error: Could not parse")
+    with pytest.raises(PdfReadError):
+        list(tools.iter_pdf_pages(str(path)))
+
+
+def test_zero_page_pdf_is_an_error(tools, tmp_path):
+    path = tmp_path / "no-pages.pdf"
+    PdfWriter().write(str(path))
+
+    assert "no pages" in tools.pdf_parser(str(path))
+    assert "error" in tools.pdf_stream_extractor(str(path))
+
+
+def test_pdf_without_text_is_an_error(tools, tmp_path):
+    path = tmp_path / "scanned.pdf"
+    writer = PdfWriter()
+    writer.add_blank_page(612, 792)
+    writer.write(str(path))
+
+    assert tools.pdf_parser(str(path)).startswith("Error: No text could be extracted")
+
+
+def test_missing_file_is_an_error(tools, tmp_path):
+    missing = str(tmp_path / "missing.pdf")
+
+    assert tools.pdf_parser(missing) == f"Error: File {missing} not found."
+    assert tools.pdf_stream_extractor(missing) == {"error": f"File {missing} not found."}
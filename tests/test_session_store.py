@@ -0,0 +1,197 @@
+"""
+Per-session conversation state of the coordinators (patterns_common.sessions),
+driven by an injected clock: idle-TTL expiry, LRU eviction, and spilling to
+SQLite and restoring from it.
+"""
+import pytest
+from patterns_common.sessions import SessionStore
+
+TTL = 60.0
+
+
+class Clock:
+    """Settable clock for SessionStore, in seconds."""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def store(clock):
+    return SessionStore(max_sessions=3, ttl_seconds=TTL, clock=clock)
+
+
+@pytest.fixture
+def spill_path(tmp_path):
+    return str(tmp_path / "sessions.db")
+
+
+def _spilling_store(spill_path, clock, max_sessions=2):
+    return SessionStore(max_sessions=max_sessions, ttl_seconds=TTL, spill_path=spill_path, clock=clock)
+
+
+# Expiry
+
+
+def test_records_are_returned_until_they_have_been_idle_for_the_ttl(store, clock):
+    store.put("a", b"state")
+    clock.advance(TTL - 1)
+    assert store.get("a") == b"state"
+    assert store.get("unknown") is None
+    assert store.expired == 0
+
+
+def test_idle_records_expire(store, clock):
+    store.put("a", b"state")
+    clock.advance(TTL)
+
+    assert store.get("a") is None
+    assert store.expired == 1
+    # An expired record is gone, not just hidden.
+    assert store.get("a") is None
+    assert store.expired == 1
+
+
+def test_reading_a_record_restarts_its_idle_time(store, clock):
+    store.put("a", b"state")
+    clock.advance(TTL - 1)
+    assert store.get("a") == b"state"
+    clock.advance(TTL - 1)
+    assert store.get("a") == b"state"
+
+
+def test_expired_records_are_dropped_when_others_are_written(store, clock):
+    store.put("a", b"old")
+    clock.advance(TTL / 2)
+    store.put("b", b"newer")
+    clock.advance(TTL / 2)
+    store.put("c", b"new")
+
+    stats = store.stats()
+    assert (stats["sessions"], stats["expired"]) == (2, 1)
+    assert stats["record_bytes"] == len(b"newer") + len(b"new")
+
+
+def test_ttl_and_size_default_to_the_environment(monkeypatch):
+    monkeypatch.setenv("SESSION_STORE_SIZE", "5")
+    monkeypatch.setenv("SESSION_STORE_TTL", "7.5")
+    store = SessionStore()
+    assert (store.max_sessions, store.ttl_seconds, store.spill_path) == (5, 7.5, None)
+
+
+# LRU eviction
+
+
+def test_least_recently_used_records_are_evicted_beyond_the_cap(store, clock):
+    for session in "abc":
+        store.put(session, session.encode())
+        clock.advance(1)
+    assert store.get("a") == b"a"
+    store.put("d", b"d")
+
+    assert store.get("b") is None
+    assert [store.get(session) for session in "acd"] == [b"a", b"c", b"d"]
+    stats = store.stats()
+    assert (stats["sessions"], stats["expired"], stats["spilled"]) == (3, 0, 0)
+
+
+def test_rewriting_a_record_makes_it_most_recently_used(store):
+    for session in "abc":
+        store.put(session, b"v1")
+    store.put("a", b"v2")
+    store.put("d", b"v1")
+
+    assert store.get("a") == b"v2"
+    assert store.get("b") is None
+
+
+def test_deleted_records_are_forgotten(store):
+    store.put("a", b"state")
+    store.delete("a")
+    store.delete("unknown")
+    assert store.get("a") is None
+    assert store.stats()["sessions"] == 0
+
+
+# Spill to SQLite and restore
+
+
+def test_evicted_records_spill_to_sqlite_and_are_restored(spill_path, clock):
+    store = _spilling_store(spill_path, clock)
+    for session in "abc":
+        store.put(session, session.encode())
+        clock.advance(1)
+
+    stats = store.stats()
+    assert (stats["sessions"], stats["spilled_sessions"], stats["spilled"]) == (2, 1, 1)
+
+    assert store.get("a") == b"a"
+    stats = store.stats()
+    assert stats["restored"] == 1
+    # Restoring "a" made room by spilling the least recently used, "b".
+    assert (stats["sessions"], stats["spilled_sessions"], stats["spilled"]) == (2, 1, 2)
+    assert store.get("b") == b"b"
+    assert store.stats()["restored"] == 2
+
+
+def test_restored_records_keep_their_idle_time_from_before_the_spill(spill_path, clock):
+    store = _spilling_store(spill_path, clock)
+    for session in "abc":
+        store.put(session, session.encode())
+    clock.advance(TTL)
+
+    assert store.get("a") is None
+    stats = store.stats()
+    assert (stats["restored"], stats["expired"], stats["spilled_sessions"]) == (0, 1, 0)
+
+
+def test_expired_spilled_records_are_purged_on_the_next_spill(spill_path, clock):
+    store = _spilling_store(spill_path, clock)
+    for session in "abc":
+        store.put(session, session.encode())
+    clock.advance(TTL / 2)
+    store.put("d", b"d")
+    assert store.stats()["spilled_sessions"] == 2
+    clock.advance(TTL / 2)
+    store.put("e", b"e")
+    store.put("f", b"f")
+
+    # "a" and "b" expired on disk and "c" in memory; only "d" was spilled since.
+    stats = store.stats()
+    assert (stats["spilled_sessions"], stats["expired"]) == (1, 1)
+    assert store.get("a") is None and store.get("b") is None
+    assert store.get("d") == b"d"
+
+
+def test_spilled_records_survive_a_restart(spill_path, clock):
+    first = _spilling_store(spill_path, clock)
+    for session in "abc":
+        first.put(session, session.encode())
+
+    second = _spilling_store(spill_path, clock)
+    assert second.get("a") == b"a"
+    assert second.restored == 1
+    # Records still in the first store's memory were never written.
+    assert second.get("c") is None
+
+
+def test_deleted_records_are_removed_from_disk(spill_path, clock):
+    store = _spilling_store(spill_path, clock)
+    for session in "abc":
+        store.put(session, session.encode())
+    store.delete("a")
+
+    assert store.get("a") is None
+    assert store.stats()["spilled_sessions"] == 0
+    assert store.restored == 0